@@ -0,0 +1,96 @@
+"""Benchmark parsing a large task manifest.
+
+Generates a ``pixi.toml`` with many tasks and platform overrides, like
+the generated manifests of big projects, and compares how long it takes
+to load it with tomlkit (which conda-tasks used to read task files with),
+with the parser ``conda task run`` and ``conda task list`` use, and from
+the parsed-manifest cache later runs load it from::
+
+    python benchmarks/parse_manifest.py --tasks 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import tomlkit
+
+from conda_tasks.manifestcache import (
+    load_manifest,
+    manifest_cache_path,
+    store_manifest,
+)
+from conda_tasks.parsers.base import read_toml
+from conda_tasks.parsers.pixi_toml import PixiTomlParser
+
+PLATFORMS = ("linux-64", "osx-arm64", "win-64")
+
+
+def manifest(tasks: int) -> str:
+    """Return a ``pixi.toml`` with *tasks* tasks, a third of them overridden."""
+    lines = ["[tasks]"]
+    for i in range(tasks):
+        deps = f', depends-on = ["task-{i - 1}"]' if i else ""
+        lines.append(
+            f'task-{i} = {{ cmd = "python -m tool --step {i}"{deps}, '
+            f'inputs = ["src/{i}/**/*.py"], outputs = ["build/{i}"], '
+            f'env = {{ STEP = "{i}" }}, description = "Run step {i}" }}'
+        )
+    for n, platform in enumerate(PLATFORMS):
+        lines += ["", f"[target.{platform}.tasks]"]
+        lines += [
+            f'task-{i} = "tool-{platform} --step {i}"'
+            for i in range(n, tasks, 3 * len(PLATFORMS))
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def bench(label: str, func, repeat: int) -> float:
+    """Print and return the best of *repeat* timings of *func*, in seconds."""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"  {label:<28} {best * 1000:9.2f} ms")
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pixi.toml"
+        path.write_text(manifest(args.tasks), encoding="utf-8")
+        size = path.stat().st_size
+        print(f"pixi.toml with {args.tasks} tasks ({size / 1024:.0f} KiB):")
+
+        def with_tomlkit():
+            return tomlkit.loads(path.read_text(encoding="utf-8")).unwrap()
+
+        assert with_tomlkit() == read_toml(path)
+        slow = bench("tomlkit.loads().unwrap()", with_tomlkit, args.repeat)
+        fast = bench("read_toml()", lambda: read_toml(path), args.repeat)
+        bench(
+            "PixiTomlParser().parse()",
+            lambda: PixiTomlParser().parse(path),
+            args.repeat,
+        )
+        print(f"  read_toml() is {slow / fast:.1f}x faster than tomlkit")
+
+        # Backdate the file so that it counts as settled and gets cached.
+        os.utime(path, ns=(0, 10**9))
+        store_manifest(path, PixiTomlParser().parse(path))
+        try:
+            bench("load_manifest() (cached)", lambda: load_manifest(path), args.repeat)
+        finally:
+            manifest_cache_path(path.parent, path.name).unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Benchmark what the conda plugin adds to every conda invocation.
+
+conda imports ``conda_tasks.plugin`` through its entry point and calls
+its hooks on every run, ``conda install`` included.  Each measurement
+runs in a fresh interpreter that first imports what conda itself has
+loaded by then, so only the plugin's own cost is counted:
+
+- ``cold_import``: importing the plugin with no bytecode cached, as on
+  the first run after installing or upgrading it;
+- ``warm_import``: importing it with bytecode cached, as on every later
+  run;
+- ``settings_first`` / ``settings_again``: the first and later calls of
+  the ``conda_settings`` hook;
+- ``subcommands_first``: the first ``conda_subcommands`` call, which
+  imports the CLI module.
+
+Results are medians in milliseconds.  They are compared against
+``plugin_overhead.json`` next to this script, and the exit status is 1
+when one regressed past its allowance (``tolerance`` times the baseline
+plus ``slack_ms``)::
+
+    python benchmarks/plugin_overhead.py
+    python benchmarks/plugin_overhead.py --update-baselines
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASELINES = Path(__file__).with_name("plugin_overhead.json")
+
+#: Modules conda has imported by the time it loads its plugins.
+CONDA_PRELOAD = (
+    "conda.base.context",
+    "conda.cli.helpers",
+    "conda.common.configuration",
+    "conda.plugins",
+    "conda.plugins.types",
+)
+
+#: Run in a fresh interpreter; prints the timings as JSON.
+PROBE = f"""
+import importlib, json, time
+for name in {CONDA_PRELOAD!r}:
+    importlib.import_module(name)
+t0 = time.perf_counter()
+import conda_tasks.plugin as plugin
+t1 = time.perf_counter()
+list(plugin.conda_settings())
+t2 = time.perf_counter()
+list(plugin.conda_subcommands())
+t3 = time.perf_counter()
+n = 1000
+for _ in range(n):
+    list(plugin.conda_settings())
+t4 = time.perf_counter()
+print(json.dumps({{
+    "import": (t1 - t0) * 1000,
+    "settings_first": (t2 - t1) * 1000,
+    "subcommands_first": (t3 - t2) * 1000,
+    "settings_again": (t4 - t3) * 1000 / n,
+}}))
+"""
+
+
+def _probe(pycache_prefix: str) -> dict[str, float]:
+    env = {**os.environ, "PYTHONPYCACHEPREFIX": pycache_prefix}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out)
+
+
+def measure(repeat: int = 7) -> dict[str, float]:
+    """Return the median of *repeat* measurements of each metric."""
+    cold: list[float] = []
+    warm: list[dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeat):
+            # A new, empty bytecode cache makes every module compile again.
+            cold.append(_probe(os.path.join(tmp, f"cold-{i}"))["import"])
+        warm_cache = os.path.join(tmp, "warm")
+        _probe(warm_cache)
+        warm = [_probe(warm_cache) for _ in range(repeat)]
+    return {
+        "cold_import": statistics.median(cold),
+        "warm_import": statistics.median(w["import"] for w in warm),
+        "settings_first": statistics.median(w["settings_first"] for w in warm),
+        "settings_again": statistics.median(w["settings_again"] for w in warm),
+        "subcommands_first": statistics.median(w["subcommands_first"] for w in warm),
+    }
+
+
+def load_baselines(path: Path = BASELINES) -> dict:
+    """Return the stored baselines and allowances."""
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def regressions(results: dict[str, float], baselines: dict) -> list[str]:
+    """Describe every metric in *results* that exceeds its allowance."""
+    found = []
+    for name, value in results.items():
+        allowed = (
+            baselines["metrics"][name] * baselines["tolerance"] + baselines["slack_ms"]
+        )
+        if value > allowed:
+            found.append(f"{name}: {value:.3f} ms > {allowed:.3f} ms allowed")
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help=f"Store the results as the new baselines in {BASELINES.name}.",
+    )
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    baselines = load_baselines()
+    for name, value in results.items():
+        base = baselines["metrics"].get(name)
+        ref = "" if base is None else f"  (baseline {base:.3f} ms)"
+        print(f"  {name:<18} {value:8.3f} ms{ref}")
+
+    if args.update_baselines:
+        baselines["metrics"] = {k: round(v, 3) for k, v in results.items()}
+        BASELINES.write_text(json.dumps(baselines, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    found = regressions(results, baselines)
+    for line in found:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
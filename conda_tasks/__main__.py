@@ -8,16 +8,47 @@ conda plugin dispatch::
     ct add lint "ruff check ."
 
 It reuses the same parser and execute logic as ``conda task``.
+
+Being a command people type all the time, ``ct`` keeps startup lean:
+only the arguments of the subcommand being run are set up, and conda's
+configuration (the ``conda.base.context``) is only loaded once something
+needs it: an environment given with ``-n`` or, without ``CONDA_PREFIX``,
+the default one; a ``.condarc`` that sets something for conda-tasks (see
+``conda_tasks.settings``); tasks with platform overrides; a ``conda.*``
+template variable; or activating an environment for the first time.
 """
 
 from __future__ import annotations
 
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+#: Top-level options that take a value.
+_VALUE_OPTIONS = ("-f", "--file")
+
+
+def requested_subcommand(args: Sequence[str]) -> str | None:
+    """Return the subcommand named in the command line *args*, if any."""
+    it = iter(args)
+    for arg in it:
+        if arg in _VALUE_OPTIONS:
+            next(it, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
 
 def main(args: list[str] | None = None) -> None:
     """Entry point for the ``ct`` console script."""
     from .cli.main import execute, generate_parser
 
-    parser = generate_parser()
+    if args is None:
+        args = sys.argv[1:]
+    subcommand = requested_subcommand(args)
+    parser = generate_parser(() if subcommand is None else (subcommand,))
     parser.prog = "ct"
 
     parsed = parser.parse_args(args)
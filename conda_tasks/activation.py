@@ -0,0 +1,193 @@
+"""Cached conda activation environments.
+
+Running a command "inside" a conda environment used to mean generating
+an activation wrapper script with ``conda.utils.wrap_subprocess_call``
+for every task, which spawns a shell that sources every ``activate.d``
+hook of the prefix before the command itself starts.
+
+``activated_env`` instead runs that wrapper once per prefix around a
+small probe (this module, run with ``python -m``) that prints the
+resulting environment.  The difference to the environment it started
+from is stored as JSON under the cache root, keyed by:
+
+* the prefix path and the mtime of its ``conda-meta/history`` (which
+  changes whenever packages are installed or removed),
+* the names and contents of its ``etc/conda/activate.d`` scripts,
+* the ``PATH`` and ``CONDA_*`` variables activation starts from, and
+* the conda version.
+
+Tasks are then run with the activated environment directly, without a
+wrapper script or an extra shell.  Variables that activation prefixed
+or suffixed (like ``PATH``) are re-applied to the current value.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+#: Directory of cached activation environments, relative to the cache root.
+ACTIVATION_DIR = "activation"
+
+#: Printed by the probe right before the JSON-encoded environment.
+_MARKER = "--- conda-tasks activated environment ---"
+
+_SET = "set"
+_UNSET = "unset"
+_PREPEND = "prepend"
+_APPEND = "append"
+
+#: Variables the wrapper shell itself sets; they are not part of activation.
+_SHELL_VARS = frozenset({"_", "SHLVL", "PWD", "OLDPWD"})
+
+#: Activation diffs already loaded or computed by this process.
+_memo: dict[str, dict[str, list[Any]]] = {}
+_lock = threading.Lock()
+
+
+def _activation_dir() -> Path:
+    from .cachedir import cache_root
+
+    return cache_root() / ACTIVATION_DIR
+
+
+def activation_key(prefix: Path, env: dict[str, str]) -> str:
+    """Return the cache key of activating *prefix* from *env*."""
+    from conda import __version__ as conda_version
+
+    h = hashlib.sha256(f"{prefix.resolve()}\0{conda_version}\0".encode())
+    try:
+        h.update(str((prefix / "conda-meta" / "history").stat().st_mtime_ns).encode())
+    except OSError:
+        h.update(b"-")
+    activate_d = prefix / "etc" / "conda" / "activate.d"
+    try:
+        scripts = sorted(activate_d.iterdir())
+    except OSError:
+        scripts = []
+    for script in scripts:
+        try:
+            h.update(f"\0{script.name}\0".encode() + script.read_bytes())
+        except OSError:
+            continue
+    for key in sorted(env):
+        if key == "PATH" or key.startswith("CONDA"):
+            h.update(f"\0{key}={env[key]}".encode())
+    return h.hexdigest()[:32]
+
+
+def _diff(before: dict[str, str], after: dict[str, str]) -> dict[str, list[Any]]:
+    """Describe how activation turned *before* into *after*."""
+    changes: dict[str, list[Any]] = {}
+    for key in before.keys() - after.keys():
+        changes[key] = [_UNSET]
+    for key, value in after.items():
+        old = before.get(key)
+        if old == value or key in _SHELL_VARS:
+            continue
+        if old and value.endswith(old):
+            changes[key] = [_PREPEND, value[: -len(old)]]
+        elif old and value.startswith(old):
+            changes[key] = [_APPEND, value[len(old) :]]
+        else:
+            changes[key] = [_SET, value]
+    return changes
+
+
+def _apply(changes: dict[str, list[Any]], env: dict[str, str]) -> dict[str, str]:
+    """Return *env* with the activation *changes* applied."""
+    result = dict(env)
+    for key, (op, *args) in changes.items():
+        if op == _UNSET:
+            result.pop(key, None)
+        elif op == _SET:
+            result[key] = args[0]
+        elif key in result:
+            value = result[key]
+            result[key] = args[0] + value if op == _PREPEND else value + args[0]
+        else:
+            result[key] = args[0].strip(os.pathsep)
+    return result
+
+
+def _probe(prefix: Path, env: dict[str, str]) -> dict[str, str] | None:
+    """Activate *prefix* in a subprocess and return its environment."""
+    from conda.base.context import context
+    from conda.utils import wrap_subprocess_call
+
+    script, command = wrap_subprocess_call(
+        context.root_prefix,
+        str(prefix),
+        context.dev,
+        getattr(context, "debug_wrapper_scripts", False),
+        [sys.executable, "-m", "conda_tasks.activation"],
+    )
+    try:
+        result = subprocess.run(
+            command, env=env, stdin=subprocess.DEVNULL, capture_output=True
+        )
+    except OSError:
+        return None
+    finally:
+        if script:
+            try:
+                Path(script).unlink()
+            except OSError:
+                pass
+
+    out = result.stdout.decode("utf-8", "replace")
+    if result.returncode != 0 or _MARKER not in out:
+        return None
+    try:
+        activated = json.loads(out.rsplit(_MARKER, 1)[1])
+    except ValueError:
+        return None
+    return activated if isinstance(activated, dict) else None
+
+
+def activated_env(prefix: Path, env: dict[str, str]) -> dict[str, str] | None:
+    """Return *env* as it would be after activating the conda env at *prefix*.
+
+    The activation is computed at most once per cache key (see the
+    module docstring).  Returns None when it cannot be computed, in
+    which case callers should fall back to a per-command wrapper.
+    """
+    key = activation_key(prefix, env)
+    with _lock:
+        changes = _memo.get(key)
+        if changes is None:
+            path = _activation_dir() / f"{key}.json"
+            try:
+                changes = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                activated = _probe(prefix, env)
+                if activated is None:
+                    return None
+                changes = _diff(env, activated)
+                _store(path, changes)
+            _memo[key] = changes
+    return _apply(changes, env)
+
+
+def _store(path: Path, changes: dict[str, list[Any]]) -> None:
+    """Atomically write *changes* to *path*, ignoring errors."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(changes), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    sys.stdout.write(f"\n{_MARKER}\n{json.dumps(dict(os.environ))}\n")
@@ -0,0 +1,211 @@
+"""Content-addressed store for task outputs.
+
+Output files are copied into ``objects/<aa>/<digest>`` blobs and a small
+JSON manifest per input key records which blob belongs at which path
+(relative to the task's working directory).  When a task's inputs hash
+to a key that was stored before, its outputs can be restored from local
+disk instead of re-running the task -- e.g. after ``git clean``, a branch
+switch, or in a fresh checkout.
+
+``prune`` evicts blobs least-recently-used first, where storing or
+restoring a blob counts as a use.  Storing never measures the store;
+``conda_tasks.cachegc`` decides when it has grown past its cap.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import Any
+
+DEFAULT_MAX_BYTES = 5 * 1024**3
+
+
+class ArtifactStore:
+    """A content-addressed blob store rooted at *root*, capped by ``prune``."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @property
+    def _objects(self) -> Path:
+        return self.root / "objects"
+
+    @property
+    def _manifests(self) -> Path:
+        return self.root / "manifests"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / digest
+
+    def _manifest_path(self, key: str) -> Path:
+        return self._manifests / f"{key}.json"
+
+    def store(self, key: str, outputs: dict[str, str], cwd: Path) -> int:
+        """Store *outputs* (``{path: digest}``) under *key*.
+
+        Paths are recorded relative to *cwd*; blobs that are already
+        present are not copied again.  Outputs outside *cwd* are not
+        stored since they could not be restored into another checkout.
+        Returns the number of bytes of new blobs.
+        """
+        rels = {path: os.path.relpath(path, cwd) for path in outputs}
+        if any(Path(rel).parts[0] == os.pardir for rel in rels.values()):
+            return 0
+
+        added = 0
+        files: dict[str, dict[str, Any]] = {}
+        for path, digest in outputs.items():
+            blob = self._blob_path(digest)
+            try:
+                st = os.stat(path)
+                mode = st.st_mode & 0o777
+                if blob.exists():
+                    os.utime(blob)
+                else:
+                    self._write_atomic(Path(path), blob)
+                    added += st.st_size
+            except OSError:
+                return added
+            files[Path(rels[path]).as_posix()] = {"digest": digest, "mode": mode}
+
+        manifest = self._manifest_path(key)
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = manifest.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"files": files}), encoding="utf-8")
+        os.replace(tmp, manifest)
+        return added
+
+    def restore(self, key: str, cwd: Path) -> bool:
+        """Restore the outputs stored under *key* into *cwd*.
+
+        Returns False -- without touching the workspace -- when there is
+        no manifest for *key* or any of its blobs has been evicted.  Also
+        returns False when copying fails, e.g. on a full or read-only disk
+        or when a blob is evicted meanwhile; outputs already copied are
+        left in place for the task, which then has to run, to overwrite.
+        """
+        manifest = self._manifest_path(key)
+        try:
+            files = json.loads(manifest.read_text(encoding="utf-8"))["files"]
+            blobs = {
+                rel: self._blob_path(info["digest"]) for rel, info in files.items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        if not all(blob.is_file() for blob in blobs.values()):
+            return False
+
+        try:
+            for rel, blob in blobs.items():
+                target = cwd / rel
+                self._write_atomic(blob, target)
+                os.chmod(target, files[rel]["mode"])
+                os.utime(blob)
+            os.utime(manifest)
+        except OSError:
+            return False
+        return True
+
+    def size(self) -> int:
+        """Return the total size in bytes of all stored blobs."""
+        total = 0
+        for blob in self._iter_blobs():
+            try:
+                total += blob.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """Return ``(last_used, size, path)`` for every stored blob."""
+        entries: list[tuple[float, int, Path]] = []
+        for blob in self._iter_blobs():
+            try:
+                st = blob.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, blob))
+        return entries
+
+    def evict(self, blobs: Iterable[Path]) -> int:
+        """Delete *blobs* and every manifest referencing them.
+
+        Returns the number of bytes freed.
+        """
+        freed = 0
+        evicted: set[str] = set()
+        for blob in blobs:
+            try:
+                size = blob.stat().st_size
+                blob.unlink()
+            except OSError:
+                continue
+            freed += size
+            evicted.add(blob.name)
+
+        if evicted:
+            self._drop_manifests(evicted)
+        return freed
+
+    def prune(self, max_bytes: int | None = None) -> int:
+        """Evict least-recently-used blobs until the store fits *max_bytes*.
+
+        Manifests that reference an evicted blob are removed too.  Returns
+        the number of bytes freed.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        victims: list[Path] = []
+        for _, size, blob in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            victims.append(blob)
+            total -= size
+        return self.evict(victims)
+
+    def clear(self) -> None:
+        """Remove every blob and manifest."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _drop_manifests(self, digests: set[str]) -> None:
+        """Delete manifests that reference any of *digests*."""
+        if not self._manifests.is_dir():
+            return
+        for manifest in self._manifests.glob("*.json"):
+            try:
+                files = json.loads(manifest.read_text(encoding="utf-8"))["files"]
+                referenced = {info["digest"] for info in files.values()}
+            except (OSError, ValueError, KeyError, TypeError):
+                referenced = None
+            if referenced is None or referenced & digests:
+                manifest.unlink(missing_ok=True)
+
+    def _iter_blobs(self) -> Iterator[Path]:
+        """Yield every blob path in the store."""
+        if not self._objects.is_dir():
+            return
+        for shard in self._objects.iterdir():
+            if shard.is_dir():
+                yield from (p for p in shard.iterdir() if not p.name.endswith(".tmp"))
+
+    @staticmethod
+    def _write_atomic(src: Path, dest: Path) -> None:
+        """Copy *src* to *dest* via a temporary file and an atomic rename."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
@@ -1,45 +1,110 @@
 """Task output caching using file fingerprints.
 
-Cache entries are stored in a platform-appropriate directory via
-``platformdirs``.  Each project gets a subdirectory keyed by a hash
-of the project root path. Within that, each task has a JSON file
-containing fingerprints of its inputs and outputs.
-
-A fast pre-check using ``(mtime, size)`` tuples avoids SHA-256
-hashing when files haven't been touched since the last run.
+Cache entries are stored in a platform-appropriate directory (see
+``conda_tasks.cachedir``).  Each project gets a subdirectory keyed by a hash
+of the project root path, holding a single SQLite database with the
+fingerprints of every task's inputs and outputs (see
+``conda_tasks.cachedb``).
+
+When a task's outputs are missing but its inputs match a previous run,
+the outputs are restored from a content-addressed ``ArtifactStore``
+shared by all projects (see ``conda_tasks.artifacts``).
+
+Cache checks are lazy: every input and output is stat'ed first and
+compared against the stored ``(mtime, size)`` tuples, and only files
+whose tuple differs are hashed.  A no-op run therefore costs one
+``stat`` per file rather than reading every byte -- and the stats come
+from the single directory walk that expands every task's globs (see
+``conda_tasks.globbing``), which skips re-reading directories that
+did not change since the last run.  Hashing itself runs
+on a thread pool with a selectable digest algorithm (see
+``conda_tasks.hashing``); each entry records its algorithm, and entries
+written with a different one are treated as misses.
+
+Nothing here deletes old project directories or artifacts; that is the
+job of ``conda_tasks.cachegc``.
 """
 
 from __future__ import annotations
 
-import glob
 import hashlib
 import json
 import os
-from pathlib import Path
+import sqlite3
+import stat
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
-from platformdirs import user_cache_dir
+from .artifacts import ArtifactStore
+from .cachedb import CacheDB
+from .cachedir import project_cache_dir
+from .cachegc import ARTIFACTS_DIR, PROJECT_ROOT_KEY, record_usage
+from .globbing import FileTree
+from .hashing import DEFAULT_ALGORITHM, HashReport, hash_files
+from .statindex import StatIndex
+from .tasklog import log_path
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
     from typing import Any
 
 
-def _cache_root() -> Path:
-    """Return the platform-appropriate root cache directory for conda-tasks."""
-    return Path(user_cache_dir("conda-tasks"))
+def load_stat_index(project_root: Path) -> StatIndex:
+    """Return the project's persistent directory listing index."""
+    return StatIndex.load(project_cache_dir(project_root) / "stat-index")
+
+
+def task_log_path(project_root: Path, name: str) -> Path:
+    """Return the file holding the captured output of task *name*'s last run."""
+    return log_path(project_cache_dir(project_root), name)
+
 
+def _artifact_store() -> ArtifactStore:
+    """Return the output artifact store shared by all projects."""
+    from .cachedir import cache_root
 
-def _project_cache_dir(project_root: Path) -> Path:
-    """Return the per-project cache directory, creating it if necessary."""
-    key = hashlib.sha256(str(project_root.resolve()).encode()).hexdigest()[:16]
-    d = _cache_root() / key
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+    return ArtifactStore(cache_root() / ARTIFACTS_DIR)
 
 
-def _cache_file(project_root: Path, task_name: str) -> Path:
-    """Return the JSON cache file path for a specific task."""
-    return _project_cache_dir(project_root) / f"{task_name}.json"
+_databases: dict[Path, CacheDB] = {}
+
+
+def _cache_db(project_root: Path) -> CacheDB:
+    """Return the (process-wide shared) cache database for a project.
+
+    Opening a project's database records its root (so ``prune_cache``
+    can tell when the project is gone) and marks it as recently used.
+    """
+    projdir = project_cache_dir(project_root)
+    path = projdir / "cache.db"
+    db = _databases.get(path)
+    if db is None:
+        db = _databases[path] = CacheDB(path)
+        root = str(project_root.resolve())
+        try:
+            if db.get_meta(PROJECT_ROOT_KEY) != root:
+                db.set_meta(PROJECT_ROOT_KEY, root)
+            os.utime(projdir)
+        except (OSError, sqlite3.Error):
+            pass
+    return db
+
+
+def load_durations(project_root: Path) -> dict[str, float]:
+    """Return the recorded average duration of the project's tasks."""
+    try:
+        return _cache_db(project_root).load_durations()
+    except sqlite3.Error:
+        return {}
+
+
+def record_durations(project_root: Path, durations: dict[str, float]) -> None:
+    """Record how long the tasks in *durations* took to run this time."""
+    try:
+        _cache_db(project_root).record_durations(durations)
+    except sqlite3.Error:
+        pass
 
 
 def _file_stat(path: str) -> tuple[float, int] | None:
@@ -51,57 +116,210 @@ def _file_stat(path: str) -> tuple[float, int] | None:
         return None
 
 
-def _file_sha256(path: str) -> str:
-    """Return the hex SHA-256 digest of the file at *path*."""
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
+def _stat_files(
+    paths: list[str], tree: FileTree | None = None
+) -> dict[str, tuple[float, int]]:
+    """Return ``{path: (mtime, size)}`` for the regular files in *paths*.
 
-def _expand_globs(patterns: list[str], cwd: Path) -> list[str]:
-    """Expand glob patterns relative to *cwd*, return sorted paths."""
-    result: set[str] = set()
-    for pattern in patterns:
-        expanded = glob.glob(str(cwd / pattern), recursive=True)
-        result.update(expanded)
-    return sorted(result)
+    Missing paths and anything that isn't a regular file (directories,
+    sockets, ...) are skipped, matching what ``_fingerprint_files`` records.
+    Stat results kept by *tree* from its walk are reused.
+    """
+    stats: dict[str, tuple[float, int]] = {}
+    for p in paths:
+        st = tree.stat(p) if tree is not None else None
+        if st is None:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+        if stat.S_ISREG(st.st_mode):
+            stats[p] = (st.st_mtime, st.st_size)
+    return stats
+
+
+def _record_mtimes(paths: list[str], dirs: dict[str, float]) -> None:
+    """Store the mtime of each of *paths* in *dirs* (``-1.0`` if missing)."""
+    for p in paths:
+        try:
+            dirs[p] = os.stat(p).st_mtime
+        except OSError:
+            dirs[p] = -1.0
 
 
-def _fingerprint_files(paths: list[str]) -> dict[str, dict[str, Any]]:
-    """Build a fingerprint dict: ``{path: {mtime, size, sha256}}``."""
+def _expand_globs(
+    patterns: list[str],
+    cwd: Path,
+    dirs: dict[str, float] | None = None,
+    tree: FileTree | None = None,
+) -> list[str]:
+    """Expand glob patterns relative to *cwd*, return sorted paths.
+
+    A pattern that matches a directory covers every file beneath it, so
+    ``outputs = ["dist/"]`` fingerprints the contents of ``dist``.  When
+    *dirs* is given, the mtimes of the directories the expansion depends
+    on are recorded in it.  Passing the run's shared *tree* lets all
+    tasks reuse one directory walk (see ``conda_tasks.globbing``).
+    """
+    return (tree or FileTree()).expand(patterns, cwd, dirs)
+
+
+def _hash_pending(
+    sizes: dict[str, int], algorithm: str, report: HashReport | None
+) -> dict[str, str]:
+    """Hash *sizes* (``{path: size}``), folding the work into *report*."""
+    if not sizes:
+        return {}
+    result = hash_files(sizes, algorithm)
+    if report is not None:
+        report.add(result)
+    return result.digests
+
+
+def _fingerprint_files(
+    paths: list[str],
+    algorithm: str = DEFAULT_ALGORITHM,
+    report: HashReport | None = None,
+    tree: FileTree | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Build a fingerprint dict: ``{path: {mtime, size, digest}}``.
+
+    Files that disappear or can't be read before they are hashed are
+    left out.
+    """
+    stats = _stat_files(paths, tree)
+    digests = _hash_pending(
+        {p: size for p, (_, size) in stats.items()}, algorithm, report
+    )
     fp: dict[str, dict[str, Any]] = {}
-    for p in paths:
-        stat = _file_stat(p)
-        if stat is None:
-            continue
-        fp[p] = {
-            "mtime": stat[0],
-            "size": stat[1],
-            "sha256": _file_sha256(p),
-        }
+    for p, (mtime, size) in stats.items():
+        if p in digests:
+            fp[p] = {"mtime": mtime, "size": size, "digest": digests[p]}
     return fp
 
 
+def _cmd_hash(cmd: str) -> str:
+    """Return the hex SHA-256 digest of a rendered command string."""
+    return hashlib.sha256(cmd.encode()).hexdigest()
+
+
+def _env_hash(env: dict[str, str]) -> str:
+    """Return the hex SHA-256 digest of a task's environment variables."""
+    return hashlib.sha256(json.dumps(env, sort_keys=True).encode()).hexdigest()
+
+
 def _compute_entry(
     cmd: str,
     env: dict[str, str],
     input_files: list[str],
     output_files: list[str],
+    algorithm: str = DEFAULT_ALGORITHM,
 ) -> dict[str, Any]:
     """Compute a cache entry from current state."""
-    cmd_hash = hashlib.sha256(cmd.encode()).hexdigest()
-    env_hash = hashlib.sha256(json.dumps(env, sort_keys=True).encode()).hexdigest()
     return {
-        "cmd_hash": cmd_hash,
-        "env_hash": env_hash,
-        "inputs": _fingerprint_files(input_files),
-        "outputs": _fingerprint_files(output_files),
+        "cmd_hash": _cmd_hash(cmd),
+        "env_hash": _env_hash(env),
+        "algorithm": algorithm,
+        "inputs": _fingerprint_files(input_files, algorithm),
+        "outputs": _fingerprint_files(output_files, algorithm),
     }
 
 
-def is_cached(
+def _pattern_hash(
+    input_patterns: list[str], output_patterns: list[str], cwd: Path
+) -> str:
+    """Return the hex SHA-256 digest of a task's glob patterns and cwd."""
+    return hashlib.sha256(
+        json.dumps([input_patterns, output_patterns, str(cwd)]).encode()
+    ).hexdigest()
+
+
+def _own_key(entry: dict[str, Any], pattern_hash: str) -> str | None:
+    """Return a key for an entry's command, env, patterns and file digests.
+
+    Returns None if any digest is unknown.
+    """
+    h = hashlib.sha256(
+        f"{entry['algorithm']}\0{entry['cmd_hash']}\0{entry['env_hash']}\0"
+        f"{pattern_hash}\0".encode()
+    )
+    for section in ("inputs", "outputs"):
+        h.update(f"{section}\0".encode())
+        for p in sorted(entry[section]):
+            digest = entry[section][p]["digest"]
+            if not digest:
+                return None
+            h.update(f"{p}\0{digest}\0".encode())
+    return h.hexdigest()
+
+
+def _combined_key(own_key: str | None, deps: Sequence[str | None]) -> str | None:
+    """Fold the combined keys of a task's dependencies into its own key.
+
+    The result is a Merkle-style key for the whole subgraph below the
+    task; it is None when the task or any dependency has no key.
+    """
+    if own_key is None or None in deps:
+        return None
+    h = hashlib.sha256(own_key.encode())
+    for dep in sorted(str(d) for d in deps):
+        h.update(f"\0{dep}".encode())
+    return h.hexdigest()
+
+
+@dataclass
+class FingerprintSnapshot:
+    """File state observed by ``check_cache``, reusable by ``save_cache``.
+
+    *inputs* maps every matched input path to ``{mtime, size, digest}``.
+    The digest is taken from the stored entry when the ``(mtime, size)``
+    tuple is unchanged, filled in when the check had to hash the file,
+    and ``None`` when it was never needed.  *outputs* is only filled in
+    on a hit.  *dirs* holds the mtimes of the directories watched for
+    new matches (only those of the inputs, unless it is a hit), and
+    *combined_key* is the key stored with the entry.  *pattern_hash*
+    identifies the globs and working directory the snapshot came from.
+    *hashed* accumulates the hashing work done for the task across
+    check, restore and save.
+    """
+
+    hit: bool
+    cmd_hash: str = ""
+    env_hash: str = ""
+    algorithm: str = DEFAULT_ALGORITHM
+    pattern_hash: str = ""
+    inputs: dict[str, dict[str, Any]] = field(default_factory=dict)
+    outputs: dict[str, dict[str, Any]] = field(default_factory=dict)
+    dirs: dict[str, float] = field(default_factory=dict)
+    combined_key: str | None = None
+    dirs_changed: bool = True
+    hashed: HashReport = field(default_factory=HashReport)
+
+
+def _load_entry(project_root: Path, task_name: str) -> dict[str, Any] | None:
+    """Read the stored cache entry for *task_name*, or None if unusable."""
+    try:
+        return _cache_db(project_root).load(task_name)
+    except sqlite3.Error:
+        return None
+
+
+def _snapshot_files(
+    cached: dict[str, Any],
+    stats: dict[str, tuple[float, int]],
+) -> dict[str, dict[str, Any]]:
+    """Pair fresh stat tuples with stored digests where the tuple is unchanged."""
+    fp: dict[str, dict[str, Any]] = {}
+    for p, (mtime, size) in stats.items():
+        prev = cached.get(p)
+        digest = None
+        if prev is not None and prev["mtime"] == mtime and prev["size"] == size:
+            digest = prev["digest"]
+        fp[p] = {"mtime": mtime, "size": size, "digest": digest}
+    return fp
+
+
+def check_cache(
     project_root: Path,
     task_name: str,
     cmd: str,
@@ -109,60 +327,310 @@ def is_cached(
     input_patterns: list[str],
     output_patterns: list[str],
     cwd: Path,
-) -> bool:
-    """Check whether the task can be skipped (cache hit).
+    algorithm: str = DEFAULT_ALGORITHM,
+    tree: FileTree | None = None,
+) -> FingerprintSnapshot:
+    """Check whether the task can be skipped and snapshot its inputs.
 
-    Returns True only when all of the following hold:
+    The result is a hit only when all of the following hold:
 
     1. A cache entry exists for the task.
-    2. The command and env hashes match.
+    2. The command and env hashes and the digest *algorithm* match.
     3. All input files match by ``(mtime, size)`` -- falling back to
-       SHA-256 if the fast check fails.
+       hashing only the files whose tuple changed.
     4. All output files still exist and match.
+
+    Inputs are always globbed and stat'ed so that a miss can hand the
+    snapshot to ``save_cache``; outputs are only looked at once the
+    inputs are known to match.  *tree* is the run's shared ``FileTree``,
+    if any.
+    """
+    snapshot = FingerprintSnapshot(
+        hit=False,
+        cmd_hash=_cmd_hash(cmd),
+        env_hash=_env_hash(env),
+        algorithm=algorithm,
+        pattern_hash=_pattern_hash(input_patterns, output_patterns, cwd),
+    )
+    cached = _load_entry(project_root, task_name) or {}
+    if cached.get("algorithm") != algorithm:
+        cached = {}
+    snapshot.combined_key = cached.get("combined_key")
+    cached_inputs = cached.get("inputs", {})
+    snapshot.inputs = _snapshot_files(
+        cached_inputs,
+        _stat_files(_expand_globs(input_patterns, cwd, snapshot.dirs, tree), tree),
+    )
+
+    if not cached:
+        return snapshot
+    if cached.get("cmd_hash") != snapshot.cmd_hash:
+        return snapshot
+    if cached.get("env_hash") != snapshot.env_hash:
+        return snapshot
+    if not _files_match(cached_inputs, snapshot.inputs, algorithm, snapshot.hashed):
+        return snapshot
+
+    cached_outputs = cached.get("outputs", {})
+    output_dirs: dict[str, float] = {}
+    outputs = _snapshot_files(
+        cached_outputs,
+        _stat_files(_expand_globs(output_patterns, cwd, output_dirs, tree), tree),
+    )
+    snapshot.hit = _files_match(cached_outputs, outputs, algorithm, snapshot.hashed)
+    if snapshot.hit:
+        snapshot.outputs = outputs
+        snapshot.dirs.update(output_dirs)
+        snapshot.dirs_changed = snapshot.dirs != cached.get("dirs")
+    return snapshot
+
+
+def record_hit(
+    project_root: Path,
+    task_name: str,
+    snapshot: FingerprintSnapshot,
+    deps: Sequence[str | None] = (),
+) -> str | None:
+    """Bring a hit entry's combined key and watched directories up to date.
+
+    *deps* are the combined keys of the task's dependencies as of this
+    run.  Returns the task's combined key; the database is only written
+    when something changed.
+    """
+    key = _combined_key(
+        _own_key(
+            {
+                "cmd_hash": snapshot.cmd_hash,
+                "env_hash": snapshot.env_hash,
+                "algorithm": snapshot.algorithm,
+                "inputs": snapshot.inputs,
+                "outputs": snapshot.outputs,
+            },
+            snapshot.pattern_hash,
+        ),
+        deps,
+    )
+    if key != snapshot.combined_key or snapshot.dirs_changed:
+        try:
+            _cache_db(project_root).refresh(task_name, key, snapshot.dirs)
+        except sqlite3.Error:
+            pass
+    return key
+
+
+@dataclass
+class CacheNode:
+    """A task as seen by ``check_closure``.
+
+    *cmd*, *env*, *inputs* and *outputs* are the rendered command,
+    environment and glob patterns, and *deps* names the cached tasks it
+    depends on directly.
     """
-    cf = _cache_file(project_root, task_name)
-    if not cf.exists():
-        return False
 
+    name: str
+    cmd: str
+    env: dict[str, str]
+    inputs: list[str]
+    outputs: list[str]
+    cwd: Path
+    algorithm: str = DEFAULT_ALGORITHM
+    deps: list[str] = field(default_factory=list)
+
+
+def check_closure(project_root: Path, nodes: list[CacheNode]) -> bool:
+    """Return True when every task in *nodes* is a cache hit.
+
+    *nodes* must be in dependency order.  All entries are loaded with a
+    single query and each task's combined key is recomputed bottom-up
+    from the current commands and environments and the stored digests;
+    any difference -- a changed command or env, a dependency that was
+    rebuilt since, a different graph -- is a miss.  Then the stored
+    files and watched directories are stat'ed, without globbing or
+    hashing anything.
+
+    A miss says nothing about which task changed; callers fall back to
+    ``check_cache`` for each task.
+    """
     try:
-        cached = json.loads(cf.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+        entries = _cache_db(project_root).load_many(n.name for n in nodes)
+    except sqlite3.Error:
         return False
 
-    input_files = _expand_globs(input_patterns, cwd)
-    output_files = _expand_globs(output_patterns, cwd)
+    keys: dict[str, str | None] = {}
+    for node in nodes:
+        entry = entries.get(node.name)
+        if entry is None or entry["algorithm"] != node.algorithm:
+            return False
+        current = dict(
+            entry, cmd_hash=_cmd_hash(node.cmd), env_hash=_env_hash(node.env)
+        )
+        own = _own_key(current, _pattern_hash(node.inputs, node.outputs, node.cwd))
+        key = _combined_key(own, [keys.get(d) for d in node.deps])
+        if key is None or key != entry["combined_key"]:
+            return False
+        keys[node.name] = key
+
+    for entry in entries.values():
+        for section in ("inputs", "outputs"):
+            for path, fp in entry[section].items():
+                if _file_stat(path) != (fp["mtime"], fp["size"]):
+                    return False
+        watched: dict[str, float] = {}
+        _record_mtimes(list(entry["dirs"]), watched)
+        if watched != entry["dirs"]:
+            return False
+    return True
 
-    current = _compute_entry(cmd, env, input_files, output_files)
 
-    if cached.get("cmd_hash") != current["cmd_hash"]:
-        return False
-    if cached.get("env_hash") != current["env_hash"]:
-        return False
+def is_cached(
+    project_root: Path,
+    task_name: str,
+    cmd: str,
+    env: dict[str, str],
+    input_patterns: list[str],
+    output_patterns: list[str],
+    cwd: Path,
+    algorithm: str = DEFAULT_ALGORITHM,
+    tree: FileTree | None = None,
+) -> bool:
+    """Return True when the task can be skipped (see ``check_cache``).
 
-    if not _files_match(cached.get("inputs", {}), current["inputs"]):
-        return False
-    if not _files_match(cached.get("outputs", {}), current["outputs"]):
+    Without a shared *tree*, the project's ``StatIndex`` is loaded for
+    the check and saved afterwards.
+    """
+    index = None
+    if tree is None:
+        index = load_stat_index(project_root)
+        tree = FileTree(index=index)
+    hit = check_cache(
+        project_root,
+        task_name,
+        cmd,
+        env,
+        input_patterns,
+        output_patterns,
+        cwd,
+        algorithm,
+        tree,
+    ).hit
+    if index is not None:
+        index.save()
+    return hit
+
+
+def _files_match(
+    cached: dict[str, Any],
+    current: dict[str, dict[str, Any]],
+    algorithm: str = DEFAULT_ALGORITHM,
+    report: HashReport | None = None,
+) -> bool:
+    """Compare a stored fingerprint dict against a snapshot of current files.
+
+    Files whose ``(mtime, size)`` is unchanged already carry the stored
+    digest and are accepted without reading them.  A size change is a
+    mismatch on its own; the remaining files are hashed together and the
+    digests are written back into *current*.
+    """
+    if cached.keys() != current.keys():
         return False
+    pending: dict[str, int] = {}
+    for path, cur in current.items():
+        if cur["digest"] is not None:
+            continue
+        if cached[path]["size"] != cur["size"]:
+            return False
+        pending[path] = cur["size"]
 
+    digests = _hash_pending(pending, algorithm, report)
+    for path in pending:
+        if path not in digests:
+            return False
+        current[path]["digest"] = digests[path]
+        if cached[path]["digest"] != digests[path]:
+            return False
     return True
 
 
-def _files_match(cached: dict[str, Any], current: dict[str, Any]) -> bool:
-    """Compare two fingerprint dicts.
+def _refresh_inputs(
+    inputs: dict[str, dict[str, Any]],
+    algorithm: str = DEFAULT_ALGORITHM,
+    report: HashReport | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Bring snapshot input fingerprints up to date after the task ran.
+
+    Inputs are re-stat'ed but not re-globbed.  Files that are unchanged
+    since the snapshot keep their digest and are only hashed when the
+    check never needed one.  Files that changed or vanished while the
+    task ran keep their pre-run ``(mtime, size)`` so the next check
+    sees the difference and runs the task again.
+    """
+    stats = _stat_files(list(inputs))
+    unchanged = {
+        p for p, fp in inputs.items() if stats.get(p) == (fp["mtime"], fp["size"])
+    }
+    digests = _hash_pending(
+        {
+            p: fp["size"]
+            for p, fp in inputs.items()
+            if p in unchanged and fp["digest"] is None
+        },
+        algorithm,
+        report,
+    )
+    refreshed: dict[str, dict[str, Any]] = {}
+    for p, fp in inputs.items():
+        digest = fp["digest"]
+        if digest is None:
+            digest = digests.get(p, "") if p in unchanged else ""
+        refreshed[p] = {"mtime": fp["mtime"], "size": fp["size"], "digest": digest}
+    return refreshed
+
+
+def _artifact_key(
+    cmd_hash: str,
+    env_hash: str,
+    algorithm: str,
+    inputs: dict[str, dict[str, Any]],
+    cwd: Path,
+) -> str | None:
+    """Return the artifact store key for a task's command, env and inputs.
 
-    Fast path: if ``(mtime, size)`` match, skip SHA-256 comparison.
+    Input paths are made relative to *cwd* so the key is stable across
+    checkouts.  Returns None if any input digest is unknown.
     """
-    if set(cached.keys()) != set(current.keys()):
+    h = hashlib.sha256(f"{algorithm}\0{cmd_hash}\0{env_hash}\0".encode())
+    for p in sorted(inputs):
+        digest = inputs[p]["digest"]
+        if not digest:
+            return None
+        h.update(f"{os.path.relpath(p, cwd)}\0{digest}\0".encode())
+    return h.hexdigest()
+
+
+def restore_outputs(snapshot: FingerprintSnapshot, cwd: Path) -> bool:
+    """Restore a task's outputs from the artifact store after a miss.
+
+    Any input digests the check didn't need are computed now (and kept
+    in *snapshot* for ``save_cache``).  Returns True when outputs
+    recorded for the same command, env and input contents were restored
+    into *cwd*.
+    """
+    pending = {p: fp["size"] for p, fp in snapshot.inputs.items() if not fp["digest"]}
+    digests = _hash_pending(pending, snapshot.algorithm, snapshot.hashed)
+    if digests.keys() != pending.keys():
         return False
-    for path, cur in current.items():
-        prev = cached.get(path)
-        if prev is None:
-            return False
-        if prev["mtime"] == cur["mtime"] and prev["size"] == cur["size"]:
-            continue
-        if prev["sha256"] != cur["sha256"]:
-            return False
-    return True
+    for p, digest in digests.items():
+        snapshot.inputs[p]["digest"] = digest
+    key = _artifact_key(
+        snapshot.cmd_hash,
+        snapshot.env_hash,
+        snapshot.algorithm,
+        snapshot.inputs,
+        cwd,
+    )
+    if key is None:
+        return False
+    return _artifact_store().restore(key, cwd)
 
 
 def save_cache(
@@ -173,10 +641,55 @@ def save_cache(
     input_patterns: list[str],
     output_patterns: list[str],
     cwd: Path,
-) -> None:
-    """Write or update the cache entry for a task."""
-    input_files = _expand_globs(input_patterns, cwd)
-    output_files = _expand_globs(output_patterns, cwd)
-    entry = _compute_entry(cmd, env, input_files, output_files)
-    cf = _cache_file(project_root, task_name)
-    cf.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+    snapshot: FingerprintSnapshot | None = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    deps: Sequence[str | None] = (),
+    tree: FileTree | None = None,
+) -> str | None:
+    """Write or update the cache entry for a task.
+
+    When *snapshot* comes from the ``check_cache`` call made before the
+    task ran, its input fingerprints (and digest algorithm) are reused
+    and only the outputs are globbed and hashed from scratch.  The
+    outputs are then also added to the artifact store under the inputs'
+    key.
+
+    *deps* are the combined keys of the task's dependencies; the task's
+    own combined key is stored with the entry and returned.  A shared
+    *tree* must have been invalidated since the task ran.
+    """
+    dirs: dict[str, float] = {}
+    if snapshot is None:
+        input_files = _expand_globs(input_patterns, cwd, dirs, tree)
+        output_files = _expand_globs(output_patterns, cwd, dirs, tree)
+        entry = _compute_entry(cmd, env, input_files, output_files, algorithm)
+    else:
+        algorithm = snapshot.algorithm
+        entry = {
+            "cmd_hash": snapshot.cmd_hash,
+            "env_hash": snapshot.env_hash,
+            "algorithm": algorithm,
+            "inputs": _refresh_inputs(snapshot.inputs, algorithm, snapshot.hashed),
+            "outputs": _fingerprint_files(
+                _expand_globs(output_patterns, cwd, dirs, tree),
+                algorithm,
+                snapshot.hashed,
+                tree,
+            ),
+        }
+        # Directories watched for inputs keep their pre-run mtimes, so an
+        # input created while the task ran is noticed next time.
+        dirs.update(snapshot.dirs)
+    entry["dirs"] = dirs
+    pattern_hash = _pattern_hash(input_patterns, output_patterns, cwd)
+    entry["combined_key"] = _combined_key(_own_key(entry, pattern_hash), deps)
+    _cache_db(project_root).save(task_name, entry)
+
+    if snapshot is not None and entry["outputs"]:
+        key = _artifact_key(
+            entry["cmd_hash"], entry["env_hash"], algorithm, entry["inputs"], cwd
+        )
+        if key is not None:
+            outputs = {p: fp["digest"] for p, fp in entry["outputs"].items()}
+            record_usage(_artifact_store().store(key, outputs, cwd))
+    return entry["combined_key"]
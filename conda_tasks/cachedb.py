@@ -0,0 +1,337 @@
+"""SQLite storage for task cache entries.
+
+Each project has a single ``cache.db`` in its cache directory, opened
+in WAL mode so concurrent readers never block on a writer.  Entries are
+stored as normalized rows -- one row per task, one row per fingerprinted
+file or watched directory, and a shared table of paths -- and every save
+is one transaction.  ``load_many`` reads the entries of a whole set of
+tasks with a single query.  The database also keeps a running average
+of each task's wall-clock duration, used to schedule long tasks first.
+
+Cache directories written by older versions hold one JSON file per task;
+those are imported on first open and removed.  A database with a
+different ``SCHEMA_VERSION`` is discarded and recreated -- the cache
+only ever costs a re-run to rebuild.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+    from typing import Any
+
+SCHEMA_VERSION = 3
+
+_INPUT = 0
+_OUTPUT = 1
+_DIR = 2
+
+#: Weight of the latest run in a task's average duration.
+DURATION_WEIGHT = 0.5
+
+_TABLES = ("files", "paths", "tasks", "durations", "meta")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    cmd_hash TEXT NOT NULL,
+    env_hash TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    combined_key TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    kind INTEGER NOT NULL,
+    path_id INTEGER NOT NULL REFERENCES paths(id),
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT,
+    PRIMARY KEY (task_id, kind, path_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS durations (
+    name TEXT PRIMARY KEY,
+    seconds REAL NOT NULL,
+    runs INTEGER NOT NULL
+);
+"""
+
+
+class CacheDB:
+    """Per-project cache database at *path*.
+
+    The connection is opened lazily and shared between threads; writes
+    are serialized with a lock.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The open connection, created (and migrated) on first use."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        if self._stored_version(conn) not in (None, SCHEMA_VERSION):
+            with conn:
+                for table in _TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+        self._conn = conn
+        self._import_json_entries()
+        return conn
+
+    @staticmethod
+    def _stored_version(conn: sqlite3.Connection) -> int | None:
+        """Return the schema version recorded in *conn*, or None if new."""
+        try:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return int(row[0]) if row else None
+
+    def close(self) -> None:
+        """Close the connection if it is open."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_meta(self, key: str) -> str | None:
+        """Return the ``meta`` value stored under *key*, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store *value* under *key* in the ``meta`` table."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def load(self, task_name: str) -> dict[str, Any] | None:
+        """Return the entry for *task_name* in the cache's dict shape.
+
+        The result has ``cmd_hash``, ``env_hash``, ``algorithm``,
+        ``combined_key``, ``inputs``, ``outputs`` and ``dirs`` keys.
+        ``inputs`` and ``outputs`` map paths to ``{mtime, size, digest}``
+        and ``dirs`` maps watched directories to their mtime.  Returns
+        None when there is no entry.
+        """
+        return self.load_many([task_name]).get(task_name)
+
+    def load_many(self, task_names: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Return ``{name: entry}`` for the stored tasks among *task_names*.
+
+        All entries are read with one query; see ``load`` for their shape.
+        """
+        entries: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT t.name, t.cmd_hash, t.env_hash, t.algorithm, "
+                "t.combined_key, f.kind, p.path, f.mtime, f.size, f.digest "
+                "FROM tasks t "
+                "LEFT JOIN files f ON f.task_id = t.id "
+                "LEFT JOIN paths p ON p.id = f.path_id "
+                "WHERE t.name IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(task_names)),),
+            )
+            for name, cmd_hash, env_hash, algorithm, combined, *file_row in rows:
+                entry = entries.get(name)
+                if entry is None:
+                    entry = entries[name] = {
+                        "cmd_hash": cmd_hash,
+                        "env_hash": env_hash,
+                        "algorithm": algorithm,
+                        "combined_key": combined,
+                        "inputs": {},
+                        "outputs": {},
+                        "dirs": {},
+                    }
+                kind, path, mtime, size, digest = file_row
+                if kind == _DIR:
+                    entry["dirs"][path] = mtime
+                elif kind is not None:
+                    section = entry["inputs"] if kind == _INPUT else entry["outputs"]
+                    section[path] = {"mtime": mtime, "size": size, "digest": digest}
+        return entries
+
+    def save(self, task_name: str, entry: dict[str, Any]) -> None:
+        """Replace the entry for *task_name* in a single transaction."""
+        rows = [
+            (kind, path, fp["mtime"], fp["size"], fp["digest"])
+            for kind, section in ((_INPUT, "inputs"), (_OUTPUT, "outputs"))
+            for path, fp in entry[section].items()
+        ]
+        rows.extend(_dir_rows(entry.get("dirs", {})))
+        with self._lock, self.conn:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO tasks "
+                "(name, cmd_hash, env_hash, algorithm, combined_key, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET cmd_hash = excluded.cmd_hash, "
+                "env_hash = excluded.env_hash, algorithm = excluded.algorithm, "
+                "combined_key = excluded.combined_key, updated = excluded.updated",
+                (
+                    task_name,
+                    entry["cmd_hash"],
+                    entry["env_hash"],
+                    entry["algorithm"],
+                    entry.get("combined_key"),
+                    time.time(),
+                ),
+            )
+            (task_id,) = conn.execute(
+                "SELECT id FROM tasks WHERE name = ?", (task_name,)
+            ).fetchone()
+            conn.execute("DELETE FROM files WHERE task_id = ?", (task_id,))
+            self._insert_files(task_id, rows)
+
+    def refresh(
+        self, task_name: str, combined_key: str | None, dirs: dict[str, float]
+    ) -> None:
+        """Update the combined key and watched directories of an entry.
+
+        Used after a cache hit, when the file fingerprints are unchanged.
+        Does nothing if there is no entry for *task_name*.
+        """
+        with self._lock, self.conn:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM tasks WHERE name = ?", (task_name,)
+            ).fetchone()
+            if row is None:
+                return
+            (task_id,) = row
+            conn.execute(
+                "UPDATE tasks SET combined_key = ?, updated = ? WHERE id = ?",
+                (combined_key, time.time(), task_id),
+            )
+            conn.execute(
+                "DELETE FROM files WHERE task_id = ? AND kind = ?", (task_id, _DIR)
+            )
+            self._insert_files(task_id, _dir_rows(dirs))
+
+    def load_durations(self) -> dict[str, float]:
+        """Return the average duration in seconds of every task that ran."""
+        with self._lock:
+            rows = self.conn.execute("SELECT name, seconds FROM durations")
+            return dict(rows.fetchall())
+
+    def record_durations(self, durations: dict[str, float]) -> None:
+        """Fold the measured *durations* (``{name: seconds}``) into the averages.
+
+        Each new measurement gets a weight of ``DURATION_WEIGHT``, so the
+        estimate follows tasks that get slower or faster over time.
+        """
+        if not durations:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO durations (name, seconds, runs) VALUES (?, ?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "seconds = seconds + ? * (excluded.seconds - seconds), "
+                "runs = runs + 1",
+                (
+                    (name, seconds, DURATION_WEIGHT)
+                    for name, seconds in durations.items()
+                ),
+            )
+
+    def _insert_files(self, task_id: int, rows: list[tuple[Any, ...]]) -> None:
+        """Insert ``(kind, path, mtime, size, digest)`` rows for *task_id*."""
+        conn = self.conn
+        conn.executemany(
+            "INSERT OR IGNORE INTO paths (path) VALUES (?)",
+            ((row[1],) for row in rows),
+        )
+        conn.executemany(
+            "INSERT INTO files (task_id, kind, path_id, mtime, size, digest) "
+            "VALUES (?, ?, (SELECT id FROM paths WHERE path = ?), ?, ?, ?)",
+            ((task_id, *row) for row in rows),
+        )
+
+    def _import_json_entries(self) -> None:
+        """Import and delete per-task JSON files left by older versions.
+
+        Those entries were always SHA-256 and stored the digest under a
+        ``sha256`` key.
+        """
+        for cf in sorted(self.path.parent.glob("*.json")):
+            try:
+                entry = json.loads(cf.read_text(encoding="utf-8"))
+                entry["algorithm"] = "sha256"
+                for section in ("inputs", "outputs"):
+                    for fp in entry[section].values():
+                        fp["digest"] = fp.pop("sha256")
+                if self.load(cf.stem) is None:
+                    self.save(cf.stem, entry)
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            cf.unlink(missing_ok=True)
+
+
+def _dir_rows(dirs: dict[str, float]) -> list[tuple[Any, ...]]:
+    return [(_DIR, path, mtime, 0, None) for path, mtime in dirs.items()]
+
+
+def read_meta(path: Path, key: str) -> str | None:
+    """Read a ``meta`` value from the database at *path* without migrating it.
+
+    The database is opened read-only, so missing, foreign or corrupt
+    files simply return None.
+    """
+    try:
+        conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, timeout=5)
+    except (sqlite3.Error, ValueError):
+        return None
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
@@ -0,0 +1,27 @@
+"""Where conda-tasks keeps its caches.
+
+Kept apart from ``conda_tasks.cache`` so that finding a project's cache
+directory -- which even ``conda task list`` does, for the parsed task
+file -- doesn't import the caching machinery (SQLite, hashing, thread
+pools) along with it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from platformdirs import user_cache_dir
+
+
+def cache_root() -> Path:
+    """Return the platform-appropriate root cache directory for conda-tasks."""
+    return Path(user_cache_dir("conda-tasks"))
+
+
+def project_cache_dir(project_root: Path) -> Path:
+    """Return the per-project cache directory, creating it if necessary."""
+    key = hashlib.sha256(str(project_root.resolve()).encode()).hexdigest()[:16]
+    d = cache_root() / key
+    d.mkdir(parents=True, exist_ok=True)
+    return d
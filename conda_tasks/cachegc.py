@@ -0,0 +1,355 @@
+"""Garbage collection for the conda-tasks cache directory.
+
+Every project run with conda-tasks gets its own directory under the
+cache root (see ``conda_tasks.cache``) and all projects share one
+artifact store.  Left alone, both grow without bound -- especially on
+CI runners and machines with many worktrees -- so ``prune_cache``:
+
+1. removes project directories whose project root no longer exists, and
+2. evicts the least recently used project directories and artifact
+   blobs until the whole cache fits the size cap.
+
+The cap defaults to ``DEFAULT_MAX_BYTES`` and is set with the
+``cache_max_size`` key of the ``conda_tasks`` plugin setting.
+
+Measuring the cache means walking all of it, so runs don't: each prune
+writes the size it left the cache at into ``PRUNE_STAMP``, and whatever
+adds to the cache afterwards -- artifact blobs, captured task logs --
+appends its size to ``USAGE_LOG`` with ``record_usage``.  Runs call
+``schedule_prune`` afterwards, which starts a detached ``conda task
+cache prune`` once that estimate exceeds the cap, at most once per
+``PRUNE_INTERVAL``; set ``cache_auto_prune: false`` to turn that off.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .artifacts import DEFAULT_MAX_BYTES, ArtifactStore
+from .cachedb import read_meta
+from .sizes import parse_size
+
+if TYPE_CHECKING:
+    from typing import Any
+
+#: Directory of the shared artifact store, relative to the cache root.
+ARTIFACTS_DIR = "artifacts"
+
+#: ``meta`` key under which a project database records its root.
+PROJECT_ROOT_KEY = "project_root"
+
+#: Minimum number of seconds between two automatic prunes.
+PRUNE_INTERVAL = 10 * 60
+
+#: Stamp file whose mtime records the start of the last prune, and whose
+#: contents the size in bytes it left the cache at.
+PRUNE_STAMP = "last-prune"
+
+#: Append-only log of the bytes added to the cache since the last prune.
+USAGE_LOG = "usage"
+
+#: Project directories that never recorded a root are kept this long.
+_UNKNOWN_ROOT_GRACE = 24 * 60 * 60
+
+_PROJECT_DIR = re.compile(r"[0-9a-f]{16}")
+
+
+def max_cache_bytes() -> int:
+    """Return the configured cache size cap in bytes."""
+    from .settings import plugin_setting
+
+    return plugin_setting("cache_max_size", DEFAULT_MAX_BYTES, convert=parse_size)
+
+
+def _default_root() -> Path:
+    from .cachedir import cache_root
+
+    return cache_root()
+
+
+def _tree_size(path: Path) -> int:
+    """Return the total size of the files beneath *path*."""
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+@dataclass
+class ProjectCache:
+    """One project's directory in the cache."""
+
+    path: Path
+    root: str | None
+    size: int
+    last_access: float
+
+    @property
+    def stale(self) -> bool:
+        """True when the project is gone and its cache can never be used."""
+        if self.root is None:
+            return time.time() - self.last_access > _UNKNOWN_ROOT_GRACE
+        return not os.path.isdir(self.root)
+
+
+@dataclass
+class CacheStats:
+    """Size and contents of the cache directory."""
+
+    root: Path
+    max_bytes: int
+    projects: list[ProjectCache] = field(default_factory=list)
+    artifact_files: int = 0
+    artifact_bytes: int = 0
+
+    @property
+    def project_bytes(self) -> int:
+        return sum(p.size for p in self.projects)
+
+    @property
+    def total_bytes(self) -> int:
+        return self.project_bytes + self.artifact_bytes
+
+    @property
+    def stale(self) -> list[ProjectCache]:
+        return [p for p in self.projects if p.stale]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the stats as a JSON-serializable dict."""
+        return {
+            "root": str(self.root),
+            "max_bytes": self.max_bytes,
+            "total_bytes": self.total_bytes,
+            "projects": [
+                {
+                    "path": str(p.path),
+                    "project_root": p.root,
+                    "bytes": p.size,
+                    "last_access": p.last_access,
+                    "stale": p.stale,
+                }
+                for p in self.projects
+            ],
+            "artifacts": {
+                "files": self.artifact_files,
+                "bytes": self.artifact_bytes,
+            },
+        }
+
+
+@dataclass
+class PruneResult:
+    """What ``prune_cache`` removed (or would remove, on a dry run)."""
+
+    projects: int = 0
+    artifacts: int = 0
+    bytes: int = 0
+
+
+def project_caches(root: Path | None = None) -> list[ProjectCache]:
+    """Return every project directory under the cache *root*."""
+    root = _default_root() if root is None else root
+    projects: list[ProjectCache] = []
+    try:
+        children = list(os.scandir(root))
+    except OSError:
+        return projects
+    for entry in children:
+        if not (_PROJECT_DIR.fullmatch(entry.name) and entry.is_dir()):
+            continue
+        path = Path(entry.path)
+        try:
+            last_access = entry.stat().st_mtime
+        except OSError:
+            continue
+        projects.append(
+            ProjectCache(
+                path=path,
+                root=read_meta(path / "cache.db", PROJECT_ROOT_KEY),
+                size=_tree_size(path),
+                last_access=last_access,
+            )
+        )
+    return sorted(projects, key=lambda p: p.last_access)
+
+
+def cache_stats(root: Path | None = None) -> CacheStats:
+    """Return the size and contents of the cache under *root*."""
+    root = _default_root() if root is None else root
+    blobs = ArtifactStore(root / ARTIFACTS_DIR).entries()
+    return CacheStats(
+        root=root,
+        max_bytes=max_cache_bytes(),
+        projects=project_caches(root),
+        artifact_files=len(blobs),
+        artifact_bytes=sum(size for _, size, _ in blobs),
+    )
+
+
+def prune_cache(
+    root: Path | None = None,
+    max_bytes: int | None = None,
+    dry_run: bool = False,
+) -> PruneResult:
+    """Remove stale projects, then evict LRU entries to fit *max_bytes*.
+
+    Project directories and artifact blobs compete for the same budget
+    (``max_cache_bytes()`` when *max_bytes* is None), oldest last access
+    first.  With *dry_run* nothing is deleted.
+    """
+    root = _default_root() if root is None else root
+    limit = max_cache_bytes() if max_bytes is None else max_bytes
+    result = PruneResult()
+
+    if not dry_run:
+        root.mkdir(parents=True, exist_ok=True)
+        (root / PRUNE_STAMP).touch()
+
+    live: list[tuple[float, int, Path, bool]] = []
+    for project in project_caches(root):
+        if project.stale:
+            result.projects += 1
+            result.bytes += project.size
+            if not dry_run:
+                shutil.rmtree(project.path, ignore_errors=True)
+        else:
+            live.append((project.last_access, project.size, project.path, False))
+
+    store = ArtifactStore(root / ARTIFACTS_DIR)
+    live.extend((used, size, blob, True) for used, size, blob in store.entries())
+
+    total = sum(size for _, size, _, _ in live)
+    evicted_blobs: list[Path] = []
+    for _, size, path, is_blob in sorted(live, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        total -= size
+        result.bytes += size
+        if is_blob:
+            result.artifacts += 1
+            evicted_blobs.append(path)
+        else:
+            result.projects += 1
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+
+    if evicted_blobs and not dry_run:
+        store.evict(evicted_blobs)
+    if not dry_run:
+        # What was recorded meanwhile is lost; the next prune measures it.
+        try:
+            (root / PRUNE_STAMP).write_text(str(total), encoding="utf-8")
+            (root / USAGE_LOG).unlink(missing_ok=True)
+        except OSError:
+            pass
+    return result
+
+
+def clear_cache(root: Path | None = None, dry_run: bool = False) -> int:
+    """Remove the whole cache under *root*; return the number of bytes freed."""
+    root = _default_root() if root is None else root
+    size = _tree_size(root)
+    if not dry_run:
+        shutil.rmtree(root, ignore_errors=True)
+    return size
+
+
+def record_usage(nbytes: int, root: Path | None = None) -> None:
+    """Record that *nbytes* were added to the cache under *root*."""
+    if nbytes <= 0:
+        return
+    root = _default_root() if root is None else root
+    try:
+        # A single short append, so concurrent runs don't mix their lines.
+        with open(root / USAGE_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{nbytes}\n")
+    except OSError:
+        pass
+
+
+def estimated_usage(root: Path | None = None) -> int | None:
+    """Return the size of the cache without walking it, as far as known.
+
+    That is the size the last prune left it at plus everything recorded
+    with ``record_usage`` since, or None when no prune recorded a size.
+    """
+    root = _default_root() if root is None else root
+    try:
+        total = int((root / PRUNE_STAMP).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    try:
+        with open(root / USAGE_LOG, encoding="utf-8") as f:
+            total += sum(int(line) for line in f if line.strip())
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError):
+        return None
+    return total
+
+
+def schedule_prune(root: Path | None = None) -> bool:
+    """Start a background prune once the cache may have outgrown its cap.
+
+    Nothing is started while ``estimated_usage`` is known to fit
+    ``max_cache_bytes()``, nor within ``PRUNE_INTERVAL`` of the last
+    prune.  Returns True when a prune process was started.  Does
+    nothing when ``cache_auto_prune`` is false in the plugin settings.
+    """
+    from .settings import as_bool, plugin_setting
+
+    if not plugin_setting("cache_auto_prune", True, convert=as_bool):
+        return False
+
+    root = _default_root() if root is None else root
+    usage = estimated_usage(root)
+    if usage is not None and usage <= max_cache_bytes():
+        return False
+
+    stamp = root / PRUNE_STAMP
+    try:
+        if time.time() - stamp.stat().st_mtime < PRUNE_INTERVAL:
+            return False
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        stamp.touch()
+        _spawn_prune()
+    except OSError:
+        return False
+    return True
+
+
+def _spawn_prune() -> None:
+    """Run ``conda task cache prune`` detached from the current process."""
+    kwargs: dict[str, Any] = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(
+        [sys.executable, "-m", "conda_tasks", "cache", "prune", "--quiet"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        **kwargs,
+    )
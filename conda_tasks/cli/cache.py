@@ -0,0 +1,66 @@
+"""Handler for ``conda task cache``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ..cachegc import cache_stats, clear_cache, prune_cache
+from ..sizes import format_size, parse_size
+
+if TYPE_CHECKING:
+    import argparse
+
+
+def _print_stats(use_json: bool) -> int:
+    stats = cache_stats()
+
+    if use_json:
+        from conda.common.io import stdout_json
+
+        stdout_json(stats.to_dict())
+        return 0
+
+    print(f"Cache directory: {stats.root}\n")
+    print(
+        f"  projects   {len(stats.projects)} ({len(stats.stale)} stale), "
+        f"{format_size(stats.project_bytes)}"
+    )
+    print(
+        f"  artifacts  {stats.artifact_files} file(s), "
+        f"{format_size(stats.artifact_bytes)}"
+    )
+    print(
+        f"  total      {format_size(stats.total_bytes)} "
+        f"of {format_size(stats.max_bytes)}"
+    )
+    return 0
+
+
+def execute_cache(args: argparse.Namespace) -> int:
+    """Execute the ``conda task cache`` subcommand."""
+    action = args.cache_action
+    dry_run = getattr(args, "dry_run", False)
+    quiet = getattr(args, "quiet", False)
+
+    if action == "stats":
+        return _print_stats(getattr(args, "json", False))
+
+    prefix = "[dry-run] Would remove" if dry_run else "Removed"
+
+    if action == "prune":
+        max_size = getattr(args, "max_size", None)
+        result = prune_cache(
+            max_bytes=None if max_size is None else parse_size(max_size),
+            dry_run=dry_run,
+        )
+        if not quiet:
+            print(
+                f"  {prefix} {result.projects} project cache(s) and "
+                f"{result.artifacts} artifact(s), {format_size(result.bytes)}"
+            )
+        return 0
+
+    freed = clear_cache(dry_run=dry_run)
+    if not quiet:
+        print(f"  {prefix} the whole cache, {format_size(freed)}")
+    return 0
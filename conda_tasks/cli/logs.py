@@ -0,0 +1,59 @@
+"""Handler for ``conda task logs``."""
+
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+from conda.base.constants import on_win
+
+from ..cache import task_log_path
+from ..exceptions import CondaTasksError, TaskNotFoundError
+from ..parsers import detect_and_parse
+
+if TYPE_CHECKING:
+    import argparse
+    from pathlib import Path
+
+
+def _page(path: Path) -> bool:
+    """Show *path* in ``$PAGER`` (``less`` by default); False if there is none."""
+    pager = os.environ.get("PAGER") or ("more" if on_win else "less")
+    try:
+        subprocess.call([*shlex.split(pager), str(path)])
+    except OSError:
+        return False
+    return True
+
+
+def execute_logs(args: argparse.Namespace) -> int:
+    """Execute the ``conda task logs`` subcommand."""
+    file_path = getattr(args, "file", None)
+    task_file, tasks = detect_and_parse(file_path=file_path)
+
+    name = args.task_name
+    if name not in tasks:
+        raise TaskNotFoundError(name, list(tasks))
+
+    path = task_log_path(task_file.parent, name)
+    if not path.is_file():
+        raise CondaTasksError(
+            f"No captured output for task '{name}'; "
+            f"run it with 'conda task run {name} --capture' first"
+        )
+
+    if getattr(args, "path", False):
+        print(path)
+        return 0
+
+    sys.stdout.flush()
+    if getattr(args, "pager", True) and sys.stdout.isatty() and _page(path):
+        return 0
+    with open(path, "rb") as f:
+        shutil.copyfileobj(f, sys.stdout.buffer)
+    sys.stdout.buffer.flush()
+    return 0
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from conda.cli.helpers import (
     add_output_and_prompt_options,
@@ -11,20 +12,35 @@ from conda.cli.helpers import (
     add_parser_prefix,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection
 
-def generate_parser() -> argparse.ArgumentParser:
-    """Build and return the parser -- used by sphinxarg.ext for docs."""
+
+def generate_parser(
+    subcommands: Collection[str] | None = None,
+) -> argparse.ArgumentParser:
+    """Build and return the parser -- used by sphinxarg.ext for docs.
+
+    See ``configure_parser`` for *subcommands*.
+    """
     parser = argparse.ArgumentParser(
         prog="conda task",
         description="Run, list, and manage project tasks.",
         add_help=False,
     )
-    configure_parser(parser)
+    configure_parser(parser, subcommands)
     return parser
 
 
-def configure_parser(parser: argparse.ArgumentParser) -> None:
-    """Set up ``conda task`` CLI with subcommands."""
+def configure_parser(
+    parser: argparse.ArgumentParser,
+    subcommands: Collection[str] | None = None,
+) -> None:
+    """Set up ``conda task`` CLI with subcommands.
+
+    Only the arguments of the *subcommands* named are added, or of all
+    of them by default; the others are listed but can't be parsed.
+    """
     add_parser_help(parser)
 
     parser.add_argument(
@@ -36,81 +52,121 @@ def configure_parser(parser: argparse.ArgumentParser) -> None:
     )
 
     sub = parser.add_subparsers(dest="subcmd")
+    for name, (help_text, configure) in SUBCOMMANDS.items():
+        sub_parser = sub.add_parser(name, help=help_text, add_help=False)
+        if subcommands is None or name in subcommands:
+            configure(sub_parser)
 
-    run_parser = sub.add_parser("run", help="Run a task.", add_help=False)
-    add_parser_help(run_parser)
-    add_parser_prefix(run_parser)
-    add_output_and_prompt_options(run_parser)
-    run_parser.add_argument("task_name", help="Name of the task to run.")
-    run_parser.add_argument(
+
+def _configure_run(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task run``."""
+    add_parser_help(p)
+    add_parser_prefix(p)
+    add_output_and_prompt_options(p)
+    p.add_argument(
+        "task_name",
+        help="Name of the task to run, or several comma-separated names "
+        "(e.g. lint,test) to run them together.",
+    )
+    p.add_argument(
         "task_args",
         nargs="*",
         default=[],
         help="Arguments to pass to the task.",
     )
-    run_parser.add_argument(
+    p.add_argument(
         "--clean-env",
         action="store_true",
         default=False,
         help="Run in a clean environment (minimal env vars).",
     )
-    run_parser.add_argument(
+    p.add_argument(
         "--skip-deps",
         action="store_true",
         default=False,
         help="Skip dependency tasks, run only the named task.",
     )
-    run_parser.add_argument(
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Run up to N independent tasks at once (default: number of CPUs).",
+    )
+    p.add_argument(
+        "--max-load",
+        type=float,
+        default=None,
+        metavar="LOAD",
+        help="Don't start more tasks while the 1-minute load average is at "
+        "least LOAD (default: the max_load setting).",
+    )
+    p.add_argument(
+        "--min-free-memory",
+        default=None,
+        metavar="SIZE",
+        help="Don't start more tasks while less than SIZE of memory is "
+        "available, e.g. 4GiB (default: the min_free_memory setting).",
+    )
+    p.add_argument(
+        "--capture",
+        action="store_true",
+        default=False,
+        help="Write each task's output to its log file instead of the terminal "
+        "(see 'conda task logs'); show the end of it when a task fails.",
+    )
+    p.add_argument(
         "--cwd",
         type=Path,
         default=None,
         help="Override the working directory for the task.",
     )
-    run_parser.add_argument(
+    p.add_argument(
         "--templated",
         action="store_true",
         default=False,
         help="Treat the command as a Jinja2 template (for ad-hoc commands).",
     )
 
-    list_parser = sub.add_parser("list", help="List available tasks.", add_help=False)
-    add_parser_help(list_parser)
-    add_output_and_prompt_options(list_parser)
 
-    add_parser_cmd = sub.add_parser(
-        "add", help="Add a task to the manifest.", add_help=False
-    )
-    add_parser_help(add_parser_cmd)
-    add_output_and_prompt_options(add_parser_cmd)
-    add_parser_cmd.add_argument("task_name", help="Name for the new task.")
-    add_parser_cmd.add_argument("cmd", help="Command string for the task.")
-    add_parser_cmd.add_argument(
+def _configure_list(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task list``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+
+
+def _configure_add(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task add``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+    p.add_argument("task_name", help="Name for the new task.")
+    p.add_argument("cmd", help="Command string for the task.")
+    p.add_argument(
         "--depends-on",
         nargs="*",
         default=[],
         help="Tasks this task depends on.",
     )
-    add_parser_cmd.add_argument(
+    p.add_argument(
         "--description",
         default=None,
         help="Human-readable description.",
     )
 
-    rm_parser = sub.add_parser(
-        "remove", help="Remove a task from the manifest.", add_help=False
-    )
-    add_parser_help(rm_parser)
-    add_output_and_prompt_options(rm_parser)
-    rm_parser.add_argument("task_name", help="Name of the task to remove.")
 
-    export_parser = sub.add_parser(
-        "export",
-        help="Export tasks to conda.toml format.",
-        add_help=False,
-    )
-    add_parser_help(export_parser)
-    add_output_and_prompt_options(export_parser)
-    export_parser.add_argument(
+def _configure_remove(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task remove``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+    p.add_argument("task_name", help="Name of the task to remove.")
+
+
+def _configure_export(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task export``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+    p.add_argument(
         "-o",
         "--output",
         type=Path,
@@ -119,6 +175,55 @@ def configure_parser(parser: argparse.ArgumentParser) -> None:
     )
 
 
+def _configure_logs(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task logs``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+    p.add_argument("task_name", help="Name of the task.")
+    p.add_argument(
+        "--no-pager",
+        dest="pager",
+        action="store_false",
+        default=True,
+        help="Print the log instead of opening it in $PAGER.",
+    )
+    p.add_argument(
+        "--path",
+        action="store_true",
+        default=False,
+        help="Print the path of the log file only.",
+    )
+
+
+def _configure_cache(p: argparse.ArgumentParser) -> None:
+    """Add the arguments of ``conda task cache``."""
+    add_parser_help(p)
+    add_output_and_prompt_options(p)
+    p.add_argument(
+        "cache_action",
+        choices=["stats", "prune", "clear"],
+        help="Show cache usage, prune stale and least recently used entries, "
+        "or remove the whole cache.",
+    )
+    p.add_argument(
+        "--max-size",
+        default=None,
+        help="Size cap for 'prune', e.g. 2GiB (default: the cache_max_size setting).",
+    )
+
+
+#: Subcommands of ``conda task``: name -> (help, function adding its arguments).
+SUBCOMMANDS: dict[str, tuple[str, Callable[[argparse.ArgumentParser], None]]] = {
+    "run": ("Run a task.", _configure_run),
+    "list": ("List available tasks.", _configure_list),
+    "add": ("Add a task to the manifest.", _configure_add),
+    "remove": ("Remove a task from the manifest.", _configure_remove),
+    "export": ("Export tasks to conda.toml format.", _configure_export),
+    "logs": ("Show the captured output of a task's last run.", _configure_logs),
+    "cache": ("Inspect and clean up the task cache.", _configure_cache),
+}
+
+
 def execute(args: argparse.Namespace) -> int:
     """Main entry point dispatched by the conda plugin system."""
     subcmd = args.subcmd
@@ -150,6 +255,14 @@ def execute(args: argparse.Namespace) -> int:
         from .export import execute_export
 
         return execute_export(args)
+    elif subcmd == "logs":
+        from .logs import execute_logs
+
+        return execute_logs(args)
+    elif subcmd == "cache":
+        from .cache import execute_cache
+
+        return execute_cache(args)
     else:
         generate_parser().print_help()
         return 0
@@ -2,39 +2,97 @@
 
 from __future__ import annotations
 
+import os
+import shlex
+import sys
+from dataclasses import dataclass, field
+from functools import cache, partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from conda.base.context import context, locate_prefix_by_name
-
-from ..cache import is_cached, save_cache
+from ..cache import (
+    CacheNode,
+    check_cache,
+    check_closure,
+    load_durations,
+    load_stat_index,
+    record_durations,
+    record_hit,
+    restore_outputs,
+    save_cache,
+    task_log_path,
+)
+from ..cachegc import record_usage, schedule_prune
 from ..exceptions import CondaTasksError, TaskExecutionError
+from ..globbing import FileTree
 from ..graph import resolve_execution_order
+from ..hashing import resolve_algorithm
+from ..jobserver import jobserver_for_run
 from ..parsers import detect_and_parse
-from ..runner import SubprocessShell
+from ..runner import AsyncSubprocessShell, SubprocessShell, default_shell
+from ..scheduler import (
+    DONE,
+    FAILED,
+    OK,
+    SKIPPED,
+    Resources,
+    Scheduler,
+    default_jobs,
+    estimate_durations,
+    system_pressure,
+)
+from ..sizes import parse_size
+from ..tasklog import TaskLog
 from ..template import render, render_list
 
 if TYPE_CHECKING:
     import argparse
+    from collections.abc import Awaitable, Callable
 
+    from ..cache import FingerprintSnapshot
     from ..models import Task
+    from ..scheduler import TaskOutcome, Work
 
 
 def _resolve_conda_prefix(args: argparse.Namespace) -> Path | None:
-    """Determine the target conda prefix from CLI flags or conda context."""
+    """Determine the target conda prefix from CLI flags or conda context.
+
+    Without ``-n``/``-p`` this is the active environment, which conda
+    takes from ``CONDA_PREFIX`` -- read directly, so that conda's
+    configuration need not be loaded for it.
+    """
     prefix = getattr(args, "prefix", None)
     name = getattr(args, "name", None)
 
     if prefix:
         return Path(prefix)
     if name:
-        return Path(locate_prefix_by_name(name))
+        return _locate_prefix(name)
+    if os.environ.get("CONDA_PREFIX"):
+        return Path(os.environ["CONDA_PREFIX"])
+
+    from conda.base.context import context
 
     if context.target_prefix:
         return Path(context.target_prefix)
     return None
 
 
+def _locate_prefix(name: str) -> Path:
+    """Return the prefix of the conda environment called *name*."""
+    from conda.base.context import locate_prefix_by_name
+
+    return Path(locate_prefix_by_name(name))
+
+
+def _split_targets(task_name: str) -> list[str]:
+    """Split a comma-separated list of task names, dropping duplicates."""
+    targets = list(dict.fromkeys(t.strip() for t in task_name.split(",")))
+    if "" in targets:
+        raise CondaTasksError(f"Invalid task name list: '{task_name}'")
+    return targets
+
+
 def _resolve_task_args(task: Task, cli_args: list[str]) -> dict[str, str]:
     """Map positional CLI arguments to named task arguments."""
     result: dict[str, str] = {}
@@ -50,135 +108,442 @@ def _resolve_task_args(task: Task, cli_args: list[str]) -> dict[str, str]:
     return result
 
 
-def execute_run(args: argparse.Namespace) -> int:
-    """Execute the ``conda task run`` subcommand."""
-    file_path = getattr(args, "file", None)
-    task_file, tasks = detect_and_parse(file_path=file_path)
-    project_root = task_file.parent
-
-    subdir = context.subdir
-    tasks = {name: t.resolve_for_platform(subdir) for name, t in tasks.items()}
+@dataclass
+class PlannedTask:
+    """A task with its command, env and cache patterns fully rendered."""
+
+    name: str
+    #: A shell command line, or an argv to run without a shell.
+    cmd: str | list[str]
+    env: dict[str, str]
+    cwd: Path
+    conda_prefix: Path | None
+    clean_env: bool
+    shell: str | None = None
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    algorithm: str = ""
+    #: Planned tasks this one depends on, looking through aliases.
+    deps: list[str] = field(default_factory=list)
+    #: Declared CPUs and memory, if any.
+    cost: Resources | None = None
+
+    @property
+    def cacheable(self) -> bool:
+        return bool(self.inputs or self.outputs)
+
+    @property
+    def command_line(self) -> str:
+        """The command as printed and fingerprinted."""
+        if isinstance(self.cmd, list):
+            return shlex.join(self.cmd)
+        return self.cmd
+
+    def cache_node(self) -> CacheNode:
+        return CacheNode(
+            name=self.name,
+            cmd=self.command_line,
+            env=self.env,
+            inputs=self.inputs,
+            outputs=self.outputs,
+            cwd=self.cwd,
+            algorithm=self.algorithm,
+            deps=self.deps,
+        )
 
-    target_name = args.task_name
-    order = resolve_execution_order(
-        target_name,
-        tasks,
-        skip_deps=args.skip_deps,
-    )
 
-    dry_run = getattr(args, "dry_run", False)
-    quiet = getattr(args, "quiet", False)
-    verbose = getattr(args, "verbose", 0) or 0
+def _depends_on(task: Task, name: str) -> bool:
+    return any(d.task == name for d in task.depends_on)
+
+
+def _task_cost(task: Task) -> Resources | None:
+    if task.cpus is None and task.memory is None:
+        return None
+    return Resources(float(task.cpus or 0), task.memory or 0)
+
+
+def _dep_args(
+    task: Task,
+    target: Task,
+    task_args: dict[str, str],
+    task_file: Path,
+) -> dict[str, str]:
+    """Return the arguments *target* passes to its dependency *task*."""
+    dep_info = next((d for d in target.depends_on if d.task == task.name), None)
+    current_args: dict[str, str] = {}
+    if dep_info and dep_info.args:
+        for i, da in enumerate(dep_info.args):
+            if isinstance(da, dict):
+                current_args.update(da)
+            elif i < len(task.args):
+                current_args[task.args[i].name] = render(
+                    da,
+                    manifest_path=task_file,
+                    task_args=task_args,
+                )
+    return current_args
+
+
+def plan_tasks(
+    order: list[str],
+    tasks: dict[str, Task],
+    target_args: dict[str, dict[str, str]],
+    task_file: Path,
+    args: argparse.Namespace,
+) -> list[PlannedTask]:
+    """Render every command-bearing task in *order* into a ``PlannedTask``.
+
+    *target_args* maps each task named on the command line to its
+    arguments.  A dependency gets the arguments passed to it by the
+    first of those targets that depends on it directly.  Aliases and
+    tasks without a command are left out; their own dependencies are
+    inherited by whatever depends on them.  Plugin settings are only
+    read for the tasks that need them: the default shell for tasks
+    without a ``shell``, the default digest algorithm for cacheable
+    tasks without a ``hash``.
+    """
+    project_root = task_file.parent
     conda_prefix = _resolve_conda_prefix(args)
+    explicit_env = getattr(args, "prefix", None) or getattr(args, "name", None)
+    shell = cache(default_shell)
 
-    task_args = _resolve_task_args(tasks[target_name], args.task_args)
-
-    shell = SubprocessShell()
-
+    planned: list[PlannedTask] = []
+    deps_of: dict[str, list[str]] = {}
     for name in order:
         task = tasks[name]
 
-        if task.is_alias:
+        deps: list[str] = []
+        for dep in task.depends_on:
+            if dep.task in deps_of:
+                deps.extend(deps_of[dep.task])
+            else:
+                deps.append(dep.task)
+        deps = list(dict.fromkeys(deps))
+
+        if task.is_alias or task.cmd is None:
+            deps_of[name] = deps
             continue
+        deps_of[name] = [name]
 
-        if name == target_name:
-            current_args = task_args
+        if name in target_args:
+            current_args = target_args[name]
         else:
-            dep_info = next(
-                (d for d in tasks[target_name].depends_on if d.task == name),
-                None,
+            parent = next(
+                (t for t in target_args if _depends_on(tasks[t], name)),
+                next(iter(target_args)),
+            )
+            current_args = _dep_args(
+                task, tasks[parent], target_args[parent], task_file
             )
-            current_args = {}
-            if dep_info and dep_info.args:
-                for i, da in enumerate(dep_info.args):
-                    if isinstance(da, dict):
-                        current_args.update(da)
-                    elif i < len(task.args):
-                        current_args[task.args[i].name] = render(
-                            da,
-                            manifest_path=task_file,
-                            task_args=task_args,
-                        )
-
-        cmd = task.cmd
-        if cmd is None:
-            continue
-        if isinstance(cmd, list):
-            cmd = " ".join(cmd)
-
-        cmd = render(cmd, manifest_path=task_file, task_args=current_args)
-
-        task_env = {
-            k: render(v, manifest_path=task_file, task_args=current_args)
-            for k, v in task.env.items()
-        }
 
-        cwd = Path(args.cwd) if args.cwd else Path(task.cwd or project_root)
-        clean_env = args.clean_env or task.clean_env
+        cmd: str | list[str]
+        if isinstance(task.cmd, list):
+            cmd = render_list(task.cmd, manifest_path=task_file, task_args=current_args)
+        else:
+            cmd = render(task.cmd, manifest_path=task_file, task_args=current_args)
 
         task_prefix = conda_prefix
-        if task.default_environment and not (
-            getattr(args, "prefix", None) or getattr(args, "name", None)
-        ):
-            task_prefix = Path(locate_prefix_by_name(task.default_environment))
+        if task.default_environment and not explicit_env:
+            task_prefix = _locate_prefix(task.default_environment)
 
-        rendered_inputs = render_list(
+        inputs = render_list(
             task.inputs, manifest_path=task_file, task_args=current_args
         )
-        rendered_outputs = render_list(
+        outputs = render_list(
             task.outputs, manifest_path=task_file, task_args=current_args
         )
+        planned.append(
+            PlannedTask(
+                name=name,
+                cmd=cmd,
+                env={
+                    k: render(v, manifest_path=task_file, task_args=current_args)
+                    for k, v in task.env.items()
+                },
+                cwd=Path(args.cwd) if args.cwd else Path(task.cwd or project_root),
+                conda_prefix=task_prefix,
+                clean_env=args.clean_env or task.clean_env,
+                shell=task.shell or shell(),
+                inputs=inputs,
+                outputs=outputs,
+                algorithm=resolve_algorithm(task.hash) if inputs or outputs else "",
+                deps=deps,
+                cost=_task_cost(task),
+            )
+        )
+    return planned
+
+
+def _subgraph_cached(
+    project_root: Path, plan: list[PlannedTask], skip_deps: bool
+) -> bool:
+    """True when one closure check proves every planned task up to date."""
+    if skip_deps or not plan or not all(p.cacheable for p in plan):
+        return False
+    return check_closure(project_root, [p.cache_node() for p in plan])
+
+
+def _run_plan(
+    project_root: Path,
+    plan: list[PlannedTask],
+    jobs: int,
+    *,
+    dry_run: bool,
+    quiet: bool,
+    verbose: int,
+    capture: bool = False,
+    busy: Callable[[], bool] | None = None,
+) -> tuple[list[TaskOutcome], bool]:
+    """Check, restore or run every task in *plan*, up to *jobs* at once.
+
+    Returns the outcomes and whether the cache was used.  Cache
+    checks and saves happen on this thread; only the commands run on
+    the scheduler's pool, longest recorded critical path first.  How
+    long each command took is recorded for the next run.  With
+    *capture*, each command's output goes to its task log, and the end
+    of the log of a failed task is printed.  When two tasks may run at
+    once, commands run on the scheduler's event loop through an
+    ``AsyncSubprocessShell``, and without *capture* their output is
+    prefixed with the task name and interleaved line by line; otherwise
+    a command keeps the terminal to itself.  New tasks are held back
+    while *busy* returns True.  Unless this is a dry run, tasks share a
+    jobserver with the commands they start, so that nested ``make -j``
+    or similar builds stay within *jobs* too.
+    """
+    names = [pt.name for pt in plan]
+    estimates = estimate_durations(names, load_durations(project_root))
+    costs = {pt.name: pt.cost for pt in plan if pt.cost is not None}
+    jobserver = None if dry_run else jobserver_for_run(jobs)
+    scheduler = Scheduler(
+        names,
+        {pt.name: pt.deps for pt in plan},
+        jobs,
+        estimates,
+        costs,
+        busy=busy,
+        tokens=jobserver,
+    )
+    parallel = scheduler.parallel
+    shell_class = AsyncSubprocessShell if parallel else SubprocessShell
+    shell = shell_class(jobserver=jobserver)
+    by_name = {pt.name: pt for pt in plan}
+    keys: dict[str, str | None] = {}
+    snapshots: dict[str, FingerprintSnapshot | None] = {}
+    logs: dict[str, TaskLog] = {}
+    cacheable = [pt for pt in plan if pt.cacheable]
+    index = load_stat_index(project_root) if cacheable else None
+    tree = FileTree(((pt.inputs + pt.outputs, pt.cwd) for pt in cacheable), index)
+
+    def save(pt: PlannedTask, snapshot: FingerprintSnapshot) -> None:
+        keys[pt.name] = save_cache(
+            project_root,
+            pt.name,
+            pt.command_line,
+            pt.env,
+            pt.inputs,
+            pt.outputs,
+            pt.cwd,
+            snapshot=snapshot,
+            deps=[keys.get(d) for d in pt.deps],
+            tree=tree,
+        )
 
-        if rendered_inputs or rendered_outputs:
-            if is_cached(
+    def start(name: str) -> Work | None:
+        pt = by_name[name]
+        snapshot = None
+        if pt.cacheable:
+            snapshot = check_cache(
                 project_root,
                 name,
-                cmd,
-                task_env,
-                rendered_inputs,
-                rendered_outputs,
-                cwd,
-            ):
+                pt.command_line,
+                pt.env,
+                pt.inputs,
+                pt.outputs,
+                pt.cwd,
+                algorithm=pt.algorithm,
+                tree=tree,
+            )
+            if snapshot.hit:
+                deps = [keys.get(d) for d in pt.deps]
+                keys[name] = record_hit(project_root, name, snapshot, deps)
                 if not quiet:
                     print(f"  [cached] {name}")
-                continue
+                if verbose and snapshot.hashed.files:
+                    print(f"    {snapshot.hashed.summary()}")
+                return None
 
         if dry_run:
-            print(f"  [dry-run] {name}: {cmd}")
-            continue
+            print(f"  [dry-run] {name}: {pt.command_line}")
+            return None
+
+        if snapshot is not None and pt.outputs:
+            if restore_outputs(snapshot, pt.cwd):
+                if not quiet:
+                    print(f"  [restored] {name}")
+                tree.invalidate()
+                save(pt, snapshot)
+                return None
 
         if not quiet:
-            print(f"  [run] {name}: {cmd}")
-
-        if verbose and (rendered_inputs or rendered_outputs):
-            if rendered_inputs:
-                print(f"    inputs: {rendered_inputs}")
-            if rendered_outputs:
-                print(f"    outputs: {rendered_outputs}")
-
-        exit_code = shell.run(
-            cmd,
-            task_env,
-            cwd,
-            conda_prefix=task_prefix,
-            clean_env=clean_env,
+            print(f"  [run] {name}: {pt.command_line}")
+
+        if verbose and pt.cacheable:
+            if pt.inputs:
+                print(f"    inputs: {pt.inputs}")
+            if pt.outputs:
+                print(f"    outputs: {pt.outputs}")
+
+        snapshots[name] = snapshot
+        work = partial(
+            shell.run_async if parallel else shell.run,
+            pt.cmd,
+            pt.env,
+            pt.cwd,
+            conda_prefix=pt.conda_prefix,
+            clean_env=pt.clean_env,
+            shell=pt.shell,
+            name=name,
+        )
+        log = None
+        if capture:
+            log = logs[name] = TaskLog(task_log_path(project_root, name))
+        if parallel:
+            return _run_async(work, log)
+        return work if log is None else partial(_run_logged, work, log)
+
+    def finish(name: str, exit_code: int) -> None:
+        # The task may have changed any file, so walk again next time.
+        tree.invalidate()
+        snapshot = snapshots.pop(name)
+        if snapshot is not None:
+            save(by_name[name], snapshot)
+            if verbose and snapshot.hashed.files:
+                print(f"    {snapshot.hashed.summary()}")
+
+    try:
+        outcomes = scheduler.run(start, finish, shell.cancel)
+    finally:
+        if jobserver is not None:
+            jobserver.close()
+    for outcome in outcomes:
+        if outcome.status == FAILED and outcome.name in logs:
+            _print_log_tail(outcome.name, logs[outcome.name])
+    # Counts the logs in full, though each replaces its task's previous one.
+    record_usage(sum(log.size for log in logs.values()))
+    if index is not None:
+        index.save()
+    if not dry_run:
+        record_durations(
+            project_root, {o.name: o.seconds for o in outcomes if o.status == OK}
         )
+    return outcomes, bool(cacheable or logs)
 
-        if exit_code != 0:
-            raise TaskExecutionError(name, exit_code)
 
-        if rendered_inputs or rendered_outputs:
-            save_cache(
-                project_root,
-                name,
-                cmd,
-                task_env,
-                rendered_inputs,
-                rendered_outputs,
-                cwd,
-            )
+def _run_logged(work: Callable[..., int], log: TaskLog) -> int:
+    with log:
+        return work(log=log)
+
+
+async def _run_async(
+    work: Callable[..., Awaitable[int]], log: TaskLog | None = None
+) -> int:
+    if log is None:
+        return await work()
+    with log:
+        return await work(log=log)
+
+
+def _print_log_tail(name: str, log: TaskLog) -> None:
+    """Print the end of a failed task's captured output to stderr."""
+    tail = log.tail().decode("utf-8", "replace")
+    print(f"  --- output of {name} (full log: {log.path}) ---", file=sys.stderr)
+    if tail:
+        print(tail, end="" if tail.endswith("\n") else "\n", file=sys.stderr)
+    print("  ---", file=sys.stderr)
+
+
+def _print_summary(outcomes: list[TaskOutcome]) -> None:
+    """Print how each task ended, in plan order, when more than one ran."""
+    ran = [o for o in outcomes if o.status != DONE]
+    if len(ran) < 2:
+        return
+    width = max(len(o.name) for o in ran)
+    print("  Summary:")
+    for o in ran:
+        line = f"    {o.status:<9} {o.name:<{width}}"
+        if o.status != SKIPPED:
+            line += f"  {o.seconds:.1f}s"
+        if o.status == FAILED:
+            line += f" (exit code {o.exit_code})"
+        print(line.rstrip())
+
+
+def execute_run(args: argparse.Namespace) -> int:
+    """Execute the ``conda task run`` subcommand."""
+    file_path = getattr(args, "file", None)
+    task_file, tasks = detect_and_parse(file_path=file_path)
+    project_root = task_file.parent
 
-    if not quiet and tasks[target_name].is_alias:
-        print(f"  [done] {target_name}")
+    if any(t.platforms for t in tasks.values()):
+        from conda.base.context import context
+
+        subdir = context.subdir
+        tasks = {name: t.resolve_for_platform(subdir) for name, t in tasks.items()}
+
+    targets = _split_targets(args.task_name)
+    if len(targets) > 1 and args.task_args:
+        raise CondaTasksError(
+            "Task arguments cannot be passed when running several tasks"
+        )
+    order = resolve_execution_order(
+        targets,
+        tasks,
+        skip_deps=args.skip_deps,
+    )
+
+    dry_run = getattr(args, "dry_run", False)
+    quiet = getattr(args, "quiet", False)
+    verbose = getattr(args, "verbose", 0) or 0
+
+    target_args = {t: _resolve_task_args(tasks[t], args.task_args) for t in targets}
+    plan = plan_tasks(order, tasks, target_args, task_file, args)
+
+    jobs = getattr(args, "jobs", None) or default_jobs()
+    min_free_memory = getattr(args, "min_free_memory", None)
+    busy = system_pressure(
+        getattr(args, "max_load", None),
+        None if min_free_memory is None else parse_size(min_free_memory),
+    )
+    all_cached = _subgraph_cached(project_root, plan, args.skip_deps)
+
+    if all_cached:
+        if not quiet:
+            for pt in plan:
+                print(f"  [cached] {pt.name}")
+        used_cache = True
+    else:
+        outcomes, used_cache = _run_plan(
+            project_root,
+            plan,
+            jobs,
+            dry_run=dry_run,
+            quiet=quiet,
+            verbose=verbose,
+            capture=getattr(args, "capture", False),
+            busy=busy,
+        )
+        if not quiet:
+            _print_summary(outcomes)
+        failed = next((o for o in outcomes if o.status == FAILED), None)
+        if failed is not None:
+            raise TaskExecutionError(failed.name, failed.exit_code or 1)
+
+    if not quiet:
+        for target in targets:
+            if tasks[target].is_alias:
+                print(f"  [done] {target}")
+
+    if used_cache and not dry_run:
+        schedule_prune()
 
     return 0
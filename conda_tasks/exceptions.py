@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from conda.exceptions import CondaError
+# Not conda.exceptions, which loads conda's configuration on import.
+from conda import CondaError
 
 
 class CondaTasksError(CondaError):
@@ -0,0 +1,406 @@
+"""Single-walk glob expansion for task inputs and outputs.
+
+``FileTree`` compiles every pattern of a run into one matcher and walks
+each directory tree once with ``os.scandir``, instead of one
+``glob.glob(..., recursive=True)`` per pattern.  Patterns are matched
+segment by segment as a small NFA, so directories that no pattern can
+match are never entered, and the ``DirEntry`` stat results of matched
+files are kept so fingerprinting does not stat them again.
+
+Matching follows ``glob.glob`` with ``recursive=True``:
+
+* ``*``, ``?`` and ``[...]`` match within one path segment and skip
+  names starting with ``.`` unless the segment itself starts with one;
+* ``**`` matches zero or more non-hidden directories;
+* a match that is a directory covers every file beneath it.
+
+Unlike ``glob``, ``**`` does not follow symlinked directories.  Big
+directories that inputs never depend on, such as ``node_modules``, can
+be skipped with the ``glob_skip_dirs`` key of the ``conda_tasks``
+plugin setting: they are then not matched by wildcards, entered by
+``**`` or included when a parent directory matches, unless the pattern
+names them.  Nothing is skipped by default, since a skipped file that
+a pattern matches would leave its changes unnoticed by the cache.
+
+The walk also records the mtime of every directory whose listing
+decided what a pattern matched (see ``FileTree.expand``), which lets
+the cache notice new matches later without walking again.  Given a
+``StatIndex``, listings of directories that did not change since an
+earlier run are taken from it instead of the disk (see
+``conda_tasks.statindex``).
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import glob
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from .statindex import StatIndex
+
+_LITERAL = 0
+_WILDCARD = 1
+_RECURSIVE = 2
+
+#: Segment index of the state that matches everything beneath a directory.
+_ALL = -1
+
+
+@dataclass(frozen=True)
+class _Segment:
+    kind: int
+    text: str
+    regex: re.Pattern[str] | None = None
+
+    def matches(self, name: str) -> bool:
+        if self.kind == _LITERAL:
+            return os.path.normcase(name) == os.path.normcase(self.text)
+        if name.startswith(".") and not self.text.startswith("."):
+            return False
+        assert self.regex is not None
+        return self.regex.match(os.path.normcase(name)) is not None
+
+
+def _segment(text: str) -> _Segment:
+    if text == "**":
+        return _Segment(_RECURSIVE, text)
+    if glob.has_magic(text):
+        regex = re.compile(fnmatch.translate(os.path.normcase(text)))
+        return _Segment(_WILDCARD, text, regex)
+    return _Segment(_LITERAL, text)
+
+
+@dataclass
+class _Pattern:
+    """One pattern, as segments below the root its walk starts from."""
+
+    segments: list[_Segment]
+    names: frozenset[str]
+    skipped: frozenset[str] = frozenset()
+    files: set[str] = field(default_factory=set)
+    dirs: dict[str, float] = field(default_factory=dict)
+
+    def pruned(self, name: str) -> bool:
+        """Whether a directory called *name* is skipped for this pattern."""
+        name = os.path.normcase(name)
+        return name in self.skipped and name not in self.names
+
+    def may_enter(self, entry: os.DirEntry[str] | _Probe) -> bool:
+        """Whether ``**`` may descend into the directory *entry*."""
+        name = entry.name
+        return not (name.startswith(".") or entry.is_symlink() or self.pruned(name))
+
+
+class _Probe:
+    """A ``DirEntry`` look-alike for a path found without listing its parent."""
+
+    def __init__(self, parent: str, name: str):
+        self.name = name
+        self.path = os.path.join(parent, name)
+
+    def is_dir(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def is_symlink(self) -> bool:
+        return os.path.islink(self.path)
+
+    def stat(self) -> os.stat_result:
+        return os.stat(self.path)
+
+
+class _Listed(_Probe):
+    """A ``DirEntry`` look-alike for an entry of an indexed listing."""
+
+    def __init__(self, parent: str, name: str, is_dir: bool, is_symlink: bool):
+        super().__init__(parent, name)
+        self._is_dir = is_dir
+        self._is_symlink = is_symlink
+
+    def is_dir(self) -> bool:
+        # Where a symlink points can change without touching its directory.
+        return super().is_dir() if self._is_symlink else self._is_dir
+
+    def is_symlink(self) -> bool:
+        return self._is_symlink
+
+
+def _split(pattern: str, cwd: Path) -> list[str]:
+    """Return the normalized absolute *pattern* as a list of segments."""
+    full = os.path.normpath(os.path.join(cwd, pattern))
+    drive, rest = os.path.splitdrive(full)
+    parts = [p for p in rest.split(os.sep) if p]
+    return [drive + os.sep, *parts]
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
+
+
+def _stat(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def skipped_dirs() -> frozenset[str]:
+    """Return the ``glob_skip_dirs`` directory names from the plugin setting."""
+    from .settings import as_names, plugin_setting
+
+    configured = plugin_setting("glob_skip_dirs", (), convert=as_names)
+    return frozenset(os.path.normcase(name) for name in configured)
+
+
+def _listed(entry: os.DirEntry[str]) -> tuple[str, bool, bool]:
+    try:
+        return (entry.name, entry.is_dir(), entry.is_symlink())
+    except OSError:
+        return (entry.name, False, False)
+
+
+class FileTree:
+    """Expand glob patterns for a whole run, sharing one walk between them.
+
+    Patterns registered up front (or on first use) are all expanded by
+    the same walk.  Results, watched directory mtimes and file stats are
+    kept until ``invalidate`` is called -- e.g. after a task has run and
+    may have changed the tree.  Directory listings are read from and
+    recorded in *index*, if given.  Directories named in *skip_dirs*
+    (``skipped_dirs()`` when None) are skipped unless a pattern names
+    them.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[tuple[list[str], Path]] = (),
+        index: StatIndex | None = None,
+        skip_dirs: Iterable[str] | None = None,
+    ):
+        self.index = index
+        self.skip_dirs = (
+            skipped_dirs()
+            if skip_dirs is None
+            else frozenset(os.path.normcase(name) for name in skip_dirs)
+        )
+        self._pending: set[tuple[str, str]] = set()
+        self._results: dict[tuple[str, str], _Pattern] = {}
+        self._stats: dict[str, os.stat_result] = {}
+        for group, cwd in patterns:
+            self.add(group, cwd)
+
+    def add(self, patterns: Iterable[str], cwd: Path) -> None:
+        """Register *patterns* (relative to *cwd*) for the next walk."""
+        for pattern in patterns:
+            key = (pattern, str(cwd))
+            if key not in self._results:
+                self._pending.add(key)
+
+    def invalidate(self) -> None:
+        """Forget everything walked so far.
+
+        Later expansions walk again, but only for the patterns they ask
+        for: once tasks start changing the tree, re-walking every
+        registered pattern after each task would cost more than it saves.
+        """
+        self._pending.clear()
+        self._results.clear()
+        self._stats.clear()
+
+    def expand(
+        self,
+        patterns: list[str],
+        cwd: Path,
+        dirs: dict[str, float] | None = None,
+    ) -> list[str]:
+        """Return the sorted files matched by *patterns* relative to *cwd*.
+
+        When *dirs* is given, the mtimes of the directories (and literal
+        paths) that decided the matches are added to it; ``-1.0`` marks
+        a path that does not exist.
+        """
+        self.add(patterns, cwd)
+        if self._pending:
+            self._walk()
+        files: set[str] = set()
+        for pattern in patterns:
+            result = self._results[(pattern, str(cwd))]
+            files |= result.files
+            if dirs is not None:
+                dirs.update(result.dirs)
+        return sorted(files)
+
+    def stat(self, path: str) -> os.stat_result | None:
+        """Return the stat result of a matched file, if the walk kept one."""
+        return self._stats.get(path)
+
+    def _walk(self) -> None:
+        """Expand every pending pattern, walking each root directory once."""
+        compiled: dict[tuple[str, ...], list[_Pattern]] = {}
+        for key in self._pending:
+            segments = _split(*key)
+            magic = next(
+                (i for i, s in enumerate(segments) if glob.has_magic(s)),
+                max(len(segments) - 1, 1),
+            )
+            pattern = _Pattern(
+                segments=[_segment(s) for s in segments[magic:]],
+                names=frozenset(os.path.normcase(s) for s in segments),
+                skipped=self.skip_dirs,
+            )
+            self._results[key] = pattern
+            compiled.setdefault(tuple(segments[:magic]), []).append(pattern)
+        self._pending.clear()
+
+        # Fold roots that lie inside another root into it, so that each
+        # directory is listed at most once.
+        roots = sorted(compiled, key=len)
+        merged: dict[tuple[str, ...], list[tuple[_Pattern, int]]] = {}
+        for root in roots:
+            outer = next(
+                (r for r in merged if root[: len(r)] == r),
+                None,
+            )
+            if outer is None:
+                merged[root] = [(p, 0) for p in compiled[root]]
+                continue
+            for p in compiled[root]:
+                prefix = [_segment(s) for s in root[len(outer) :]]
+                p.segments[:0] = prefix
+                merged[outer].append((p, 0))
+
+        for root, states in merged.items():
+            self._walk_root(os.path.join(*root), states)
+
+    def _walk_root(self, root: str, initial: list[tuple[_Pattern, int]]) -> None:
+        stack: list[tuple[str, os.stat_result | None, list[tuple[_Pattern, int]]]]
+        stack = [(root, _stat(root), initial)]
+        while stack:
+            dirpath, st, states = stack.pop()
+            states = _closure(states)
+            mtime = -1.0 if st is None else st.st_mtime
+
+            # A literal segment depends on one path existing, anything else
+            # on the directory listing; record the mtime of whichever it is.
+            literals: dict[str, float] = {}
+            for p, i in states:
+                if i != _ALL and p.segments[i].kind == _LITERAL:
+                    child = os.path.join(dirpath, p.segments[i].text)
+                    if child not in literals:
+                        literals[child] = _mtime(child)
+                    p.dirs[child] = literals[child]
+                else:
+                    p.dirs[dirpath] = mtime
+
+            entries: list[os.DirEntry[str] | _Probe]
+            if len(literals) == len(states):
+                entries = [
+                    _Probe(dirpath, os.path.basename(child))
+                    for child in sorted(literals)
+                    if os.path.lexists(child)
+                ]
+            else:
+                listing = self._list(dirpath, st)
+                if listing is None:
+                    continue
+                entries = listing
+
+            for entry in entries:
+                self._visit(entry, states, stack)
+
+    def _list(
+        self, dirpath: str, st: os.stat_result | None
+    ) -> list[os.DirEntry[str] | _Probe] | None:
+        """Return the entries of *dirpath*, from the index when still valid."""
+        index = self.index
+        if index is not None and st is not None:
+            cached = index.listing(dirpath, st)
+            if cached is not None:
+                return [_Listed(dirpath, *listed) for listed in cached]
+
+        listed_ns = time.time_ns()
+        try:
+            with os.scandir(dirpath) as it:
+                scanned = list(it)
+        except OSError:
+            if index is not None:
+                index.forget(dirpath)
+            return None
+        if index is not None and st is not None:
+            index.record(dirpath, st, [_listed(e) for e in scanned], listed_ns)
+        return list(scanned)
+
+    def _visit(
+        self,
+        entry: os.DirEntry[str] | _Probe,
+        states: list[tuple[_Pattern, int]],
+        stack: list[tuple[str, os.stat_result | None, list[tuple[_Pattern, int]]]],
+    ) -> None:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+
+        children: list[tuple[_Pattern, int]] = []
+        matched: list[_Pattern] = []
+        for p, i in states:
+            if i == _ALL:
+                if not is_dir:
+                    matched.append(p)
+                elif not (entry.is_symlink() or p.pruned(entry.name)):
+                    children.append((p, _ALL))
+                continue
+            seg = p.segments[i]
+            if seg.kind == _RECURSIVE:
+                if is_dir and p.may_enter(entry):
+                    children.append((p, i))
+                continue
+            if not seg.matches(entry.name) or (is_dir and p.pruned(entry.name)):
+                continue
+            if i == len(p.segments) - 1:
+                if is_dir:
+                    children.append((p, _ALL))
+                else:
+                    matched.append(p)
+            elif is_dir:
+                children.append((p, i + 1))
+
+        if matched:
+            for p in matched:
+                p.files.add(entry.path)
+            try:
+                self._stats[entry.path] = entry.stat()
+            except OSError:
+                pass
+        if children:
+            try:
+                st = entry.stat()
+            except OSError:
+                return
+            stack.append((entry.path, st, children))
+
+
+def _closure(states: list[tuple[_Pattern, int]]) -> list[tuple[_Pattern, int]]:
+    """Add the states reachable by letting ``**`` match zero directories."""
+    seen: set[tuple[int, int]] = set()
+    result: list[tuple[_Pattern, int]] = []
+    todo = list(states)
+    while todo:
+        p, i = todo.pop()
+        if (id(p), i) in seen:
+            continue
+        seen.add((id(p), i))
+        result.append((p, i))
+        if i != _ALL and p.segments[i].kind == _RECURSIVE:
+            todo.append((p, i + 1 if i + 1 < len(p.segments) else _ALL))
+    return result
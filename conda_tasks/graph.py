@@ -8,11 +8,13 @@ from typing import TYPE_CHECKING
 from .exceptions import CyclicDependencyError, TaskNotFoundError
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from .models import Task
 
 
 def resolve_execution_order(
-    target: str,
+    target: str | Iterable[str],
     tasks: dict[str, Task],
     *,
     skip_deps: bool = False,
@@ -21,25 +23,33 @@ def resolve_execution_order(
 
     Uses Kahn's algorithm for topological sort. Only the transitive
     closure of *target*'s dependencies is included -- unrelated tasks
-    are omitted.
+    are omitted.  *target* may also be several task names, in which case
+    their closures are merged into one graph and every task in it is
+    listed once.
 
     Raises ``TaskNotFoundError`` if *target* or any dependency is missing.
     Raises ``CyclicDependencyError`` if the dependency graph has a cycle.
     """
-    if target not in tasks:
-        raise TaskNotFoundError(target, list(tasks.keys()))
+    targets = [target] if isinstance(target, str) else list(target)
+    for name in targets:
+        if name not in tasks:
+            raise TaskNotFoundError(name, list(tasks.keys()))
 
     if skip_deps:
-        return [target]
+        if len(targets) == 1:
+            return targets
+        return _topological_sort(set(targets), tasks)
 
-    reachable = _collect_reachable(target, tasks)
+    reachable = _collect_reachable(targets, tasks)
     return _topological_sort(reachable, tasks)
 
 
-def _collect_reachable(target: str, tasks: dict[str, Task]) -> set[str]:
-    """BFS to gather all tasks reachable via depends-on from *target*."""
+def _collect_reachable(
+    targets: str | Iterable[str], tasks: dict[str, Task]
+) -> set[str]:
+    """BFS to gather all tasks reachable via depends-on from *targets*."""
     visited: set[str] = set()
-    queue = deque([target])
+    queue = deque([targets] if isinstance(targets, str) else targets)
     while queue:
         name = queue.popleft()
         if name in visited:
@@ -0,0 +1,207 @@
+"""File hashing for cache fingerprints.
+
+The digest algorithm is selectable -- a cache key doesn't need
+cryptographic strength, so the default is BLAKE2b, which is faster than
+SHA-256 on 64-bit hosts.  Files are read unbuffered into a buffer
+that is reused for every file of a job.  They are not ``mmap``-ed: a
+file truncated while it is hashed -- e.g. rewritten by a task running
+alongside -- would kill the process with ``SIGBUS``.
+
+Files are hashed on a bounded thread pool -- ``hashlib`` releases the
+GIL while digesting large buffers, so threads scale with the storage
+and core count.  Large files are hashed one job per file; small files
+are grouped into batches so the pool isn't dominated by per-job
+overhead.
+
+The pool size defaults to ``min(32, cpu_count + 4)`` and can be set with
+the ``hash_workers`` key of the ``conda_tasks`` plugin setting::
+
+    plugins:
+      conda_tasks:
+        hash_workers: 8
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .exceptions import CondaTasksError
+
+#: Digest algorithms accepted by the ``hash`` setting.
+ALGORITHMS: tuple[str, ...] = ("blake2b", "blake2s", "sha256", "sha512")
+
+#: Algorithm used when neither the task nor the plugin settings choose one.
+DEFAULT_ALGORITHM = "blake2b"
+
+#: Files at least this large are streamed as their own job.
+LARGE_FILE = 1024 * 1024
+
+#: Size of the buffer files are read into for hashing.
+READ_BUFFER = 1024 * 1024
+
+#: Upper bound on the combined size of a batch of small files.
+BATCH_BYTES = 4 * 1024 * 1024
+
+#: Upper bound on the number of small files in one batch.
+BATCH_FILES = 64
+
+#: Below this much work a pool isn't worth starting.
+_PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+
+@dataclass
+class HashReport:
+    """Digests plus the work it took to compute them."""
+
+    digests: dict[str, str] = field(default_factory=dict)
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def throughput(self) -> float:
+        """Bytes hashed per second of wall-clock time."""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def add(self, other: HashReport) -> None:
+        """Fold *other* into this report."""
+        self.digests.update(other.digests)
+        self.files += other.files
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+        self.workers = max(self.workers, other.workers)
+
+    def summary(self) -> str:
+        """One-line human-readable description, e.g. for verbose output."""
+        mib = self.bytes / (1024 * 1024)
+        return (
+            f"hashed {self.files} file(s), {mib:.1f} MiB in {self.seconds:.2f}s "
+            f"({self.throughput / (1024 * 1024):.1f} MiB/s, "
+            f"{self.workers} worker(s))"
+        )
+
+
+def resolve_algorithm(name: str | None = None) -> str:
+    """Return the digest algorithm to use for a task.
+
+    *name* is the task's own ``hash`` field; when it is None the
+    ``hash`` key of the ``conda_tasks`` plugin setting is used, and
+    ``DEFAULT_ALGORITHM`` after that.  Raises ``CondaTasksError`` for
+    algorithms not in ``ALGORITHMS``.
+    """
+    if name is None:
+        from .settings import plugin_setting
+
+        name = plugin_setting("hash") or DEFAULT_ALGORITHM
+    name = str(name).lower()
+    if name not in ALGORITHMS:
+        raise CondaTasksError(
+            f"Unsupported hash algorithm '{name}'. "
+            f"Choose one of: {', '.join(ALGORITHMS)}"
+        )
+    return name
+
+
+def file_digest(
+    path: str,
+    algorithm: str = DEFAULT_ALGORITHM,
+    buf: bytearray | None = None,
+) -> str:
+    """Return the hex digest of the file at *path* using *algorithm*.
+
+    The file is read unbuffered into *buf* (a fresh ``READ_BUFFER``-sized
+    buffer when None).
+    """
+    h = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as f:
+        if buf is None:
+            buf = bytearray(READ_BUFFER)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def default_workers() -> int:
+    """Return the hashing pool size from settings or the CPU count."""
+    from .settings import as_count, plugin_setting
+
+    configured = plugin_setting("hash_workers", convert=as_count)
+    return configured or min(32, (os.cpu_count() or 1) + 4)
+
+
+def _batches(sizes: dict[str, int]) -> list[list[str]]:
+    """Split *sizes* into jobs: one per large file, batches of small ones."""
+    jobs: list[list[str]] = []
+    batch: list[str] = []
+    batch_bytes = 0
+    for path, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        if size >= LARGE_FILE:
+            jobs.append([path])
+            continue
+        if batch and (batch_bytes + size > BATCH_BYTES or len(batch) >= BATCH_FILES):
+            jobs.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(path)
+        batch_bytes += size
+    if batch:
+        jobs.append(batch)
+    return jobs
+
+
+def _hash_batch(paths: list[str], algorithm: str) -> dict[str, str]:
+    """Hash every file in *paths*, skipping ones that can't be read."""
+    buf = bytearray(READ_BUFFER)
+    digests: dict[str, str] = {}
+    for p in paths:
+        try:
+            digests[p] = file_digest(p, algorithm, buf)
+        except OSError:
+            continue
+    return digests
+
+
+def hash_files(
+    sizes: dict[str, int],
+    algorithm: str = DEFAULT_ALGORITHM,
+    workers: int | None = None,
+) -> HashReport:
+    """Hash the files in *sizes* (``{path: size}``) and report the work done.
+
+    Files that cannot be read are left out of ``digests``.  Small jobs
+    are hashed on the calling thread; otherwise up to *workers* threads
+    (``default_workers()`` when None) are used.
+    """
+    start = time.perf_counter()
+    total = sum(sizes.values())
+    jobs = _batches(sizes)
+
+    if len(jobs) <= 1 or total < _PARALLEL_MIN_BYTES:
+        workers = 1
+    elif workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, len(jobs)))
+
+    digests: dict[str, str] = {}
+    if workers == 1:
+        for job in jobs:
+            digests.update(_hash_batch(job, algorithm))
+    else:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="conda-tasks-hash"
+        ) as pool:
+            for result in pool.map(_hash_batch, jobs, [algorithm] * len(jobs)):
+                digests.update(result)
+
+    return HashReport(
+        digests=digests,
+        files=len(digests),
+        bytes=sum(sizes[p] for p in digests),
+        seconds=time.perf_counter() - start,
+        workers=workers,
+    )
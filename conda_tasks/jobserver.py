@@ -0,0 +1,196 @@
+"""GNU make jobserver support.
+
+Tools like ``make -j``, ``ninja`` and ``cargo`` share a budget of
+parallel jobs through a *jobserver*: a pipe or FIFO holding one byte
+(a token) per job slot beyond the one every process gets for free.  A
+process takes a token before starting an extra job and writes it back
+when the job is done.  Where to find the pool is passed down in
+``MAKEFLAGS`` as ``--jobserver-auth=fifo:PATH`` (GNU make 4.4 and later)
+or ``--jobserver-auth=R,W`` (inherited file descriptors).
+
+``conda task run`` uses this to keep the total parallelism of a whole
+process tree at ``--jobs``: it creates a pool with ``jobs - 1`` tokens,
+passes it to every command it starts, and takes a token for each task it
+runs beside the first one (see ``Scheduler``).  When it is itself run
+by a ``make`` with a jobserver, it joins that pool instead.  The pool is
+passed on in the ``R,W`` form, which every make since 4.2 understands;
+make 4.3 and older reject ``fifo:PATH``.
+
+Tokens are taken without blocking, from a file description of our own
+opened with ``O_NONBLOCK``, so that waiting for a token never stalls the
+scheduler, and inherited descriptors stay in blocking mode for everyone
+else.  Jobservers are not supported on Windows, where make uses
+semaphores instead.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+#: ``MAKEFLAGS`` option naming the jobserver (``--jobserver-fds`` before make 4.2).
+AUTH_OPTIONS = ("--jobserver-auth=", "--jobserver-fds=")
+
+#: The byte written for each token of a pool created by conda-tasks.
+TOKEN = b"+"
+
+
+def jobserver_auth(makeflags: str) -> str | None:
+    """Return the jobserver named in *makeflags*, e.g. ``fifo:/tmp/GMfifo1``."""
+    auth = None
+    for word in makeflags.split():
+        for option in AUTH_OPTIONS:
+            if word.startswith(option):
+                auth = word[len(option) :]
+    return auth
+
+
+class Jobserver:
+    """A pool of job tokens shared with the commands conda-tasks runs.
+
+    Use ``create`` or ``join`` rather than the constructor.  ``env`` and
+    ``pass_fds`` are what a command needs to use the pool; ``close``
+    gives back the tokens still held and closes a pool we created.
+    """
+
+    def __init__(
+        self,
+        read_fd: int,
+        write_fd: int,
+        makeflags: str,
+        pass_fds: tuple[int, ...] = (),
+        owned: bool = False,
+    ):
+        self.makeflags = makeflags
+        self.pass_fds = pass_fds
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        self._owned = owned
+        self._held: list[bytes] = []
+
+    @classmethod
+    def create(cls, jobs: int, makeflags: str = "") -> Jobserver:
+        """Create a pool for *jobs* parallel jobs in total.
+
+        The pool is an unnamed FIFO opened twice: once non-blocking for
+        us, and once in blocking mode for the commands, which inherit it
+        as both ends of ``--jobserver-auth=R,W``.  Any ``-j`` or
+        jobserver options in *makeflags* are replaced.
+        """
+        tmpdir = tempfile.mkdtemp(prefix="conda-tasks-jobserver-")
+        path = os.path.join(tmpdir, "fifo")
+        try:
+            os.mkfifo(path, 0o600)
+            # Opening both ends keeps reads from ever seeing end-of-file.
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            try:
+                shared = os.open(path, os.O_RDWR)
+            except OSError:
+                os.close(fd)
+                raise
+        finally:
+            # Both descriptions stay usable once the name is gone.
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        os.write(fd, TOKEN * (jobs - 1))
+        kept = [
+            word
+            for word in makeflags.split()
+            if not word.startswith(("-j", *AUTH_OPTIONS))
+        ]
+        auth = f"{AUTH_OPTIONS[0]}{shared},{shared}"
+        flags = " ".join([*kept, f"-j{jobs}", auth])
+        return cls(fd, fd, flags, pass_fds=(shared,), owned=True)
+
+    @classmethod
+    def join(cls, environ: Mapping[str, str] | None = None) -> Jobserver | None:
+        """Join the pool named in ``MAKEFLAGS``, if there is a usable one."""
+        makeflags = (os.environ if environ is None else environ).get("MAKEFLAGS", "")
+        auth = jobserver_auth(makeflags)
+        if auth is None:
+            return None
+        try:
+            if auth.startswith("fifo:"):
+                fd = os.open(auth[len("fifo:") :], os.O_RDWR | os.O_NONBLOCK)
+                return cls(fd, fd, makeflags)
+            read_fd, write_fd = (int(fd) for fd in auth.split(","))
+            os.fstat(write_fd)
+            # A new, non-blocking description of the inherited pipe (Linux).
+            own_read = os.open(f"/proc/self/fd/{read_fd}", os.O_RDONLY | os.O_NONBLOCK)
+        except (OSError, ValueError):
+            # make did not pass the pool on (the recipe isn't marked with
+            # ``+``), or it is of a kind we cannot use here.
+            return None
+        return cls(own_read, write_fd, makeflags, pass_fds=(read_fd, write_fd))
+
+    def env(self) -> dict[str, str]:
+        """Return the environment variables naming this pool."""
+        return {"MAKEFLAGS": self.makeflags}
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is free, without waiting."""
+        try:
+            token = os.read(self._read_fd, 1)
+        except (BlockingIOError, InterruptedError):
+            return False
+        if not token:
+            return False
+        self._held.append(token)
+        return True
+
+    def release(self) -> None:
+        """Give back a token taken with ``try_acquire``."""
+        if self._held:
+            os.write(self._write_fd, self._held.pop())
+
+    def close(self) -> None:
+        """Give back every token still held and close a pool we created."""
+        while self._held:
+            try:
+                self.release()
+            except OSError:
+                break
+        # The write end is either the same FIFO descriptor or inherited.
+        os.close(self._read_fd)
+        if self._owned:
+            for fd in self.pass_fds:
+                os.close(fd)
+            self._owned = False
+
+    def __enter__(self) -> Jobserver:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def jobserver_for_run(jobs: int) -> Jobserver | None:
+    """Return the jobserver for a run of up to *jobs* tasks at once, if any.
+
+    Joins the pool of a parent ``make`` when there is one, and otherwise
+    creates a pool when more than one job may run.  Returns None on
+    Windows and when the ``jobserver`` key of the ``conda_tasks`` plugin
+    setting is false.
+    """
+    from conda.base.constants import on_win
+
+    from .settings import as_bool, plugin_setting
+
+    if on_win:
+        return None
+    # Not even the setting is worth reading when there is nothing to share.
+    if jobs < 2 and jobserver_auth(os.environ.get("MAKEFLAGS", "")) is None:
+        return None
+    if not plugin_setting("jobserver", True, convert=as_bool):
+        return None
+    joined = Jobserver.join()
+    if joined is not None or jobs < 2:
+        return joined
+    try:
+        return Jobserver.create(jobs, os.environ.get("MAKEFLAGS", ""))
+    except OSError:
+        return None
@@ -0,0 +1,90 @@
+"""Persistent cache of parsed task files.
+
+Every ``conda task`` process would otherwise read, parse and normalize
+its task file from scratch, which for a generated manifest with
+thousands of tasks takes far longer than the rest of ``conda task list``.
+The normalized ``dict[str, Task]`` is therefore pickled into the
+project's cache directory, next to the file's identity: its path,
+inode, size, ``mtime_ns`` and ``ctime_ns``.  A later process loads the
+pickle instead of parsing as long as the file's identity is unchanged,
+and the conda-tasks version and ``MANIFEST_VERSION`` match the ones that
+wrote it -- a new release may parse the same file differently.
+
+Like ``StatIndex``, a file changed within ``RACY_WINDOW_NS`` before it was
+parsed is not cached, since a second change in the same timestamp tick
+would go unnoticed.  Unreadable or stale entries are simply ignored, and
+failing to write one only costs the next process a parse.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import time
+from typing import TYPE_CHECKING
+
+from . import __version__
+from .cachedir import project_cache_dir
+from .statindex import RACY_WINDOW_NS
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .models import Task
+
+#: Bumped when the layout of cache entries or of the models changes.
+MANIFEST_VERSION = 1
+
+
+def _identity(path: Path) -> tuple[str, int, int, int, int] | None:
+    """Return what identifies the current contents of *path*, or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (str(path), st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+def manifest_cache_path(project_root: Path, filename: str) -> Path:
+    """Return the file caching the parsed contents of task file *filename*."""
+    return project_cache_dir(project_root) / f"manifest-{filename}.pickle"
+
+
+def _entry_path(path: Path) -> Path:
+    """Return where the parsed contents of the task file *path* are kept."""
+    return manifest_cache_path(path.parent, path.name)
+
+
+def load_manifest(path: Path) -> dict[str, Task] | None:
+    """Return the cached tasks of the task file *path*, if still valid."""
+    identity = _identity(path)
+    if identity is None:
+        return None
+    try:
+        with open(_entry_path(path), "rb") as f:
+            version, written_by, stored, tasks = pickle.load(f)
+    except Exception:
+        # Missing, truncated, or pickled by an incompatible version.
+        return None
+    if (version, written_by, stored) != (MANIFEST_VERSION, __version__, identity):
+        return None
+    return tasks
+
+
+def store_manifest(path: Path, tasks: dict[str, Task]) -> None:
+    """Cache the *tasks* just parsed from the task file *path*."""
+    identity = _identity(path)
+    if identity is None or time.time_ns() - identity[3] < RACY_WINDOW_NS:
+        return
+    entry = _entry_path(path)
+    tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                (MANIFEST_VERSION, __version__, identity, tasks),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, entry)
+    except (OSError, pickle.PicklingError):
+        tmp.unlink(missing_ok=True)
@@ -42,6 +42,9 @@ class TaskOverride:
     inputs: list[str] | None = None
     outputs: list[str] | None = None
     clean_env: bool | None = None
+    shell: str | None = None
+    cpus: float | None = None
+    memory: int | None = None
 
 
 @dataclass
@@ -58,7 +61,14 @@ class Task:
     inputs: list[str] = field(default_factory=list)
     outputs: list[str] = field(default_factory=list)
     clean_env: bool = False
+    #: Shell that runs a string ``cmd``; list commands are run without one.
+    shell: str | None = None
     default_environment: str | None = None
+    hash: str | None = None
+    #: CPUs the command keeps busy, for admission control when running in parallel.
+    cpus: float | None = None
+    #: Peak memory of the command in bytes, likewise.
+    memory: int | None = None
     platforms: dict[str, TaskOverride] | None = None
 
     @property
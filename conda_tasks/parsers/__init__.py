@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -26,24 +27,36 @@ _SEARCH_ORDER: tuple[str, ...] = (
 )
 
 
-def _parser_registry() -> list[TaskFileParser]:
-    """Return all registered parser instances in detection priority order."""
-    return [
-        PixiTomlParser(),
-        CondaTomlParser(),
-        PyprojectTomlParser(),
-        CondaRCParser(),
-    ]
+#: All parsers, in detection priority order.
+_PARSERS: tuple[TaskFileParser, ...] = (
+    PixiTomlParser(),
+    CondaTomlParser(),
+    PyprojectTomlParser(),
+    CondaRCParser(),
+)
 
 
 def get_parser(path: Path) -> TaskFileParser | None:
     """Return the first parser that can handle *path*, or ``None``."""
-    for parser in _parser_registry():
+    for parser in _PARSERS:
         if parser.can_handle(path):
             return parser
     return None
 
 
+def _task_file_names(directory: Path) -> set[str]:
+    """Return which of the ``_SEARCH_ORDER`` names are files in *directory*.
+
+    One ``scandir`` instead of a ``stat`` per name, which matters on
+    network filesystems where each is a round trip.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return {e.name for e in it if e.name in _SEARCH_ORDER and e.is_file()}
+    except OSError:
+        return set()
+
+
 def detect_task_file(start_dir: Path | None = None) -> Path | None:
     """Walk up from *start_dir* looking for a known task file.
 
@@ -55,11 +68,11 @@ def detect_task_file(start_dir: Path | None = None) -> Path | None:
 
     current = start_dir
     while True:
+        found = _task_file_names(current)
         for name in _SEARCH_ORDER:
-            candidate = current / name
-            if candidate.is_file():
-                parser = get_parser(candidate)
-                if parser is not None:
+            if name in found:
+                candidate = current / name
+                if get_parser(candidate) is not None:
                     return candidate
         parent = current.parent
         if parent == current:
@@ -70,12 +83,24 @@ def detect_task_file(start_dir: Path | None = None) -> Path | None:
 
 @lru_cache(maxsize=4)
 def _cached_parse(path: str) -> dict[str, Task]:
-    """Parse a task file (cached by path string for memoisation)."""
+    """Parse a task file (cached by path string for memoisation).
+
+    Files whose parser is ``cacheable`` are also cached on disk across
+    processes, see ``conda_tasks.manifestcache``.
+    """
+    from ..manifestcache import load_manifest, store_manifest
+
     p = Path(path)
+    tasks = load_manifest(p)
+    if tasks is not None:
+        return tasks
     parser = get_parser(p)
     if parser is None:
         raise TaskParseError(str(p), "no parser found for this file format")
-    return parser.parse(p)
+    tasks = parser.parse(p)
+    if parser.cacheable:
+        store_manifest(p, tasks)
+    return tasks
 
 
 def detect_and_parse(
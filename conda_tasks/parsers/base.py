@@ -1,22 +1,79 @@
-"""Abstract base class for task file parsers."""
+"""Abstract base class for task file parsers.
+
+TOML task files are read with the standard library's ``tomllib`` (or its
+``tomli`` backport on Python 3.10), which is many times faster than
+tomlkit and returns plain dicts.  tomlkit, which keeps comments and
+formatting intact, is only imported by the parsers that write files, when
+they do.
+
+Parsers that must read a file to tell whether it defines any tasks keep
+the document ``can_handle`` read with ``_remember``, and ``parse`` takes
+it back with ``_recall`` instead of reading the file a second time (as
+does ``can_handle`` itself when detection and parsing both ask).
+"""
 
 from __future__ import annotations
 
+import os
+import sys
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from typing import ClassVar
+    from typing import Any, ClassVar
 
     from ..models import Task
 
 
+def read_toml(path: Path) -> dict[str, Any]:
+    """Return the contents of the TOML file at *path* as plain Python data."""
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
 class TaskFileParser(ABC):
     """Interface that every task file parser must implement."""
 
     extensions: ClassVar[tuple[str, ...]] = ()
     filenames: ClassVar[tuple[str, ...]] = ()
+    #: Whether the tasks parsed from a file depend on nothing but its
+    #: contents, so that they can be cached across processes.
+    cacheable: ClassVar[bool] = True
+
+    def __init__(self) -> None:
+        self._remembered: tuple[tuple[str, int, int], Any] | None = None
+
+    @staticmethod
+    def _identity(path: Path) -> tuple[str, int, int] | None:
+        """Return what tells whether *path* changed since it was read."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (str(path), st.st_mtime_ns, st.st_size)
+
+    def _remember(self, path: Path, document: Any) -> None:
+        """Keep *document*, just read from *path*, for the next ``_recall``."""
+        identity = self._identity(path)
+        self._remembered = None if identity is None else (identity, document)
+
+    def _recall(self, path: Path, *, keep: bool = False) -> Any | None:
+        """Return the document remembered for *path* if the file is unchanged.
+
+        The document is forgotten unless *keep* is True.
+        """
+        remembered = self._remembered
+        if not keep:
+            self._remembered = None
+        if remembered is None or remembered[0] != self._identity(path):
+            return None
+        return remembered[1]
 
     @abstractmethod
     def can_handle(self, path: Path) -> bool:
@@ -6,18 +6,16 @@ defined in any condarc source (user, system, environment) are automatically
 discovered.
 
 Writing (add/remove) still uses direct YAML manipulation since the config
-API is read-only.
+API is read-only.  conda's YAML support is only imported when a
+``.condarc`` is actually read.
 """
 
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from conda.common.serialize.yaml import YAMLError
-from conda.common.serialize.yaml import dumps as yaml_dumps
-from conda.common.serialize.yaml import loads as yaml_loads
-
 from ..exceptions import TaskNotFoundError, TaskParseError
+from ..settings import plugin_sections
 from .base import TaskFileParser
 from .normalize import normalize_tasks
 
@@ -27,8 +25,6 @@ if TYPE_CHECKING:
 
     from ..models import Task
 
-_CONDARC_KEY = "conda_tasks"
-
 
 def _raw_tasks_from_condarc() -> dict[str, Any]:
     """Extract raw task definitions from all condarc sources via conda's config API.
@@ -36,20 +32,9 @@ def _raw_tasks_from_condarc() -> dict[str, Any]:
     Returns a merged dict of ``{task_name: definition}`` from every condarc
     source that defines ``plugins.conda_tasks.tasks``.
     """
-    from conda.base.context import context
-
     merged: dict[str, Any] = {}
-    for _source, data in context.plugins.raw_data.items():
-        raw_param = data.get(_CONDARC_KEY)
-        if raw_param is None:
-            continue
-        try:
-            raw_value = raw_param._raw_value
-        except AttributeError:
-            continue
-        if not isinstance(raw_value, dict):
-            continue
-        tasks = raw_value.get("tasks")
+    for section in plugin_sections():
+        tasks = section.get("tasks")
         if isinstance(tasks, dict):
             merged.update(tasks)
     return merged
@@ -60,29 +45,44 @@ class CondaRCParser(TaskFileParser):
 
     extensions: ClassVar[tuple[str, ...]] = ()
     filenames: ClassVar[tuple[str, ...]] = (".condarc",)
+    # Tasks are merged from every condarc source, not just this file.
+    cacheable: ClassVar[bool] = False
 
     def can_handle(self, path: Path) -> bool:
         """Return True if *path* is a ``.condarc`` with task definitions."""
         if path.name not in self.filenames:
             return False
-        try:
-            data = yaml_loads(path.read_text(encoding="utf-8")) or {}
-        except YAMLError:
-            return False
+        from conda.common.serialize.yaml import YAMLError
+        from conda.common.serialize.yaml import loads as yaml_loads
+
+        data = self._recall(path, keep=True)
+        if data is None:
+            try:
+                data = yaml_loads(path.read_text(encoding="utf-8")) or {}
+            except YAMLError:
+                return False
         plugins = data.get("plugins", {})
         if not isinstance(plugins, dict):
             return False
         section = plugins.get("conda_tasks") or plugins.get("conda-tasks")
-        return bool(isinstance(section, dict) and section.get("tasks"))
+        has_tasks = bool(isinstance(section, dict) and section.get("tasks"))
+        if has_tasks:
+            self._remember(path, data)
+        return has_tasks
 
     def parse(self, path: Path) -> dict[str, Task]:
         """Parse tasks from condarc via the config API, falling back to direct YAML."""
+        from conda.common.serialize.yaml import YAMLError
+        from conda.common.serialize.yaml import loads as yaml_loads
+
+        data = self._recall(path)
         raw_tasks = _raw_tasks_from_condarc()
         if not raw_tasks:
-            try:
-                data = yaml_loads(path.read_text(encoding="utf-8")) or {}
-            except YAMLError as exc:
-                raise TaskParseError(str(path), str(exc)) from exc
+            if data is None:
+                try:
+                    data = yaml_loads(path.read_text(encoding="utf-8")) or {}
+                except YAMLError as exc:
+                    raise TaskParseError(str(path), str(exc)) from exc
             plugins = data.get("plugins", {})
             section = plugins.get("conda_tasks") or plugins.get("conda-tasks") or {}
             raw_tasks = section.get("tasks", {})
@@ -94,6 +94,9 @@ class CondaRCParser(TaskFileParser):
 
     def add_task(self, path: Path, name: str, task: Task) -> None:
         """Add or update a task under ``plugins.conda_tasks.tasks`` in ``.condarc``."""
+        from conda.common.serialize.yaml import dumps as yaml_dumps
+        from conda.common.serialize.yaml import loads as yaml_loads
+
         if path.exists():
             data = yaml_loads(path.read_text(encoding="utf-8")) or {}
         else:
@@ -116,6 +119,9 @@ class CondaRCParser(TaskFileParser):
 
     def remove_task(self, path: Path, name: str) -> None:
         """Remove a task from the ``.condarc`` file by name."""
+        from conda.common.serialize.yaml import dumps as yaml_dumps
+        from conda.common.serialize.yaml import loads as yaml_loads
+
         data = yaml_loads(path.read_text(encoding="utf-8")) or {}
         plugins = data.get("plugins", {})
         section = plugins.get("conda_tasks", plugins.get("conda-tasks", {})).get(
@@ -4,7 +4,9 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from ..exceptions import CondaTasksError, TaskParseError
 from ..models import Task, TaskArg, TaskDependency, TaskOverride
+from ..sizes import parse_size
 
 if TYPE_CHECKING:
     from typing import Any
@@ -55,8 +57,39 @@ def normalize_args(raw: list[Any] | None) -> list[TaskArg]:
     return result
 
 
-def normalize_override(raw: dict[str, Any]) -> TaskOverride:
-    """Parse a raw dict into a TaskOverride."""
+def normalize_cpus(raw: Any, key: str = "tasks") -> float | None:
+    """Check a ``cpus`` value, which must be a positive number.
+
+    *key* locates the task definition in error messages.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)) or raw <= 0:
+        raise TaskParseError(key, f"'cpus' must be a positive number, not {raw!r}")
+    return raw
+
+
+def normalize_memory(raw: Any, key: str = "tasks") -> int | None:
+    """Convert a ``memory`` value -- bytes or a size like ``"2GiB"`` -- to bytes.
+
+    *key* locates the task definition in error messages.
+    """
+    if raw is None:
+        return None
+    try:
+        memory = parse_size(raw)
+    except CondaTasksError as exc:
+        raise TaskParseError(key, f"'memory': {exc}") from exc
+    if memory < 0:
+        raise TaskParseError(key, f"'memory' must not be negative: {raw!r}")
+    return memory
+
+
+def normalize_override(raw: dict[str, Any], key: str = "target") -> TaskOverride:
+    """Parse a raw dict into a TaskOverride.
+
+    *key* locates the override in error messages.
+    """
     cmd = raw.get("cmd")
     return TaskOverride(
         cmd=cmd,
@@ -68,6 +101,9 @@ def normalize_override(raw: dict[str, Any]) -> TaskOverride:
         inputs=raw.get("inputs"),
         outputs=raw.get("outputs"),
         clean_env=raw.get("clean-env", raw.get("clean_env")),
+        shell=raw.get("shell"),
+        cpus=normalize_cpus(raw.get("cpus"), key),
+        memory=normalize_memory(raw.get("memory"), key),
     )
 
 
@@ -91,10 +127,14 @@ def normalize_task(name: str, raw: str | list[Any] | dict[str, Any]) -> Task:
     clean_env = raw.get("clean-env", raw.get("clean_env", False))
     default_env = raw.get("default-environment", raw.get("default_environment"))
 
+    key = f"tasks.{name}"
     platforms: dict[str, TaskOverride] | None = None
     target_raw = raw.get("target")
     if target_raw and isinstance(target_raw, dict):
-        platforms = {plat: normalize_override(ov) for plat, ov in target_raw.items()}
+        platforms = {
+            plat: normalize_override(ov, f"{key}.target.{plat}")
+            for plat, ov in target_raw.items()
+        }
 
     return Task(
         name=name,
@@ -107,7 +147,11 @@ def normalize_task(name: str, raw: str | list[Any] | dict[str, Any]) -> Task:
         inputs=raw.get("inputs", []),
         outputs=raw.get("outputs", []),
         clean_env=bool(clean_env),
+        shell=raw.get("shell"),
         default_environment=default_env,
+        hash=raw.get("hash"),
+        cpus=normalize_cpus(raw.get("cpus"), key),
+        memory=normalize_memory(raw.get("memory"), key),
         platforms=platforms,
     )
 
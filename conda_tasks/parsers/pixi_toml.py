@@ -4,10 +4,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import tomlkit
-
 from ..exceptions import TaskParseError
-from .base import TaskFileParser
+from .base import TaskFileParser, read_toml
 from .normalize import normalize_override, normalize_task
 
 if TYPE_CHECKING:
@@ -35,7 +33,7 @@ class PixiTomlParser(TaskFileParser):
     def parse(self, path: Path) -> dict[str, Task]:
         """Parse a ``pixi.toml`` file including platform overrides."""
         try:
-            data = tomlkit.loads(path.read_text(encoding="utf-8")).unwrap()
+            data = read_toml(path)
         except Exception as exc:
             raise TaskParseError(str(path), str(exc)) from exc
 
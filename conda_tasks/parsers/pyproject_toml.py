@@ -15,10 +15,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import tomlkit
-
 from ..exceptions import TaskParseError
-from .base import TaskFileParser
+from .base import TaskFileParser, read_toml
 from .normalize import normalize_override, normalize_task
 
 if TYPE_CHECKING:
@@ -38,23 +36,30 @@ class PyprojectTomlParser(TaskFileParser):
         """Return True if *path* is a ``pyproject.toml`` with task definitions."""
         if path.name not in self.filenames:
             return False
-        try:
-            data = tomlkit.loads(path.read_text(encoding="utf-8")).unwrap()
-        except Exception:
-            return False
+        data = self._recall(path, keep=True)
+        if data is None:
+            try:
+                data = read_toml(path)
+            except Exception:
+                return False
         tool = data.get("tool", {})
-        return bool(
+        has_tasks = bool(
             tool.get("conda", {}).get("tasks")
             or tool.get("conda-tasks", {}).get("tasks")
             or tool.get("pixi", {}).get("tasks")
         )
+        if has_tasks:
+            self._remember(path, data)
+        return has_tasks
 
     def parse(self, path: Path) -> dict[str, Task]:
         """Parse tasks from conda, conda-tasks, or pixi tool tables."""
-        try:
-            data = tomlkit.loads(path.read_text(encoding="utf-8")).unwrap()
-        except Exception as exc:
-            raise TaskParseError(str(path), str(exc)) from exc
+        data = self._recall(path)
+        if data is None:
+            try:
+                data = read_toml(path)
+            except Exception as exc:
+                raise TaskParseError(str(path), str(exc)) from exc
 
         tool = data.get("tool", {})
         conda_section = tool.get("conda", {})
@@ -16,10 +16,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import tomlkit
-
 from ..exceptions import TaskNotFoundError, TaskParseError
-from .base import TaskFileParser
+from .base import TaskFileParser, read_toml
 from .normalize import normalize_override, normalize_task
 
 if TYPE_CHECKING:
@@ -37,6 +35,8 @@ def _task_to_toml_inline(task: Task) -> str | InlineTable:
     Platform overrides are NOT included here -- they go into separate
     ``[target.<platform>.tasks]`` tables.
     """
+    import tomlkit
+
     defn = tomlkit.inline_table()
     if task.cmd is not None:
         defn.append("cmd", task.cmd)
@@ -50,6 +50,8 @@ def _task_to_toml_inline(task: Task) -> str | InlineTable:
         defn.append("cwd", task.cwd)
     if task.clean_env:
         defn.append("clean-env", True)
+    if task.shell:
+        defn.append("shell", task.shell)
     if task.args:
         defn.append(
             "args",
@@ -62,6 +64,12 @@ def _task_to_toml_inline(task: Task) -> str | InlineTable:
         defn.append("inputs", list(task.inputs))
     if task.outputs:
         defn.append("outputs", list(task.outputs))
+    if task.hash:
+        defn.append("hash", task.hash)
+    if task.cpus is not None:
+        defn.append("cpus", task.cpus)
+    if task.memory is not None:
+        defn.append("memory", task.memory)
 
     if len(defn) == 1 and "cmd" in defn:
         return str(defn["cmd"])
@@ -70,6 +78,8 @@ def _task_to_toml_inline(task: Task) -> str | InlineTable:
 
 def tasks_to_toml(tasks: dict[str, Task]) -> str:
     """Serialize a full task dict to ``conda.toml`` TOML string."""
+    import tomlkit
+
     doc = tomlkit.document()
 
     task_table = tomlkit.table()
@@ -91,6 +101,12 @@ def tasks_to_toml(tasks: dict[str, Task]) -> str:
                 ov.append("cwd", override.cwd)
             if override.clean_env is not None:
                 ov.append("clean-env", override.clean_env)
+            if override.shell is not None:
+                ov.append("shell", override.shell)
+            if override.cpus is not None:
+                ov.append("cpus", override.cpus)
+            if override.memory is not None:
+                ov.append("memory", override.memory)
             if override.inputs is not None:
                 ov.append("inputs", list(override.inputs))
             if override.outputs is not None:
@@ -129,7 +145,7 @@ class CondaTomlParser(TaskFileParser):
     def parse(self, path: Path) -> dict[str, Task]:
         """Parse a ``conda.toml`` file including platform overrides."""
         try:
-            data = tomlkit.loads(path.read_text(encoding="utf-8")).unwrap()
+            data = read_toml(path)
         except Exception as exc:
             raise TaskParseError(str(path), str(exc)) from exc
 
@@ -165,6 +181,8 @@ class CondaTomlParser(TaskFileParser):
 
     def add_task(self, path: Path, name: str, task: Task) -> None:
         """Add or update a task in the TOML file, creating it if needed."""
+        import tomlkit
+
         if path.exists():
             doc = tomlkit.loads(path.read_text(encoding="utf-8"))
         else:
@@ -176,6 +194,8 @@ class CondaTomlParser(TaskFileParser):
 
     def remove_task(self, path: Path, name: str) -> None:
         """Remove a task from the TOML file by name."""
+        import tomlkit
+
         doc = tomlkit.loads(path.read_text(encoding="utf-8"))
         tasks_section = doc.get("tasks", {})
         if name not in tasks_section:
@@ -1,14 +1,65 @@
-"""Shell execution backends for running task commands."""
+"""Shell execution backends for running task commands.
+
+A command given as a list is an argv: it is executed directly, with its
+arguments passed through unchanged and no shell in between.  A string
+is run by a shell -- the task's ``shell`` if set, else ``$SHELL`` (or
+``cmd`` on Windows).
+
+Output normally goes to the terminal.  When a ``TaskLog`` is passed to
+``run`` it is captured instead: read from a pipe as it is produced and
+written to the log (see ``conda_tasks.tasklog``).
+
+``SubprocessShell`` lets commands write straight to the terminal.
+``AsyncSubprocessShell`` runs them as ``asyncio`` subprocesses instead
+and streams their output through an ``OutputMultiplexer``, which
+prefixes every line with the task name and writes whole lines only, so
+the output of tasks running side by side stays readable.  ``conda task
+run`` uses it whenever two tasks may run at once, and awaits every
+command's ``run_async`` on the scheduler's single event loop.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import os
+import shutil
 import subprocess
+import sys
+import threading
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from conda.base.constants import on_win
 
+from .activation import activated_env
+
+if TYPE_CHECKING:
+    from typing import BinaryIO
+
+    from .jobserver import Jobserver
+    from .tasklog import TaskLog
+
+#: Bytes read from a child's stdout or stderr at a time.
+READ_SIZE = 64 * 1024
+
+#: Exit code reported when a command's executable does not exist, as in a shell.
+COMMAND_NOT_FOUND = 127
+
+#: Exit code reported when a command cannot be executed, e.g. lacking permission.
+COMMAND_NOT_EXECUTABLE = 126
+
+
+def default_shell() -> str | None:
+    """Return the shell for string commands of tasks that do not set one.
+
+    Reads the ``shell`` key of the ``conda_tasks`` plugin setting; None
+    means ``$SHELL`` (``cmd`` on Windows).
+    """
+    from .settings import plugin_setting
+
+    return plugin_setting("shell")
+
 
 class ShellBackend(ABC):
     """Abstract interface for executing shell commands."""
@@ -21,8 +72,25 @@ class ShellBackend(ABC):
         cwd: Path,
         conda_prefix: Path | None = None,
         clean_env: bool = False,
+        shell: str | None = None,
+        log: TaskLog | None = None,
+        name: str | None = None,
     ) -> int:
-        """Execute *cmd* and return the exit code."""
+        """Execute *cmd* and return the exit code.
+
+        *shell* runs string commands instead of the default shell.  The
+        command's stdout and stderr go to *log* when one is given.
+        *name* is the task the command belongs to, for backends that
+        label its output.
+        """
+
+    def cancel(self) -> None:
+        """Terminate the commands started by ``run`` that are still running.
+
+        ``run`` may be called from several threads at once; ``cancel``
+        is called from another thread to stop them all.  The default
+        does nothing.
+        """
 
 
 class SubprocessShell(ShellBackend):
@@ -30,9 +98,15 @@ class SubprocessShell(ShellBackend):
 
     When *conda_prefix* is given the command is executed inside an
     activated conda environment (mirroring ``conda run``).  Otherwise
-    the command runs directly in the current shell.
+    the command runs directly in the current shell.  Commands are told
+    about *jobserver*, if given, through ``MAKEFLAGS``.
     """
 
+    def __init__(self, jobserver: Jobserver | None = None) -> None:
+        self.jobserver = jobserver
+        self._procs: set[subprocess.Popen[bytes]] = set()
+        self._lock = threading.Lock()
+
     def run(
         self,
         cmd: str | list[str],
@@ -40,26 +114,32 @@ class SubprocessShell(ShellBackend):
         cwd: Path,
         conda_prefix: Path | None = None,
         clean_env: bool = False,
+        shell: str | None = None,
+        log: TaskLog | None = None,
+        name: str | None = None,
     ) -> int:
         """Execute *cmd* and return the process exit code.
 
         When *conda_prefix* is given the command runs inside an activated
-        conda environment.  Otherwise it runs directly in the current shell.
+        conda environment, computed once per prefix and cached (see
+        ``conda_tasks.activation``); only when that fails is it wrapped
+        in an activation script.  Otherwise it runs directly.
         """
         run_env = self._build_env(env, clean_env)
 
-        if isinstance(cmd, list):
-            cmd = " ".join(cmd)
-
         if conda_prefix is not None:
-            return self._run_in_env(cmd, run_env, cwd, conda_prefix)
-        return self._run_direct(cmd, run_env, cwd)
+            activated = activated_env(conda_prefix, run_env)
+            if activated is None:
+                return self._run_in_env(cmd, run_env, cwd, conda_prefix, shell, log)
+            run_env = activated
+        return self._run_direct(cmd, run_env, cwd, shell, log)
 
     def _build_env(self, extra: dict[str, str], clean: bool) -> dict[str, str]:
         """Build the environment variable mapping for a subprocess.
 
         When *clean* is True only a minimal set of system variables is
-        kept (``PATH``, ``HOME``, etc.). *extra* variables are always merged in.
+        kept (``PATH``, ``HOME``, etc.). The jobserver's and then *extra*
+        variables are always merged in.
         """
         if clean:
             base: dict[str, str] = {}
@@ -81,27 +161,46 @@ class SubprocessShell(ShellBackend):
                     base[key] = val
         else:
             base = dict(os.environ)
+        if self.jobserver is not None:
+            base.update(self.jobserver.env())
         base.update(extra)
         return base
 
-    def _run_direct(self, cmd: str, env: dict[str, str], cwd: Path) -> int:
-        """Run *cmd* in the native shell without conda activation."""
-        shell_cmd = self._shell_command(cmd)
-        result = subprocess.run(shell_cmd, env=env, cwd=str(cwd))
-        return result.returncode
+    def _run_direct(
+        self,
+        cmd: str | list[str],
+        env: dict[str, str],
+        cwd: Path,
+        shell: str | None = None,
+        log: TaskLog | None = None,
+    ) -> int:
+        """Run *cmd* without conda activation."""
+        return self._call(self._command(cmd, env, shell), env, cwd, log)
 
     def _run_in_env(
         self,
-        cmd: str,
+        cmd: str | list[str],
         env: dict[str, str],
         cwd: Path,
         conda_prefix: Path,
+        shell: str | None = None,
+        log: TaskLog | None = None,
     ) -> int:
         """Run *cmd* inside an activated conda environment at *conda_prefix*.
 
         Uses ``conda.utils.wrap_subprocess_call`` to generate an
         activation wrapper script, which is cleaned up after execution.
         """
+        script, command = self._wrap_in_env(cmd, conda_prefix, shell)
+        try:
+            return self._call(command, env, cwd, log)
+        finally:
+            self._remove_script(script)
+
+    def _wrap_in_env(
+        self, cmd: str | list[str], conda_prefix: Path, shell: str | None = None
+    ) -> tuple[str | None, list[str]]:
+        """Return the activation wrapper script and the command that runs it."""
         from conda.base.context import context
         from conda.utils import wrap_subprocess_call
 
@@ -109,26 +208,305 @@ class SubprocessShell(ShellBackend):
         dev_mode = context.dev
         debug_wrapper_scripts: bool = getattr(context, "debug_wrapper_scripts", False)
 
-        script, command = wrap_subprocess_call(
+        return wrap_subprocess_call(
             root_prefix,
             str(conda_prefix),
             dev_mode,
             debug_wrapper_scripts,
-            self._shell_command(cmd),
+            list(cmd) if isinstance(cmd, list) else self._shell_command(cmd, shell),
         )
+
+    @staticmethod
+    def _remove_script(script: str | None) -> None:
+        """Delete an activation wrapper script, if there is one."""
+        if script and Path(script).exists():
+            try:
+                Path(script).unlink()
+            except OSError:
+                pass
+
+    def _call(
+        self,
+        args: list[str],
+        env: dict[str, str],
+        cwd: Path,
+        log: TaskLog | None = None,
+    ) -> int:
+        """Run *args* to completion, keeping track of it for ``cancel``.
+
+        With a *log*, stdout and stderr share one pipe, copied to the log
+        by this thread until the command closes it.
+        """
+        capture: dict[str, int] = {}
+        if log is not None:
+            capture = {"stdout": subprocess.PIPE, "stderr": subprocess.STDOUT}
         try:
-            result = subprocess.run(command, env=env, cwd=str(cwd))
-            return result.returncode
-        finally:
-            if script and Path(script).exists():
-                try:
-                    Path(script).unlink()
-                except OSError:
-                    pass
+            proc = subprocess.Popen(
+                args, env=env, cwd=str(cwd), pass_fds=self._pass_fds, **capture
+            )
+        except OSError as exc:
+            return _not_started(args, exc, log)
+        with proc:
+            with self._lock:
+                self._procs.add(proc)
+            try:
+                if log is not None and proc.stdout is not None:
+                    fd = proc.stdout.fileno()
+                    while data := os.read(fd, READ_SIZE):
+                        log.write(data)
+                return proc.wait()
+            except BaseException:
+                proc.kill()
+                raise
+            finally:
+                with self._lock:
+                    self._procs.discard(proc)
+
+    @property
+    def _pass_fds(self) -> tuple[int, ...]:
+        """File descriptors commands inherit, for the jobserver."""
+        return () if self.jobserver is None else self.jobserver.pass_fds
+
+    def cancel(self) -> None:
+        """Terminate every command this shell is still running."""
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+    def _command(
+        self, cmd: str | list[str], env: dict[str, str], shell: str | None = None
+    ) -> list[str]:
+        """Return the argv that runs *cmd* with the variables *env*.
+
+        A list is an argv already; its executable is looked up on the
+        ``PATH`` of *env*, which is what the command will see.
+        """
+        if isinstance(cmd, str):
+            return self._shell_command(cmd, shell)
+        executable = shutil.which(cmd[0], path=env.get("PATH"))
+        return [executable or cmd[0], *cmd[1:]]
 
     @staticmethod
-    def _shell_command(cmd: str) -> list[str]:
-        """Wrap *cmd* in the platform-appropriate shell invocation."""
-        if on_win:
-            return ["cmd", "/d", "/c", cmd]
-        return [os.environ.get("SHELL", "/bin/sh"), "-c", cmd]
+    def _shell_command(cmd: str, shell: str | None = None) -> list[str]:
+        """Wrap *cmd* in an invocation of *shell*, or the platform's default."""
+        if shell is None:
+            shell = "cmd" if on_win else os.environ.get("SHELL", "/bin/sh")
+        if on_win and Path(shell).stem.lower() == "cmd":
+            return [shell, "/d", "/c", cmd]
+        return [shell, "-c", cmd]
+
+
+class OutputMultiplexer:
+    """Interleave the output of several commands line by line.
+
+    Bytes fed for each task and stream are buffered until a newline;
+    complete lines are written to *stdout* or *stderr* (the process's
+    own by default) with a ``[name]`` prefix, one line at a time under
+    a lock, so lines of different tasks never mix.
+    """
+
+    def __init__(
+        self,
+        stdout: BinaryIO | None = None,
+        stderr: BinaryIO | None = None,
+    ):
+        self._streams = (stdout, stderr)
+        self._pending: dict[tuple[str | None, bool], bytes] = {}
+        self._lock = threading.Lock()
+
+    def _stream(self, err: bool) -> BinaryIO:
+        stream = self._streams[err]
+        if stream is None:
+            text = sys.stderr if err else sys.stdout
+            # Keep what was printed before, like ``[run] name``, in order.
+            text.flush()
+            stream = text.buffer
+        return stream
+
+    def _write(self, name: str | None, lines: list[bytes], err: bool) -> None:
+        prefix = b"" if name is None else f"[{name}] ".encode()
+        stream = self._stream(err)
+        stream.write(b"".join(prefix + line for line in lines))
+        stream.flush()
+
+    def feed(self, name: str | None, data: bytes, err: bool = False) -> None:
+        """Add *data* from task *name*'s stdout (or stderr, if *err*)."""
+        with self._lock:
+            buffered = self._pending.pop((name, err), b"") + data
+            *lines, rest = buffered.split(b"\n")
+            if rest:
+                self._pending[(name, err)] = rest
+            if lines:
+                self._write(name, [line + b"\n" for line in lines], err)
+
+    def flush(self, name: str | None) -> None:
+        """Write out what is left of task *name*'s last, unterminated lines."""
+        with self._lock:
+            for err in (False, True):
+                rest = self._pending.pop((name, err), None)
+                if rest:
+                    self._write(name, [rest + b"\n"], err)
+
+
+class AsyncSubprocessShell(SubprocessShell):
+    """Backend running commands as ``asyncio`` subprocesses.
+
+    ``run_async`` is a coroutine, so one event loop can drive any number
+    of commands; cancelling it terminates the command.  Their stdout and
+    stderr go through *output* (a new ``OutputMultiplexer`` by default)
+    prefixed with the *name* passed to ``run_async``.  ``run`` wraps
+    ``run_async`` in ``asyncio.run`` for callers without a loop.
+    """
+
+    def __init__(
+        self,
+        output: OutputMultiplexer | None = None,
+        jobserver: Jobserver | None = None,
+    ):
+        super().__init__(jobserver)
+        self.output = output or OutputMultiplexer()
+        self._running: set[
+            tuple[asyncio.AbstractEventLoop, asyncio.subprocess.Process]
+        ] = set()
+
+    def run(
+        self,
+        cmd: str | list[str],
+        env: dict[str, str],
+        cwd: Path,
+        conda_prefix: Path | None = None,
+        clean_env: bool = False,
+        shell: str | None = None,
+        log: TaskLog | None = None,
+        name: str | None = None,
+    ) -> int:
+        """Execute *cmd* on a new event loop and return the exit code."""
+        return asyncio.run(
+            self.run_async(
+                cmd, env, cwd, conda_prefix, clean_env, shell, log, name=name
+            )
+        )
+
+    async def run_async(
+        self,
+        cmd: str | list[str],
+        env: dict[str, str],
+        cwd: Path,
+        conda_prefix: Path | None = None,
+        clean_env: bool = False,
+        shell: str | None = None,
+        log: TaskLog | None = None,
+        name: str | None = None,
+    ) -> int:
+        """Execute *cmd* and return its exit code once it has finished.
+
+        See ``SubprocessShell.run`` for the arguments; *name* prefixes
+        the command's output lines when there is no *log*.
+        """
+        run_env = self._build_env(env, clean_env)
+
+        script = None
+        activated: dict[str, str] | None = run_env
+        if conda_prefix is not None:
+            activated = await asyncio.to_thread(activated_env, conda_prefix, run_env)
+        if activated is None:
+            script, args = self._wrap_in_env(cmd, conda_prefix, shell)
+        else:
+            run_env = activated
+            args = self._command(cmd, run_env, shell)
+        try:
+            return await self._exec(args, run_env, cwd, name, log)
+        finally:
+            self._remove_script(script)
+
+    async def _exec(
+        self,
+        args: list[str],
+        env: dict[str, str],
+        cwd: Path,
+        name: str | None,
+        log: TaskLog | None = None,
+    ) -> int:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                env=env,
+                cwd=str(cwd),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                pass_fds=self._pass_fds,
+            )
+        except OSError as exc:
+            return _not_started(args, exc, log)
+        entry = (asyncio.get_running_loop(), proc)
+        with self._lock:
+            self._running.add(entry)
+        try:
+            assert proc.stdout is not None and proc.stderr is not None
+            await asyncio.gather(
+                self._pump(proc.stdout, name, False, log),
+                self._pump(proc.stderr, name, True, log),
+            )
+            return await proc.wait()
+        except asyncio.CancelledError:
+            _terminate(proc)
+            await proc.wait()
+            raise
+        finally:
+            with self._lock:
+                self._running.discard(entry)
+            self.output.flush(name)
+
+    async def _pump(
+        self,
+        stream: asyncio.StreamReader,
+        name: str | None,
+        err: bool,
+        log: TaskLog | None,
+    ) -> None:
+        while data := await stream.read(READ_SIZE):
+            if log is None:
+                self.output.feed(name, data, err)
+            else:
+                log.write(data)
+
+    def cancel(self) -> None:
+        """Terminate every command this shell is still running."""
+        super().cancel()
+        with self._lock:
+            running = list(self._running)
+        for loop, proc in running:
+            try:
+                loop.call_soon_threadsafe(_terminate, proc)
+            except RuntimeError:
+                # The loop has already been closed.
+                pass
+
+
+def _not_started(args: list[str], exc: OSError, log: TaskLog | None = None) -> int:
+    """Report why *args* could not be started and return a shell's exit code."""
+    if isinstance(exc, FileNotFoundError):
+        reason, code = "command not found", COMMAND_NOT_FOUND
+    elif isinstance(exc, PermissionError):
+        reason, code = "Permission denied", COMMAND_NOT_EXECUTABLE
+    else:
+        reason, code = exc.strerror or str(exc), COMMAND_NOT_EXECUTABLE
+    message = f"{args[0]}: {reason}\n"
+    if log is None:
+        sys.stderr.write(message)
+    else:
+        log.write(message.encode())
+    return code
+
+
+def _terminate(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        try:
+            proc.terminate()
+        except ProcessLookupError:
+            pass
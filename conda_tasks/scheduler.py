@@ -0,0 +1,415 @@
+"""Dependency-aware parallel execution of planned tasks.
+
+``Scheduler`` starts every task as soon as all of its dependencies have
+finished, with at most *jobs* commands running at once.  A command
+given as a callable runs on a thread pool; one given as a coroutine
+(such as ``AsyncSubprocessShell.run_async``) runs on a single event
+loop the scheduler keeps on a thread of its own, so that any number of
+them take no thread each.  Everything but the command itself -- cache
+checks, output, saving fingerprints -- happens on the calling thread,
+in the *start* and *finish* callbacks, so none of it has to be
+thread-safe.
+
+When more tasks are ready than there are free slots, the one with the
+longest estimated *critical path* -- its own duration plus the longest
+chain of tasks waiting on it -- starts first, so long chains are not
+left until the end.  Estimates come from the durations recorded by
+earlier runs (see ``estimate_durations``).
+
+Tasks may also declare the ``Resources`` their command uses.  A ready
+task is only started while its declared CPUs and memory fit in what the
+running commands leave of the machine's ``capacity``; otherwise the next
+ready task that does fit starts instead.  A task asking for more than
+the whole machine still runs, once nothing else is running.
+
+Like ``make -l``, the scheduler can also hold back new tasks while the
+machine is *busy* -- see ``system_pressure`` -- and check again every
+``PRESSURE_POLL`` seconds, or as soon as a task finishes.  One task is
+always allowed to run, so a busy machine slows a run down but never
+stalls it.
+
+With a ``Jobserver`` (see ``conda_tasks.jobserver``) as *tokens*, every
+task started while others are running first takes a token from the
+shared pool, and gives one back when it ends, so that the commands it
+runs and the tasks themselves never use more than the pool's job slots.
+
+The first failure stops the run: no new tasks are started, *cancel* is
+called to terminate the commands still running, and the scheduler waits
+for them before returning.  Outcomes are reported in plan order, so the
+summary of a run does not depend on which task happened to finish first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .sizes import parse_size
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, Mapping, Sequence
+    from concurrent.futures import Future
+    from typing import Any, TypeAlias
+
+    #: What ``start`` returns for a task with a command to run.
+    Work: TypeAlias = Callable[[], int] | Coroutine[Any, Any, int]
+
+    from .jobserver import Jobserver
+
+#: The task finished without running a command (cached, restored, ...).
+DONE = "done"
+#: The command ran and exited with status 0.
+OK = "ok"
+#: The command exited with a non-zero status.
+FAILED = "failed"
+#: The command was still running when the run was stopped.
+CANCELLED = "cancelled"
+#: The task was never started because the run was stopped first.
+SKIPPED = "skipped"
+
+#: Estimated duration in seconds of a task when no task has a history.
+DEFAULT_ESTIMATE = 1.0
+
+#: Seconds between checks of the system load while new tasks are held back.
+PRESSURE_POLL = 0.5
+
+#: Where Linux reports how much memory can be allocated without swapping.
+MEMINFO = "/proc/meminfo"
+
+
+@dataclass(frozen=True)
+class Resources:
+    """CPUs and bytes of memory, used or available."""
+
+    cpus: float = 0.0
+    memory: int = 0
+
+    def __add__(self, other: Resources) -> Resources:
+        return Resources(self.cpus + other.cpus, self.memory + other.memory)
+
+    def __sub__(self, other: Resources) -> Resources:
+        return Resources(self.cpus - other.cpus, self.memory - other.memory)
+
+    def fits(self, capacity: Resources) -> bool:
+        """True when these resources are within *capacity*."""
+        return self.cpus <= capacity.cpus and self.memory <= capacity.memory
+
+
+def machine_resources() -> Resources:
+    """Return the CPUs and physical memory of this machine."""
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        # Not available on Windows; memory limits are not enforced there.
+        memory = sys.maxsize
+    return Resources(float(os.cpu_count() or 1), memory)
+
+
+def available_memory() -> int | None:
+    """Return the ``MemAvailable`` bytes of ``/proc/meminfo``, None if unknown."""
+    try:
+        with open(MEMINFO, "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def system_pressure(
+    max_load: float | None = None, min_free_memory: int | None = None
+) -> Callable[[], bool] | None:
+    """Return a check for whether the machine is too busy to start a task.
+
+    The check is True while the 1-minute load average is at least
+    *max_load*, or fewer than *min_free_memory* bytes are available.
+    Limits that are not given are read from the ``max_load`` and
+    ``min_free_memory`` keys of the ``conda_tasks`` plugin setting.
+    Returns None when there are no limits.  Limits that cannot be
+    measured on this platform are ignored, as are settings that are not
+    a number or a size.
+    """
+    from .settings import as_number, plugin_setting
+
+    if max_load is None:
+        max_load = plugin_setting("max_load", convert=as_number)
+    if min_free_memory is None:
+        min_free_memory = plugin_setting("min_free_memory", convert=parse_size)
+    if max_load is None and min_free_memory is None:
+        return None
+
+    def busy() -> bool:
+        if max_load is not None:
+            try:
+                if os.getloadavg()[0] >= max_load:
+                    return True
+            except (AttributeError, OSError):
+                pass
+        if min_free_memory is not None:
+            free = available_memory()
+            if free is not None and free < min_free_memory:
+                return True
+        return False
+
+    return busy
+
+
+@dataclass
+class TaskOutcome:
+    """How one task of a scheduled run ended."""
+
+    name: str
+    status: str = SKIPPED
+    exit_code: int | None = None
+    seconds: float = 0.0
+
+
+def default_jobs() -> int:
+    """Return the number of tasks to run at once when ``--jobs`` is not given.
+
+    Reads the ``jobs`` key of the ``conda_tasks`` plugin setting and
+    falls back to the number of CPUs, also when it is not a number.
+    """
+    from .settings import as_count, plugin_setting
+
+    return plugin_setting("jobs", os.cpu_count() or 1, convert=as_count)
+
+
+def estimate_durations(
+    names: Sequence[str], history: Mapping[str, float]
+) -> dict[str, float]:
+    """Return an estimated duration for each of *names*.
+
+    Tasks that ran before use their recorded average from *history*;
+    the others get the median of the recorded averages of *names*, or
+    ``DEFAULT_ESTIMATE`` when none of them has a history.
+    """
+    known = sorted(history[n] for n in names if n in history)
+    fallback = known[len(known) // 2] if known else DEFAULT_ESTIMATE
+    return {n: history.get(n, fallback) for n in names}
+
+
+def _timed(work: Callable[[], int]) -> tuple[int, float]:
+    start = time.monotonic()
+    code = work()
+    return code, time.monotonic() - start
+
+
+async def _timed_async(work: Coroutine[Any, Any, int]) -> tuple[int, float]:
+    start = time.monotonic()
+    code = await work
+    return code, time.monotonic() - start
+
+
+class _EventLoopThread:
+    """An event loop running on a thread of its own, started on first use."""
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def submit(self, work: Coroutine[Any, Any, int]) -> Future[tuple[int, float]]:
+        """Run *work* on the loop; the future holds its result and duration."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="conda-tasks-loop", daemon=True
+            )
+            self._thread.start()
+        return asyncio.run_coroutine_threadsafe(_timed_async(work), self._loop)
+
+    def close(self) -> None:
+        """Stop the loop once the work submitted to it has ended."""
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+        self._loop = self._thread = None
+
+
+class Scheduler:
+    """Run the tasks in *order*, each after its *deps*, *jobs* at a time.
+
+    *order* must be a topological order.  *deps* maps a task to the
+    tasks it waits for; names outside *order* are ignored.  Ready tasks
+    start in order of their critical path through *estimates* (seconds
+    per task, 1 each by default), then in *order*, as long as their
+    *costs* fit in the *capacity* left (``machine_resources()`` by
+    default).  Tasks without a cost only count against *jobs*.  While
+    *busy* returns True, no more tasks are started than are running.
+    Every task beyond the first running one needs a token of *tokens*.
+    """
+
+    def __init__(
+        self,
+        order: Sequence[str],
+        deps: Mapping[str, Sequence[str]],
+        jobs: int = 1,
+        estimates: Mapping[str, float] | None = None,
+        costs: Mapping[str, Resources] | None = None,
+        capacity: Resources | None = None,
+        busy: Callable[[], bool] | None = None,
+        tokens: Jobserver | None = None,
+    ):
+        self.order = list(order)
+        self.jobs = max(1, jobs)
+        self.costs = dict(costs or {})
+        if capacity is None and self.costs:
+            capacity = machine_resources()
+        self.capacity = capacity
+        self.busy = busy
+        self.tokens = tokens
+        names = set(self.order)
+        self._deps = {n: {d for d in deps.get(n, ()) if d in names} for n in order}
+        self._dependents: dict[str, list[str]] = {n: [] for n in order}
+        for name in self.order:
+            for dep in self._deps[name]:
+                self._dependents[dep].append(name)
+        self.critical_path: dict[str, float] = {}
+        for name in reversed(self.order):
+            tail = (self.critical_path[d] for d in self._dependents[name])
+            own = 1.0 if estimates is None else estimates.get(name, 1.0)
+            self.critical_path[name] = own + max(tail, default=0.0)
+
+    @property
+    def parallel(self) -> bool:
+        """Whether two tasks may ever run at once.
+
+        They cannot with one job, or when every task waits for the one
+        before it in *order*, as in a chain of dependencies.
+        """
+        return self.jobs > 1 and any(
+            prev not in self._deps[name]
+            for prev, name in zip(self.order, self.order[1:])
+        )
+
+    def run(
+        self,
+        start: Callable[[str], Work | None],
+        finish: Callable[[str, int], None],
+        cancel: Callable[[], None],
+    ) -> list[TaskOutcome]:
+        """Run every task and return the outcomes in plan order.
+
+        ``start(name)`` is called once a task's dependencies are done
+        and returns the work to run -- a callable returning an exit code,
+        run on the pool, or a coroutine returning one, run on the event
+        loop -- or None when the task needs no command.
+        ``finish(name, exit_code)`` is called when that work succeeds.
+        An exception from any of these stops the run like a failure and
+        is re-raised once the commands still running have ended.
+        """
+        outcomes = {name: TaskOutcome(name) for name in self.order}
+        position = {name: i for i, name in enumerate(self.order)}
+        priority = {
+            name: (-self.critical_path[name], i) for name, i in position.items()
+        }
+        waiting = {name: set(deps) for name, deps in self._deps.items()}
+        ready = sorted(
+            (name for name in self.order if not waiting[name]),
+            key=priority.__getitem__,
+        )
+        running: dict[Future[tuple[int, float]], str] = {}
+        used = Resources()
+        stopped = False
+        no_cost = Resources()
+
+        def admit() -> str | None:
+            """Remove and return the first ready task that fits, if any."""
+            for i, name in enumerate(ready):
+                cost = self.costs.get(name, no_cost)
+                if (
+                    self.capacity is None
+                    or not running
+                    or (used + cost).fits(self.capacity)
+                ):
+                    return ready.pop(i)
+            return None
+
+        def release(name: str) -> None:
+            for dependent in self._dependents[name]:
+                waiting[dependent].discard(name)
+                if not waiting[dependent]:
+                    ready.append(dependent)
+            ready.sort(key=priority.__getitem__)
+
+        def stop() -> None:
+            nonlocal stopped
+            if not stopped:
+                stopped = True
+                cancel()
+
+        loop = _EventLoopThread()
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            try:
+                while ready or running:
+                    while not stopped and len(running) < self.jobs:
+                        if running and self.busy is not None and self.busy():
+                            break
+                        tokens = self.tokens if running else None
+                        if tokens is not None and not tokens.try_acquire():
+                            break
+                        name = admit()
+                        work = None if name is None else start(name)
+                        if work is None and tokens is not None:
+                            tokens.release()
+                        if name is None:
+                            break
+                        if work is None:
+                            outcomes[name].status = DONE
+                            release(name)
+                        else:
+                            if callable(work):
+                                future = pool.submit(_timed, work)
+                            else:
+                                future = loop.submit(work)
+                            running[future] = name
+                            used += self.costs.get(name, no_cost)
+                    if stopped:
+                        ready.clear()
+                    if not running:
+                        continue
+
+                    # Poll for changes in load and for tokens freed by others.
+                    throttled = self.busy is not None or self.tokens is not None
+                    poll = PRESSURE_POLL if throttled else None
+                    done, _ = wait(
+                        running,
+                        timeout=poll,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in sorted(done, key=lambda f: position[running[f]]):
+                        name = running.pop(future)
+                        used -= self.costs.get(name, no_cost)
+                        if self.tokens is not None and running:
+                            self.tokens.release()
+                        outcome = outcomes[name]
+                        outcome.exit_code, outcome.seconds = future.result()
+                        if outcome.exit_code == 0:
+                            outcome.status = OK
+                            finish(name, 0)
+                            release(name)
+                        elif stopped:
+                            outcome.status = CANCELLED
+                        else:
+                            outcome.status = FAILED
+                            stop()
+            except BaseException:
+                stop()
+                for future, name in running.items():
+                    outcomes[name].status = CANCELLED
+                wait(running)
+                raise
+            finally:
+                loop.close()
+        return [outcomes[name] for name in self.order]
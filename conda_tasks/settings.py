@@ -0,0 +1,180 @@
+"""Access to the ``conda_tasks`` plugin setting.
+
+The setting is registered by ``conda_tasks.plugin.conda_settings`` and
+holds both task definitions and tuning knobs::
+
+    plugins:
+      conda_tasks:
+        tasks: {...}
+        hash_workers: 8
+
+Values are read from conda's raw configuration data so that nested
+mappings (like ``tasks``) survive unchanged.  That also means they keep
+whatever type the source gave them -- ``jobs: 4`` in a condarc is an
+int, ``jobs: "4"`` or a value from an environment variable a string --
+so knobs are read through ``plugin_setting`` with one of the ``as_*``
+converters, and a value that does not convert counts as not set.
+
+Loading that configuration (``conda.base.context``) takes longer than
+the rest of a short ``ct run``, and most machines don't set anything
+for conda-tasks.  So unless conda has loaded it already, the files on
+conda's search path are first checked for the name of the setting, and
+when none mentions it, the setting is known to be empty.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .exceptions import CondaTasksError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from typing import Any
+
+SETTING_NAME = "conda_tasks"
+
+#: Strings accepted for boolean settings, as in conda's own configuration.
+_BOOLEANS = {
+    "true": True,
+    "yes": True,
+    "on": True,
+    "1": True,
+    "false": False,
+    "no": False,
+    "off": False,
+    "0": False,
+}
+
+#: What a condarc that sets anything for conda-tasks must contain.
+_MARKERS = (b"conda_tasks", b"conda-tasks")
+
+#: Environment variables through which conda may set plugin settings.
+_ENV_PREFIX = "CONDA_PLUGINS_"
+
+
+def _conda_roots() -> set[str]:
+    """Return every prefix that conda may substitute for ``$CONDA_ROOT``."""
+    roots = {sys.prefix}
+    prefix = Path(sys.prefix)
+    if prefix.parent.name == "envs":
+        roots.add(str(prefix.parent.parent))
+    if os.environ.get("CONDA_EXE"):
+        roots.add(str(Path(os.environ["CONDA_EXE"]).parent.parent))
+    if os.environ.get("CONDA_ROOT"):
+        roots.add(os.environ["CONDA_ROOT"])
+    return roots
+
+
+def _condarc_files() -> Iterator[Path]:
+    """Yield the files on conda's configuration search path that exist."""
+    from conda.base.constants import SEARCH_PATH
+
+    for template in SEARCH_PATH:
+        roots = _conda_roots() if "$CONDA_ROOT" in template else {""}
+        for root in roots:
+            expanded = template.replace("$CONDA_ROOT", root)
+            path = Path(os.path.expanduser(os.path.expandvars(expanded)))
+            if "$" in str(path):
+                # A variable that is not set.
+                continue
+            if path.is_file():
+                yield path
+            elif path.is_dir():
+                yield from (
+                    child
+                    for child in path.iterdir()
+                    if child.suffix in (".yml", ".yaml") and child.is_file()
+                )
+
+
+@cache
+def _may_be_configured() -> bool:
+    """Return False when no condarc or variable can hold the setting."""
+    if any(name.startswith(_ENV_PREFIX) for name in os.environ):
+        return True
+    for path in _condarc_files():
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        if any(marker in data for marker in _MARKERS):
+            return True
+    return False
+
+
+def plugin_sections() -> Iterator[dict[str, Any]]:
+    """Yield the ``conda_tasks`` mapping from every condarc source, in order."""
+    if "conda.base.context" not in sys.modules and not _may_be_configured():
+        return
+    from conda.base.context import context
+
+    for _source, data in context.plugins.raw_data.items():
+        raw_param = data.get(SETTING_NAME)
+        if raw_param is None:
+            continue
+        try:
+            raw_value = raw_param._raw_value
+        except AttributeError:
+            continue
+        if isinstance(raw_value, dict):
+            yield raw_value
+
+
+def plugin_setting(
+    key: str, default: Any = None, convert: Callable[[Any], Any] | None = None
+) -> Any:
+    """Return ``plugins.conda_tasks.<key>``; later sources take precedence.
+
+    With *convert*, a configured value is returned converted, or
+    *default* when *convert* rejects it with ``TypeError``,
+    ``ValueError`` or ``CondaTasksError``.
+    """
+    value = None
+    for section in plugin_sections():
+        if key in section:
+            value = section[key]
+    if value is None:
+        return default
+    if convert is None:
+        return value
+    try:
+        return convert(value)
+    except (TypeError, ValueError, CondaTasksError):
+        return default
+
+
+def as_bool(value: Any) -> bool:
+    """Convert a boolean setting, also given as ``"true"``, ``"no"``, etc."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in _BOOLEANS:
+        return _BOOLEANS[value.lower()]
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def as_number(value: Any) -> float:
+    """Convert a numeric setting, such as ``max_load``."""
+    if isinstance(value, bool):
+        raise TypeError(f"not a number: {value!r}")
+    return float(value)
+
+
+def as_count(value: Any) -> int:
+    """Convert a setting counting jobs or workers; at least 1."""
+    if isinstance(value, bool):
+        raise TypeError(f"not a number: {value!r}")
+    return max(1, int(value))
+
+
+def as_names(value: Any) -> tuple[str, ...]:
+    """Convert a setting listing names, such as ``glob_skip_dirs``."""
+    if not isinstance(value, list) or not all(
+        isinstance(name, str) and name for name in value
+    ):
+        raise TypeError(f"not a list of names: {value!r}")
+    return tuple(value)
@@ -0,0 +1,45 @@
+"""Parsing and formatting of byte sizes like ``"5GiB"``.
+
+Used for the cache size cap, ``memory`` of tasks and ``min_free_memory``,
+so kept apart from the modules using them -- parsing a task file must not
+import the cache machinery.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from .exceptions import CondaTasksError
+
+if TYPE_CHECKING:
+    from typing import Any
+
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*([kmgt]?)(i?b?)", re.IGNORECASE)
+_UNITS = {"": 0, "k": 1, "m": 2, "g": 3, "t": 4}
+
+
+def parse_size(value: Any) -> int:
+    """Return *value* -- a byte count or a string like ``"5GiB"`` -- in bytes.
+
+    ``KB``, ``MB``, ... are powers of 1000; ``K``, ``KiB``, ``M``,
+    ``MiB``, ... are powers of 1024.  Raises ``CondaTasksError`` for
+    anything else.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    match = _SIZE.fullmatch(str(value).strip())
+    if match is None:
+        raise CondaTasksError(f"Invalid size '{value}'")
+    number, unit, suffix = match.groups()
+    base = 1000 if unit and suffix.lower() == "b" else 1024
+    return int(float(number) * base ** _UNITS[unit.lower()])
+
+
+def format_size(size: float) -> str:
+    """Return *size* bytes as a short human-readable string."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
@@ -0,0 +1,112 @@
+"""Persistent directory listing index for glob expansion.
+
+Listing a directory (``readdir``) is the expensive part of walking a
+large tree.  ``StatIndex`` remembers, per directory, its inode and
+``mtime_ns`` and the names and types of its entries, and ``FileTree``
+(see ``conda_tasks.globbing``) reuses a listing instead of reading the
+directory again while both are unchanged -- creating, removing or
+renaming an entry always bumps the mtime.  The same idea as git's
+untracked cache.
+
+File stats are *not* skipped: editing a file in place leaves its
+directory's mtime alone, so only a ``stat`` of the file itself can tell
+whether its fingerprint is still valid.
+
+A listing taken within ``RACY_WINDOW_NS`` of the directory's mtime is
+not trusted, since a change in the same timestamp tick would go
+unnoticed.  The index is stored with ``marshal`` in the project's cache
+directory, read once per run and written back when it changed; an
+unreadable index is simply rebuilt.
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+INDEX_VERSION = 1
+
+#: Listings taken this soon after their directory changed are re-read.
+RACY_WINDOW_NS = 2 * 10**9
+
+#: One directory entry: ``(name, is_dir, is_symlink)``.
+Listed = tuple[str, bool, bool]
+
+
+class StatIndex:
+    """Directory listings of a project, keyed by directory path.
+
+    An index without a *path* is kept in memory only.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._dirs: dict[str, tuple[int, int, int, list[Listed]]] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> StatIndex:
+        """Read the index stored at *path*, or return an empty one."""
+        index = cls(path)
+        try:
+            with open(path, "rb") as f:
+                version, dirs = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return index
+        if version == INDEX_VERSION and isinstance(dirs, dict):
+            index._dirs = dirs
+        return index
+
+    def __len__(self) -> int:
+        return len(self._dirs)
+
+    def listing(self, dirpath: str, st: os.stat_result) -> list[Listed] | None:
+        """Return the stored listing of *dirpath* if it is still valid.
+
+        *st* is the directory's current stat result.  Returns None when
+        the directory changed, or was listed too close to its last
+        change to be sure.
+        """
+        stored = self._dirs.get(dirpath)
+        if stored is None:
+            return None
+        ino, mtime_ns, listed_ns, entries = stored
+        if (ino, mtime_ns) != (st.st_ino, st.st_mtime_ns):
+            return None
+        if listed_ns - mtime_ns < RACY_WINDOW_NS:
+            return None
+        return entries
+
+    def record(
+        self,
+        dirpath: str,
+        st: os.stat_result,
+        entries: list[Listed],
+        listed_ns: int,
+    ) -> None:
+        """Store the *entries* of *dirpath*, read at ``time.time_ns()`` *listed_ns*."""
+        self._dirs[dirpath] = (st.st_ino, st.st_mtime_ns, listed_ns, entries)
+        self._dirty = True
+
+    def forget(self, dirpath: str) -> None:
+        """Drop the listing of *dirpath*, e.g. because it no longer exists."""
+        if self._dirs.pop(dirpath, None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the index back to its path if anything changed."""
+        if self.path is None or not self._dirty:
+            return
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                marshal.dump((INDEX_VERSION, self._dirs), f)
+            os.replace(tmp, self.path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        self._dirty = False
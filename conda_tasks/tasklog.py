@@ -0,0 +1,89 @@
+"""Per-task log files for captured command output.
+
+When ``conda task run --capture`` is used, the output of each command
+goes to ``logs/<task>.log`` in the project's cache directory instead of
+the terminal, overwriting the log of the task's previous run.  The
+runner copies it there as it is read, in chunks of ``READ_SIZE`` bytes,
+so a task printing hundreds of megabytes costs no more memory than a
+quiet one.  Only the last ``TAIL_BYTES`` are also kept in memory, in a
+ring buffer, to show what went wrong when the task fails.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import BinaryIO
+
+#: Directory of task logs, relative to the project's cache directory.
+LOGS_DIR = "logs"
+
+#: Bytes of output kept in memory for failure reports.
+TAIL_BYTES = 16 * 1024
+
+
+def log_path(project_cache_dir: Path, name: str) -> Path:
+    """Return the log file of task *name* in *project_cache_dir*."""
+    return project_cache_dir / LOGS_DIR / f"{quote(name, safe='')}.log"
+
+
+class TaskLog:
+    """The output of one run of a task.
+
+    Used as a context manager: entering it creates (or truncates) the
+    file at *path*, and everything passed to ``write`` afterwards is
+    appended to it.  The last *tail_bytes* written remain available
+    from ``tail`` after the log is closed.
+    """
+
+    def __init__(self, path: Path, tail_bytes: int = TAIL_BYTES):
+        self.path = path
+        #: Total number of bytes written.
+        self.size = 0
+        self._file: BinaryIO | None = None
+        self._ring = bytearray(max(1, tail_bytes))
+        self._pos = 0
+        self._wrapped = False
+
+    def __enter__(self) -> TaskLog:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, data: bytes) -> None:
+        """Append *data* to the log file and the in-memory tail."""
+        if self._file is not None:
+            self._file.write(data)
+        self.size += len(data)
+
+        size = len(self._ring)
+        data = data[-size:]
+        end = self._pos + len(data)
+        if end <= size:
+            self._ring[self._pos : end] = data
+        else:
+            split = size - self._pos
+            self._ring[self._pos :] = data[:split]
+            self._ring[: end - size] = data[split:]
+        if end >= size:
+            self._wrapped = True
+        self._pos = end % size
+
+    def tail(self) -> bytes:
+        """Return the last bytes written, starting at a line if any was cut."""
+        if not self._wrapped:
+            return bytes(self._ring[: self._pos])
+        data = bytes(self._ring[self._pos :] + self._ring[: self._pos])
+        if self.size > len(data):
+            _, newline, rest = data.partition(b"\n")
+            if newline and rest:
+                return rest
+        return data
@@ -0,0 +1,75 @@
+"""Tests for ``conda task cache``."""
+
+from __future__ import annotations
+
+import argparse
+
+import pytest
+
+from conda_tasks.cache import check_cache, save_cache
+from conda_tasks.cli.cache import execute_cache
+
+
+def _args(action, **kwargs):
+    defaults = dict(
+        cache_action=action,
+        max_size=None,
+        quiet=False,
+        verbose=0,
+        json=False,
+        dry_run=False,
+    )
+    defaults.update(kwargs)
+    return argparse.Namespace(**defaults)
+
+
+@pytest.fixture
+def populated(tmp_path):
+    (tmp_path / "out.bin").write_bytes(b"x" * 100)
+    snapshot = check_cache(tmp_path, "build", "make", {}, [], ["out.bin"], tmp_path)
+    save_cache(
+        tmp_path, "build", "make", {}, [], ["out.bin"], tmp_path, snapshot=snapshot
+    )
+    return tmp_path
+
+
+def test_stats(populated, cache_root, capsys):
+    assert execute_cache(_args("stats")) == 0
+    out = capsys.readouterr().out
+    assert str(cache_root) in out
+    assert "projects   1 (0 stale)" in out
+    assert "artifacts  1 file(s)" in out
+
+
+def test_stats_json(populated, monkeypatch):
+    captured = {}
+
+    def fake_stdout_json(data):
+        captured.update(data)
+
+    import conda.common.io
+
+    monkeypatch.setattr(conda.common.io, "stdout_json", fake_stdout_json, raising=False)
+
+    assert execute_cache(_args("stats", json=True)) == 0
+    data = captured
+    assert data["artifacts"] == {"files": 1, "bytes": 100}
+    assert len(data["projects"]) == 1
+
+
+def test_prune_max_size(populated, cache_root, capsys):
+    assert execute_cache(_args("prune", max_size="0")) == 0
+    assert "Removed 1 project cache(s) and 1 artifact(s)" in capsys.readouterr().out
+    assert not any(cache_root.glob("artifacts/objects/*/*"))
+
+
+def test_clear_dry_run(populated, cache_root, capsys):
+    assert execute_cache(_args("clear", dry_run=True)) == 0
+    assert "[dry-run] Would remove the whole cache" in capsys.readouterr().out
+    assert cache_root.exists()
+
+
+def test_clear(populated, cache_root, capsys):
+    assert execute_cache(_args("clear")) == 0
+    assert "Removed the whole cache" in capsys.readouterr().out
+    assert not cache_root.exists()
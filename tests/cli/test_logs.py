@@ -0,0 +1,75 @@
+"""Tests for ``conda task logs``."""
+
+from __future__ import annotations
+
+import argparse
+
+import pytest
+
+import conda_tasks.cli.logs as logs_mod
+from conda_tasks.cache import task_log_path
+from conda_tasks.cli.logs import execute_logs
+from conda_tasks.exceptions import CondaTasksError, TaskNotFoundError
+
+
+def _args(task_file, task_name="build", **kwargs):
+    defaults = dict(
+        file=task_file,
+        task_name=task_name,
+        pager=True,
+        path=False,
+        quiet=False,
+        verbose=0,
+        json=False,
+        dry_run=False,
+    )
+    defaults.update(kwargs)
+    return argparse.Namespace(**defaults)
+
+
+@pytest.fixture
+def task_file(tmp_path):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\nbuild = "make"\n')
+    return task_file
+
+
+@pytest.fixture
+def log(task_file):
+    path = task_log_path(task_file.parent, "build")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"compiling\ndone\n")
+    return path
+
+
+def test_prints_log(task_file, log, capfd):
+    assert execute_logs(_args(task_file)) == 0
+    assert capfd.readouterr().out == "compiling\ndone\n"
+
+
+def test_prints_path(task_file, log, capsys):
+    assert execute_logs(_args(task_file, path=True)) == 0
+    assert capsys.readouterr().out.strip() == str(log)
+
+
+def test_pages_on_a_terminal(task_file, log, monkeypatch):
+    paged = []
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True)
+    monkeypatch.setattr(logs_mod, "_page", lambda path: paged.append(path) or True)
+    assert execute_logs(_args(task_file)) == 0
+    assert paged == [log]
+
+    paged.clear()
+    monkeypatch.setattr(logs_mod.shutil, "copyfileobj", lambda src, dst: None)
+    assert execute_logs(_args(task_file, pager=False)) == 0
+    assert paged == []
+
+
+def test_missing_log(task_file):
+    with pytest.raises(CondaTasksError, match="--capture"):
+        execute_logs(_args(task_file))
+
+
+def test_unknown_task(task_file):
+    with pytest.raises(TaskNotFoundError):
+        execute_logs(_args(task_file, task_name="missing"))
@@ -22,6 +22,8 @@ def test_returns_parser():
         (["add", "mytask", "echo hello"], "add"),
         (["remove", "mytask"], "remove"),
         (["export"], "export"),
+        (["cache", "stats"], "cache"),
+        (["logs", "build"], "logs"),
     ],
 )
 def test_subcommand_routing(argv, expected_subcmd):
@@ -36,6 +38,15 @@ def test_subcommand_routing(argv, expected_subcmd):
         (["run", "test", "src/tests/"], "task_args", ["src/tests/"]),
         (["run", "build", "--skip-deps"], "skip_deps", True),
         (["run", "build", "--clean-env"], "clean_env", True),
+        (["run", "build", "--jobs", "4"], "jobs", 4),
+        (["run", "build", "-j", "2"], "jobs", 2),
+        (["run", "build"], "jobs", None),
+        (["run", "build", "--capture"], "capture", True),
+        (["run", "build", "--max-load", "6.5"], "max_load", 6.5),
+        (["run", "build", "--min-free-memory", "2GiB"], "min_free_memory", "2GiB"),
+        (["logs", "build"], "pager", True),
+        (["logs", "build", "--no-pager"], "pager", False),
+        (["logs", "build", "--path"], "path", True),
         (
             ["add", "mytask", "echo hello", "--depends-on", "build"],
             "depends_on",
@@ -44,6 +55,7 @@ def test_subcommand_routing(argv, expected_subcmd):
         (["remove", "mytask"], "task_name", "mytask"),
         (["--file", "custom.yml", "list"], "file", Path("custom.yml")),
         (["export", "-o", "out.yml"], "output", Path("out.yml")),
+        (["cache", "prune", "--max-size", "1GiB"], "max_size", "1GiB"),
     ],
 )
 def test_parser_args(argv, attr, expected):
@@ -165,3 +177,20 @@ def test_execute_run_implicit_subcmd(tmp_path, capsys):
     assert result == 0
     output = capsys.readouterr().out
     assert "[dry-run]" in output
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [["list"], ["run", "build", "-j", "2"], ["cache", "prune"], ["logs", "build"]],
+)
+def test_parser_for_one_subcommand(argv):
+    parser = generate_parser([argv[0]])
+    assert parser.parse_args(argv) == generate_parser().parse_args(argv)
+
+
+def test_other_subcommands_are_listed_only(capsys):
+    parser = generate_parser(["list"])
+    with pytest.raises(SystemExit):
+        parser.parse_args(["run", "build"])
+    parser.print_help()
+    assert "run" in capsys.readouterr().out
@@ -8,6 +8,7 @@ from pathlib import Path
 import pytest
 
 import conda_tasks.cli.run as run_mod
+from conda_tasks.cache import FingerprintSnapshot
 from conda_tasks.cli.run import _resolve_task_args, execute_run
 from conda_tasks.exceptions import CondaTasksError, TaskExecutionError
 from conda_tasks.models import Task, TaskArg
@@ -38,14 +39,39 @@ def _run_args(
 class FakeShell:
     """Test double for SubprocessShell that records calls."""
 
-    def __init__(self, return_code: int = 0):
+    def __init__(self, jobserver=None, return_code: int = 0):
+        self.jobserver = jobserver
         self.calls: list[tuple] = []
         self.return_code = return_code
 
-    def run(self, cmd, env, cwd, conda_prefix=None, clean_env=False):
+    def run(
+        self,
+        cmd,
+        env,
+        cwd,
+        conda_prefix=None,
+        clean_env=False,
+        shell=None,
+        log=None,
+        name=None,
+    ):
         self.calls.append((cmd, env, cwd, conda_prefix, clean_env))
+        if log is not None:
+            log.write(f"output of {cmd}\n".encode())
         return self.return_code
 
+    async def run_async(self, *args, **kwargs):
+        return self.run(*args, **kwargs)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _use_shell(monkeypatch, factory):
+    """Make ``conda task run`` get its shell backend from *factory*."""
+    monkeypatch.setattr(run_mod, "SubprocessShell", factory)
+    monkeypatch.setattr(run_mod, "AsyncSubprocessShell", factory)
+
 
 @pytest.mark.parametrize(
     ("args_def", "cli_args", "expected"),
@@ -123,7 +149,7 @@ def test_execute_run_alias_done(tmp_path, capsys, monkeypatch):
     )
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     result = execute_run(_run_args(task_file, task_name="check"))
 
     assert result == 0
@@ -142,7 +168,7 @@ def test_execute_run_alias_quiet(tmp_path, capsys, monkeypatch):
     )
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     result = execute_run(_run_args(task_file, task_name="check", quiet=True))
 
     assert result == 0
@@ -168,7 +194,7 @@ def test_execute_run_real(tmp_path, capsys, monkeypatch):
     task_file.write_text('[tasks]\ngreet = "echo hello"\n')
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     result = execute_run(_run_args(task_file))
 
     assert result == 0
@@ -182,7 +208,7 @@ def test_execute_run_quiet(tmp_path, capsys, monkeypatch):
     task_file.write_text('[tasks]\ngreet = "echo hello"\n')
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     result = execute_run(_run_args(task_file, quiet=True))
 
     assert result == 0
@@ -195,7 +221,7 @@ def test_execute_run_failure(tmp_path, monkeypatch):
     task_file.write_text('[tasks]\nfail = "exit 1"\n')
 
     fake = FakeShell(return_code=1)
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     with pytest.raises(TaskExecutionError, match="fail"):
         execute_run(_run_args(task_file, task_name="fail"))
 
@@ -208,8 +234,10 @@ def test_execute_run_verbose_with_io(tmp_path, capsys, monkeypatch):
     )
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
-    monkeypatch.setattr(run_mod, "is_cached", lambda *a, **kw: False)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+    monkeypatch.setattr(
+        run_mod, "check_cache", lambda *a, **kw: FingerprintSnapshot(hit=False)
+    )
     result = execute_run(_run_args(task_file, task_name="build", verbose=1))
 
     assert result == 0
@@ -226,8 +254,10 @@ def test_execute_run_cached_skips(tmp_path, capsys, monkeypatch):
     )
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
-    monkeypatch.setattr(run_mod, "is_cached", lambda *a, **kw: True)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+    monkeypatch.setattr(
+        run_mod, "check_cache", lambda *a, **kw: FingerprintSnapshot(hit=True)
+    )
     result = execute_run(_run_args(task_file, task_name="build"))
 
     assert result == 0
@@ -243,7 +273,7 @@ def test_execute_run_with_cwd_override(tmp_path, capsys, monkeypatch):
     subdir.mkdir()
 
     fake = FakeShell()
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
     result = execute_run(_run_args(task_file, cwd=subdir))
 
     assert result == 0
@@ -260,10 +290,320 @@ def test_execute_run_saves_cache(tmp_path, monkeypatch):
 
     fake = FakeShell()
     save_calls: list[tuple] = []
-    monkeypatch.setattr(run_mod, "SubprocessShell", lambda: fake)
-    monkeypatch.setattr(run_mod, "is_cached", lambda *a, **kw: False)
-    monkeypatch.setattr(run_mod, "save_cache", lambda *a, **kw: save_calls.append(a))
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+    monkeypatch.setattr(
+        run_mod, "check_cache", lambda *a, **kw: FingerprintSnapshot(hit=False)
+    )
+    monkeypatch.setattr(
+        run_mod, "save_cache", lambda *a, **kw: save_calls.append((a, kw))
+    )
     result = execute_run(_run_args(task_file, task_name="build", quiet=True))
 
     assert result == 0
     assert len(save_calls) == 1
+    assert isinstance(save_calls[0][1]["snapshot"], FingerprintSnapshot)
+
+
+def test_execute_run_restores_outputs(tmp_path, capsys, monkeypatch):
+    """Outputs restored from the artifact store skip the command."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        '[tasks.build]\ncmd = "make"\ninputs = ["src/*.py"]\noutputs = ["dist/"]\n'
+    )
+
+    fake = FakeShell()
+    save_calls: list[tuple] = []
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+    monkeypatch.setattr(
+        run_mod, "check_cache", lambda *a, **kw: FingerprintSnapshot(hit=False)
+    )
+    monkeypatch.setattr(run_mod, "restore_outputs", lambda *a, **kw: True)
+    monkeypatch.setattr(run_mod, "save_cache", lambda *a, **kw: save_calls.append(a))
+    result = execute_run(_run_args(task_file, task_name="build"))
+
+    assert result == 0
+    assert "[restored] build" in capsys.readouterr().out
+    assert fake.calls == []
+    assert len(save_calls) == 1
+
+
+def test_execute_run_verbose_hash_report(tmp_path, capsys, monkeypatch):
+    """Verbose mode reports hashing throughput for cached tasks."""
+    from conda_tasks.hashing import HashReport
+
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks.build]\ncmd = "make"\ninputs = ["src/*.py"]\n')
+
+    snapshot = FingerprintSnapshot(
+        hit=True, hashed=HashReport(files=3, bytes=3 * 1024 * 1024, seconds=0.5)
+    )
+    _use_shell(monkeypatch, FakeShell)
+    monkeypatch.setattr(run_mod, "check_cache", lambda *a, **kw: snapshot)
+    result = execute_run(_run_args(task_file, task_name="build", verbose=1))
+
+    assert result == 0
+    assert "hashed 3 file(s), 3.0 MiB" in capsys.readouterr().out
+
+
+def test_execute_run_unchanged_subgraph_skips_checks(tmp_path, capsys, monkeypatch):
+    """A no-op run proves the whole subgraph cached without per-task checks."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("a")
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        "[tasks.build]\n"
+        'cmd = "make"\n'
+        'inputs = ["src/*.py"]\n'
+        "\n[tasks.test]\n"
+        'cmd = "pytest"\n'
+        'depends-on = ["build"]\n'
+        'inputs = ["src/*.py"]\n'
+    )
+    _use_shell(monkeypatch, FakeShell)
+    execute_run(_run_args(task_file, task_name="test"))
+    capsys.readouterr()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected per-task cache check")
+
+    monkeypatch.setattr(run_mod, "check_cache", fail)
+    assert execute_run(_run_args(task_file, task_name="test")) == 0
+    output = capsys.readouterr().out
+    assert "[cached] build" in output
+    assert "[cached] test" in output
+
+
+def test_plan_tasks_looks_through_aliases(tmp_path):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        "[tasks]\n"
+        'a = "echo a"\n'
+        'b = "echo b"\n'
+        'both = ["a", "b"]\n'
+        'top = { cmd = "echo top", depends-on = ["both"] }\n'
+    )
+    from conda_tasks.parsers import detect_and_parse
+
+    _, tasks = detect_and_parse(file_path=task_file)
+    order = ["a", "b", "both", "top"]
+    args = _run_args(task_file)
+    plan = run_mod.plan_tasks(order, tasks, {"top": {}}, task_file, args)
+    assert [p.name for p in plan] == ["a", "b", "top"]
+    assert plan[-1].deps == ["a", "b"]
+
+
+def test_execute_run_parallel_summary(tmp_path, capsys, monkeypatch):
+    """Independent tasks run on the scheduler and get a summary in plan order."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        '[tasks]\nlint = "ruff check ."\ntest = "pytest"\n\n'
+        '[tasks.check]\ndepends-on = ["lint", "test"]\n'
+    )
+    fake = FakeShell()
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+
+    assert execute_run(_run_args(task_file, task_name="check", jobs=2)) == 0
+    output = capsys.readouterr().out
+    summary = output.split("Summary:")[1].splitlines()
+    assert summary[1].split()[:2] == ["ok", "lint"]
+    assert summary[2].split()[:2] == ["ok", "test"]
+    assert len(fake.calls) == 2
+
+
+def test_execute_run_fail_fast(tmp_path, capsys, monkeypatch):
+    """A failing task stops the run and skips its dependents."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        '[tasks]\nsetup = "exit 1"\n\n'
+        '[tasks.build]\ncmd = "make"\ndepends-on = ["setup"]\n'
+    )
+    fake = FakeShell(return_code=1)
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+
+    with pytest.raises(TaskExecutionError, match="setup"):
+        execute_run(_run_args(task_file, task_name="build", jobs=4))
+    assert [c[0] for c in fake.calls] == ["exit 1"]
+    assert fake.cancelled
+    output = capsys.readouterr().out
+    assert "failed" in output
+    assert "skipped   build" in output
+
+
+def test_execute_run_records_durations(tmp_path, monkeypatch):
+    """Successful commands feed the duration history used for scheduling."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\ngreet = "echo hello"\n')
+    fake = FakeShell()
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+    recorded = []
+    monkeypatch.setattr(run_mod, "record_durations", lambda root, d: recorded.append(d))
+
+    execute_run(_run_args(task_file))
+    assert list(recorded[0]) == ["greet"]
+
+
+def test_plan_tasks_keeps_list_commands(tmp_path, monkeypatch):
+    """List commands stay argvs, rendered one argument at a time."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        "[tasks]\n"
+        'build = { cmd = ["python", "-m", "build", "{{ dest }}"], '
+        'args = [{ arg = "dest", default = "dist dir" }] }\n'
+        'test = { cmd = "pytest", shell = "bash" }\n'
+    )
+    from conda_tasks.parsers import detect_and_parse
+
+    monkeypatch.setattr(run_mod, "default_shell", lambda: "/bin/sh")
+    _, tasks = detect_and_parse(file_path=task_file)
+    args = _run_args(task_file)
+    build, test = run_mod.plan_tasks(
+        ["build", "test"], tasks, {"build": {"dest": "dist dir"}}, task_file, args
+    )
+    assert build.cmd == ["python", "-m", "build", "dist dir"]
+    assert build.command_line == "python -m build 'dist dir'"
+    assert build.shell == "/bin/sh"
+    assert test.shell == "bash"
+
+
+def test_execute_run_passes_argv_to_shell(tmp_path, capsys, monkeypatch):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\ngreet = { cmd = ["echo", "a b"] }\n')
+    fake = FakeShell()
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+
+    assert execute_run(_run_args(task_file)) == 0
+    assert fake.calls[0][0] == ["echo", "a b"]
+    assert "[run] greet: echo 'a b'" in capsys.readouterr().out
+
+
+def test_execute_run_multiple_targets(tmp_path, capsys, monkeypatch):
+    """Comma-separated targets run as one graph; shared deps run once."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        "[tasks]\n"
+        'setup = "echo setup"\n'
+        'lint = { cmd = "echo lint", depends-on = ["setup"] }\n'
+        'test = { cmd = "echo test", depends-on = ["setup"] }\n'
+        'check = ["lint"]\n'
+    )
+    fake = FakeShell()
+    _use_shell(monkeypatch, lambda *a, **kw: fake)
+
+    args = _run_args(task_file, task_name="test,check,test", jobs=1)
+    assert execute_run(args) == 0
+    cmds = [c[0] for c in fake.calls]
+    assert sorted(cmds) == ["echo lint", "echo setup", "echo test"]
+    assert cmds[0] == "echo setup"
+    assert "[done] check" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("task_name", ["a,,b", "a,", ","])
+def test_execute_run_invalid_target_list(tmp_path, task_name):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\na = "echo a"\nb = "echo b"\n')
+    with pytest.raises(CondaTasksError, match="Invalid task name list"):
+        execute_run(_run_args(task_file, task_name=task_name))
+
+
+def test_execute_run_multiple_targets_rejects_args(tmp_path):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\na = "echo a"\nb = "echo b"\n')
+    args = _run_args(task_file, task_name="a,b", task_args=["x"])
+    with pytest.raises(CondaTasksError, match="several tasks"):
+        execute_run(args)
+
+
+def test_plan_tasks_declared_resources(tmp_path):
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        '[tasks]\nlink = { cmd = "ld", cpus = 2, memory = "1GiB" }\nlint = "ruff"\n'
+    )
+    from conda_tasks.parsers import detect_and_parse
+    from conda_tasks.scheduler import Resources
+
+    _, tasks = detect_and_parse(file_path=task_file)
+    args = _run_args(task_file)
+    link, lint = run_mod.plan_tasks(
+        ["link", "lint"], tasks, {"link": {}, "lint": {}}, task_file, args
+    )
+    assert link.cost == Resources(cpus=2.0, memory=1024**3)
+    assert lint.cost is None
+
+
+def test_execute_run_capture(tmp_path, capsys, monkeypatch):
+    """Captured output goes to the task log; failures show its tail."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text('[tasks]\ngreet = "echo hello"\n')
+    _use_shell(monkeypatch, lambda *a, **kw: FakeShell(return_code=2))
+
+    with pytest.raises(TaskExecutionError):
+        execute_run(_run_args(task_file, capture=True))
+    log = run_mod.task_log_path(tmp_path, "greet")
+    assert log.read_bytes() == b"output of echo hello\n"
+    err = capsys.readouterr().err
+    assert f"full log: {log}" in err
+    assert "output of echo hello" in err
+
+
+def test_active_env_from_conda_prefix(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONDA_PREFIX", str(tmp_path / "env"))
+    args = argparse.Namespace(prefix=None, name=None)
+    assert run_mod._resolve_conda_prefix(args) == tmp_path / "env"
+    args.prefix = str(tmp_path / "other")
+    assert run_mod._resolve_conda_prefix(args) == tmp_path / "other"
+
+
+@pytest.mark.parametrize(
+    ("task_name", "jobs", "backend"),
+    [
+        ("check", 2, "AsyncSubprocessShell"),
+        ("check", 1, "SubprocessShell"),
+        ("lint", 2, "SubprocessShell"),
+        ("publish", 2, "SubprocessShell"),
+    ],
+)
+def test_execute_run_multiplexes_parallel_output(
+    tmp_path, monkeypatch, task_name, jobs, backend
+):
+    """Output is prefixed per task only when two tasks can run at once."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        '[tasks]\nlint = "ruff check ."\ntest = "pytest"\n\n'
+        '[tasks.check]\ndepends-on = ["lint", "test"]\n\n'
+        '[tasks.publish]\ncmd = "twine upload"\ndepends-on = ["lint"]\n'
+    )
+    fake = FakeShell()
+    used = []
+    for name in ("SubprocessShell", "AsyncSubprocessShell"):
+        monkeypatch.setattr(
+            run_mod, name, lambda *a, n=name, **kw: used.append(n) or fake
+        )
+
+    assert execute_run(_run_args(task_file, task_name=task_name, jobs=jobs)) == 0
+    assert used == [backend]
+
+
+def test_plan_tasks_reads_settings_only_when_needed(tmp_path, monkeypatch):
+    """Tasks that set their shell, or cache nothing, need no plugin settings."""
+    task_file = tmp_path / "conda.toml"
+    task_file.write_text(
+        "[tasks]\n"
+        'fmt = { cmd = "ruff format .", shell = "bash" }\n'
+        'lint = { cmd = "ruff check .", shell = "bash" }\n'
+        'build = { cmd = "make", shell = "bash", outputs = ["out"] }\n'
+    )
+    from conda_tasks.parsers import detect_and_parse
+
+    read = []
+    monkeypatch.setattr(run_mod, "default_shell", lambda: read.append("shell"))
+    monkeypatch.setattr(
+        run_mod, "resolve_algorithm", lambda name: read.append("hash") or "sha256"
+    )
+    _, tasks = detect_and_parse(file_path=task_file)
+    args = _run_args(task_file)
+
+    run_mod.plan_tasks(["fmt", "lint"], tasks, {"fmt": {}}, task_file, args)
+    assert read == []
+    (build,) = run_mod.plan_tasks(["build"], tasks, {"build": {}}, task_file, args)
+    assert read == ["hash"]
+    assert build.algorithm == "sha256"
@@ -17,6 +17,28 @@ pytest_plugins = (
 )
 
 
+@pytest.fixture(autouse=True)
+def cache_root(tmp_path_factory, monkeypatch) -> Path:
+    """Point the conda-tasks cache at a per-test temporary directory.
+
+    Background prunes are disabled so tests never spawn processes.
+    """
+    root = tmp_path_factory.mktemp("cache-root")
+    monkeypatch.setattr("conda_tasks.cachedir.cache_root", lambda: root)
+    monkeypatch.setattr("conda_tasks.cachegc._spawn_prune", lambda: None)
+    return root
+
+
+@pytest.fixture
+def plugin_config(monkeypatch) -> dict[str, object]:
+    """The ``conda_tasks`` plugin setting, configured by the test."""
+    configured: dict[str, object] = {}
+    monkeypatch.setattr(
+        "conda_tasks.settings.plugin_sections", lambda: iter([configured])
+    )
+    return configured
+
+
 @pytest.fixture
 def tmp_project(tmp_path: Path) -> Path:
     """A temporary directory acting as a project root."""
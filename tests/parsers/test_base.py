@@ -0,0 +1,23 @@
+"""Tests for conda_tasks.parsers.base."""
+
+from __future__ import annotations
+
+import pytest
+
+from conda_tasks.parsers.base import read_toml
+
+
+def test_read_toml_returns_plain_data(sample_pixi_toml):
+    data = read_toml(sample_pixi_toml)
+    assert type(data) is dict
+    assert type(data["tasks"]["test"]) is dict
+    assert type(data["tasks"]["test"]["depends-on"]) is list
+    assert type(data["tasks"]["build"]) is str
+
+
+@pytest.mark.parametrize("content", [b"[tasks\n", b'x = "\xff"\n'])
+def test_read_toml_invalid(tmp_path, content):
+    path = tmp_path / "conda.toml"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        read_toml(path)
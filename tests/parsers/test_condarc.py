@@ -176,3 +176,22 @@ def test_add_task_simple_cmd_only(tmp_project):
     data = yaml_loads(path.read_text())
     section = data["plugins"]["conda_tasks"]["tasks"]
     assert section["simple"]["cmd"] == "echo hi"
+
+
+def test_parse_reuses_document_from_can_handle(sample_condarc, monkeypatch):
+    import conda.common.serialize.yaml
+
+    import conda_tasks.parsers.condarc as mod
+
+    monkeypatch.setattr(mod, "_raw_tasks_from_condarc", dict)
+    reads = []
+    monkeypatch.setattr(
+        conda.common.serialize.yaml,
+        "loads",
+        lambda text: reads.append(text) or yaml_loads(text),
+    )
+    parser = CondaRCParser()
+    assert parser.can_handle(sample_condarc)
+    assert parser.can_handle(sample_condarc)
+    assert parser.parse(sample_condarc)
+    assert len(reads) == 1
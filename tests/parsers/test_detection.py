@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import os
+
 import pytest
+from conda.base.constants import on_win
 
 from conda_tasks.exceptions import NoTaskFileError
 from conda_tasks.parsers import detect_and_parse, detect_task_file, get_parser
@@ -73,3 +76,46 @@ def test_detect_and_parse_with_file(sample_yaml):
 def test_detect_and_parse_no_file(tmp_path):
     with pytest.raises(NoTaskFileError):
         detect_and_parse(start_dir=tmp_path)
+
+
+def test_detect_lists_each_directory_once(tmp_project, sample_pixi_toml, monkeypatch):
+    import conda_tasks.parsers as parsers
+
+    start = tmp_project / "a" / "b" / "c"
+    start.mkdir(parents=True)
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(
+        parsers.os, "scandir", lambda path: scanned.append(path) or scandir(path)
+    )
+    assert detect_task_file(start) == sample_pixi_toml.resolve()
+    assert len(scanned) == 4
+
+
+@pytest.mark.skipif(on_win, reason="symlinks need privileges on Windows")
+def test_detect_symlinked_task_file(tmp_project, sample_conda_toml):
+    project = tmp_project / "project"
+    project.mkdir()
+    (project / "conda.toml").symlink_to(sample_conda_toml)
+    assert detect_task_file(project) == project / "conda.toml"
+
+
+def test_detect_and_parse_reads_pyproject_once(
+    tmp_project, sample_pyproject, monkeypatch
+):
+    import conda_tasks.parsers.pyproject_toml as mod
+    from conda_tasks.parsers import _cached_parse
+
+    reads = []
+    read_toml = mod.read_toml
+    monkeypatch.setattr(
+        mod, "read_toml", lambda path: reads.append(path) or read_toml(path)
+    )
+    _cached_parse.cache_clear()
+    try:
+        path, tasks = detect_and_parse(start_dir=tmp_project)
+    finally:
+        _cached_parse.cache_clear()
+    assert path.name == "pyproject.toml"
+    assert "build" in tasks
+    assert len(reads) == 1
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import pytest
 
+from conda_tasks.exceptions import TaskParseError
 from conda_tasks.parsers.normalize import (
     normalize_args,
     normalize_depends_on,
@@ -61,6 +62,7 @@ def test_normalize_override_with_fields():
         "inputs": ["*.c"],
         "outputs": ["*.o"],
         "clean-env": True,
+        "shell": "bash",
     }
     ov = normalize_override(raw)
     assert ov.cmd == "make"
@@ -69,6 +71,7 @@ def test_normalize_override_with_fields():
     assert ov.inputs == ["*.c"]
     assert ov.outputs == ["*.o"]
     assert ov.clean_env is True
+    assert ov.shell == "bash"
 
 
 def test_normalize_task_list_form():
@@ -98,6 +101,9 @@ def test_normalize_task_full_dict():
         "depends-on": ["build"],
         "env": {"X": "1"},
         "clean-env": True,
+        "shell": "/bin/sh",
+        "cpus": 4,
+        "memory": "2GiB",
         "default-environment": "test",
         "cwd": "/src",
         "description": "Run tests",
@@ -110,6 +116,9 @@ def test_normalize_task_full_dict():
     assert task.depends_on[0].task == "build"
     assert task.env == {"X": "1"}
     assert task.clean_env is True
+    assert task.shell == "/bin/sh"
+    assert task.cpus == 4
+    assert task.memory == 2 * 1024**3
     assert task.default_environment == "test"
     assert task.cwd == "/src"
     assert task.description == "Run tests"
@@ -117,3 +126,24 @@ def test_normalize_task_full_dict():
     assert task.outputs == ["results/"]
     assert task.args[0].name == "path"
     assert task.args[0].default == "tests/"
+
+
+def test_normalize_task_invalid_memory():
+    with pytest.raises(TaskParseError, match="tasks.build.*lots"):
+        normalize_task("build", {"cmd": "make", "memory": "lots"})
+
+
+@pytest.mark.parametrize("cpus", ["2", -1, 0, True, [2]])
+def test_normalize_task_invalid_cpus(cpus):
+    with pytest.raises(TaskParseError, match="'cpus' must be a positive number"):
+        normalize_task("build", {"cmd": "make", "cpus": cpus})
+
+
+def test_normalize_override_invalid_cpus():
+    raw = {"cmd": "make", "target": {"linux-64": {"cpus": "all"}}}
+    with pytest.raises(TaskParseError, match="tasks.build.target.linux-64"):
+        normalize_task("build", raw)
+
+
+def test_normalize_task_fractional_cpus():
+    assert normalize_task("build", {"cmd": "make", "cpus": 0.5}).cpus == 0.5
@@ -82,3 +82,27 @@ def test_parse_target_only_task(tmp_project):
 def test_write_raises(sample_pyproject, method, args):
     with pytest.raises(NotImplementedError):
         getattr(PyprojectTomlParser(), method)(*args(sample_pyproject))
+
+
+def test_parse_reuses_document_from_can_handle(sample_pyproject, monkeypatch):
+    import conda_tasks.parsers.pyproject_toml as mod
+
+    reads = []
+    read_toml = mod.read_toml
+    monkeypatch.setattr(
+        mod, "read_toml", lambda path: reads.append(path) or read_toml(path)
+    )
+    parser = PyprojectTomlParser()
+    assert parser.can_handle(sample_pyproject)
+    assert "build" in parser.parse(sample_pyproject)
+    assert len(reads) == 1
+    # The document is handed over once; parsing again reads the file.
+    parser.parse(sample_pyproject)
+    assert len(reads) == 2
+
+
+def test_parse_rereads_changed_file(sample_pyproject):
+    parser = PyprojectTomlParser()
+    assert parser.can_handle(sample_pyproject)
+    sample_pyproject.write_text('[tool.conda.tasks]\nfresh = "echo fresh"\n')
+    assert list(parser.parse(sample_pyproject)) == ["fresh"]
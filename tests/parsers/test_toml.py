@@ -173,6 +173,7 @@ def test_to_toml_inline_with_fields():
         description="Run tests",
         env={"PYTHONPATH": "src"},
         clean_env=True,
+        shell="/bin/sh",
         inputs=["src/**/*.py"],
         outputs=["results/"],
     )
@@ -183,6 +184,7 @@ def test_to_toml_inline_with_fields():
     assert list(d["depends-on"]) == ["build"]  # ty: ignore[invalid-argument-type]
     assert d["description"] == "Run tests"
     assert d["clean-env"] is True
+    assert d["shell"] == "/bin/sh"
 
 
 def test_to_toml_inline_with_args():
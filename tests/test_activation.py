@@ -0,0 +1,122 @@
+"""Tests for conda_tasks.activation."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from conda_tasks import activation
+from conda_tasks.activation import _apply, _diff, activated_env, activation_key
+
+
+@pytest.fixture(autouse=True)
+def memo(monkeypatch):
+    """Start every test without activations remembered in memory."""
+    monkeypatch.setattr(activation, "_memo", {})
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    prefix = tmp_path / "env"
+    (prefix / "conda-meta").mkdir(parents=True)
+    (prefix / "conda-meta" / "history").write_text("")
+    (prefix / "etc" / "conda" / "activate.d").mkdir(parents=True)
+    return prefix
+
+
+@pytest.fixture
+def probes(monkeypatch, prefix):
+    """Replace the activation probe with one that prepends the env's bin dir."""
+    calls = []
+
+    def probe(prefix, env):
+        calls.append(prefix)
+        bin_dir = str(prefix / "bin")
+        activated = {k: v for k, v in env.items() if k != "OLD"}
+        activated["PATH"] = os.pathsep.join([bin_dir, env["PATH"]])
+        activated["CONDA_PREFIX"] = str(prefix)
+        activated["SHLVL"] = "2"
+        return activated
+
+    monkeypatch.setattr(activation, "_probe", probe)
+    return calls
+
+
+def test_diff_and_apply_round_trip():
+    before = {"PATH": "/usr/bin", "OLD": "x", "KEEP": "y", "SHLVL": "1"}
+    after = {
+        "PATH": "/env/bin:/usr/bin:/env/tail",
+        "KEEP": "y",
+        "CONDA_PREFIX": "/env",
+        "SHLVL": "2",
+    }
+    changes = _diff(before, after)
+    assert "KEEP" not in changes
+    assert "SHLVL" not in changes
+    assert _apply(changes, before) == {**after, "SHLVL": "1"}
+
+
+def test_apply_to_a_different_path():
+    changes = _diff({"PATH": "/usr/bin"}, {"PATH": "/env/bin:/usr/bin"})
+    assert _apply(changes, {"PATH": "/opt/bin"}) == {"PATH": "/env/bin:/opt/bin"}
+
+
+def test_key_changes_with_history(prefix):
+    env = {"PATH": "/usr/bin"}
+    key = activation_key(prefix, env)
+    assert activation_key(prefix, env) == key
+
+    history = prefix / "conda-meta" / "history"
+    st = history.stat()
+    os.utime(history, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert activation_key(prefix, env) != key
+
+
+def test_key_changes_with_activate_scripts(prefix):
+    env = {"PATH": "/usr/bin"}
+    key = activation_key(prefix, env)
+    script = prefix / "etc" / "conda" / "activate.d" / "tool.sh"
+    script.write_text("export TOOL=1\n")
+    changed = activation_key(prefix, env)
+    assert changed != key
+    script.write_text("export TOOL=2\n")
+    assert activation_key(prefix, env) != changed
+
+
+def test_key_depends_on_path_and_conda_vars_only(prefix):
+    key = activation_key(prefix, {"PATH": "/usr/bin"})
+    assert activation_key(prefix, {"PATH": "/usr/bin", "FOO": "1"}) == key
+    assert activation_key(prefix, {"PATH": "/bin"}) != key
+    assert activation_key(prefix, {"PATH": "/usr/bin", "CONDA_SHLVL": "1"}) != key
+
+
+def test_activated_env_is_cached_on_disk(prefix, probes, monkeypatch, cache_root):
+    env = {"PATH": "/usr/bin", "OLD": "x", "FOO": "1"}
+    activated = activated_env(prefix, env)
+    assert activated == {
+        "PATH": os.pathsep.join([str(prefix / "bin"), "/usr/bin"]),
+        "CONDA_PREFIX": str(prefix),
+        "FOO": "1",
+    }
+    assert len(list((cache_root / activation.ACTIVATION_DIR).iterdir())) == 1
+
+    monkeypatch.setattr(activation, "_memo", {})
+    assert activated_env(prefix, {**env, "FOO": "2"}) == {**activated, "FOO": "2"}
+    assert probes == [prefix]
+
+
+def test_activated_env_probes_again_when_env_changes(prefix, probes):
+    activated_env(prefix, {"PATH": "/usr/bin"})
+    activated_env(prefix, {"PATH": "/usr/bin"})
+    assert len(probes) == 1
+    (prefix / "conda-meta" / "history").write_text("# update\n")
+    os.utime(prefix / "conda-meta" / "history", ns=(0, 10**9))
+    activated_env(prefix, {"PATH": "/usr/bin"})
+    assert len(probes) == 2
+
+
+def test_activated_env_returns_none_when_probe_fails(prefix, monkeypatch, cache_root):
+    monkeypatch.setattr(activation, "_probe", lambda prefix, env: None)
+    assert activated_env(prefix, {"PATH": "/usr/bin"}) is None
+    assert not (cache_root / activation.ACTIVATION_DIR).exists()
@@ -0,0 +1,95 @@
+"""Tests for conda_tasks.artifacts."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from conda_tasks.artifacts import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "store")
+
+
+def _write(path, content: bytes) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_store_and_restore(store, tmp_path):
+    work = tmp_path / "work"
+    out = _write(work / "build" / "lib.so", b"binary")
+    os.chmod(out, 0o755)
+    store.store("key1", {out: "d1" * 32}, work)
+
+    os.remove(out)
+    assert store.restore("key1", work)
+    assert (work / "build" / "lib.so").read_bytes() == b"binary"
+    assert os.stat(out).st_mode & 0o777 == 0o755
+
+
+def test_restore_unknown_key(store, tmp_path):
+    assert not store.restore("missing", tmp_path)
+
+
+def test_store_dedupes_blobs(store, tmp_path):
+    a = _write(tmp_path / "a.txt", b"same")
+    b = _write(tmp_path / "b.txt", b"same")
+    store.store("k1", {a: "ab" * 32}, tmp_path)
+    store.store("k2", {b: "ab" * 32}, tmp_path)
+    assert store.size() == 4
+
+
+def test_store_skips_outputs_outside_cwd(store, tmp_path):
+    out = _write(tmp_path / "outside.txt", b"x")
+    store.store("k", {out: "cd" * 32}, tmp_path / "work")
+    assert store.size() == 0
+    assert not store.restore("k", tmp_path / "work")
+
+
+def test_prune_evicts_least_recently_used(store, tmp_path):
+    old = _write(tmp_path / "old.bin", b"o" * 100)
+    new = _write(tmp_path / "new.bin", b"n" * 100)
+    store.store("old", {old: "01" * 32}, tmp_path)
+    past = time.time() - 3600
+    os.utime(store._blob_path("01" * 32), (past, past))
+    store.store("new", {new: "02" * 32}, tmp_path)
+
+    freed = store.prune(max_bytes=150)
+
+    assert freed == 100
+    assert not store.restore("old", tmp_path)
+    assert store.restore("new", tmp_path)
+
+
+def test_store_leaves_size_cap_to_prune(tmp_path):
+    store = ArtifactStore(tmp_path / "store", max_bytes=10)
+    out = _write(tmp_path / "big.bin", b"x" * 100)
+    assert store.store("k", {out: "ef" * 32}, tmp_path) == 100
+    assert store.size() == 100
+    assert store.prune() == 100
+    assert not store.restore("k", tmp_path)
+
+
+def test_store_keeps_outputs_named_like_pardir(store, tmp_path):
+    out = _write(tmp_path / "..foo" / "bar", b"x")
+    store.store("k", {out: "aa" * 32}, tmp_path)
+    os.remove(out)
+    assert store.restore("k", tmp_path)
+    assert (tmp_path / "..foo" / "bar").read_bytes() == b"x"
+
+
+def test_restore_reports_copy_errors(store, tmp_path, monkeypatch):
+    out = _write(tmp_path / "out.txt", b"x")
+    store.store("k", {out: "bb" * 32}, tmp_path)
+
+    def fail(src, dest):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(store, "_write_atomic", fail)
+    assert not store.restore("k", tmp_path)
@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import os
+import shutil
+
 import pytest
 
+import conda_tasks.cache as cache_mod
+import conda_tasks.hashing as hashing_mod
 from conda_tasks.cache import (
+    CacheNode,
     _expand_globs,
-    _file_sha256,
     _file_stat,
     _fingerprint_files,
+    check_cache,
+    check_closure,
     is_cached,
+    record_hit,
+    restore_outputs,
     save_cache,
 )
 
@@ -28,20 +37,6 @@ def test_file_stat_missing():
     assert _file_stat("/nonexistent/file") is None
 
 
-def test_file_sha256(tmp_path):
-    f = tmp_path / "file.txt"
-    f.write_text("hello")
-    h = _file_sha256(str(f))
-    assert isinstance(h, str)
-    assert len(h) == 64
-
-
-def test_file_sha256_deterministic(tmp_path):
-    f = tmp_path / "file.txt"
-    f.write_text("hello")
-    assert _file_sha256(str(f)) == _file_sha256(str(f))
-
-
 @pytest.mark.parametrize(
     ("pattern", "setup", "expected_count"),
     [
@@ -70,7 +65,7 @@ def test_expand_globs(tmp_path, pattern, setup, expected_count):
 @pytest.mark.parametrize(
     ("paths", "expected_keys"),
     [
-        (["file.txt"], {"mtime", "size", "sha256"}),
+        (["file.txt"], {"mtime", "size", "digest"}),
     ],
 )
 def test_fingerprint_files(tmp_path, paths, expected_keys):
@@ -182,3 +177,284 @@ def test_cache_invalidation(
         outputs,
         tmp_path,
     )
+
+
+def _save_two_inputs(tmp_path):
+    (tmp_path / "a.py").write_text("a")
+    (tmp_path / "b.py").write_text("b")
+    save_cache(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+
+
+def test_cache_sees_changes_under_node_modules(tmp_path):
+    dep = tmp_path / "node_modules" / "lib" / "index.js"
+    dep.parent.mkdir(parents=True)
+    dep.write_text("v1")
+    (tmp_path / "app.js").write_text("app")
+    args = (tmp_path, "bundle", "esbuild", {}, ["**/*.js"], [], tmp_path)
+    save_cache(*args)
+    assert is_cached(*args)
+
+    dep.write_text("v2, and longer")
+    assert not is_cached(*args)
+
+
+def test_cache_hit_does_not_hash(tmp_path, monkeypatch):
+    """Unchanged ``(mtime, size)`` tuples are accepted without reading files."""
+    _save_two_inputs(tmp_path)
+
+    def fail(path, algorithm=None, buf=None):
+        raise AssertionError(f"unexpected hash of {path}")
+
+    monkeypatch.setattr(hashing_mod, "file_digest", fail)
+    assert is_cached(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+
+
+def test_cache_hashes_only_touched_files(tmp_path, monkeypatch):
+    """A touched-but-unchanged file is hashed; untouched files are not."""
+    _save_two_inputs(tmp_path)
+    touched = tmp_path / "a.py"
+    st = touched.stat()
+    os.utime(touched, (st.st_atime + 10, st.st_mtime + 10))
+
+    hashed: list[str] = []
+    real_digest = hashing_mod.file_digest
+
+    def tracking(path, algorithm, buf=None):
+        hashed.append(path)
+        return real_digest(path, algorithm, buf)
+
+    monkeypatch.setattr(hashing_mod, "file_digest", tracking)
+    assert is_cached(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+    assert hashed == [str(touched)]
+
+
+def test_cache_size_change_skips_hash(tmp_path, monkeypatch):
+    """A size change is a miss without hashing the file."""
+    _save_two_inputs(tmp_path)
+    (tmp_path / "a.py").write_text("longer content")
+
+    def fail(path, algorithm=None, buf=None):
+        raise AssertionError(f"unexpected hash of {path}")
+
+    monkeypatch.setattr(hashing_mod, "file_digest", fail)
+    assert not is_cached(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+
+
+def test_cache_algorithm_change_is_miss(tmp_path):
+    """Entries fingerprinted with another algorithm are not reused."""
+    (tmp_path / "a.py").write_text("a")
+    save_cache(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+    assert is_cached(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+    assert not is_cached(
+        tmp_path, "build", "make", {}, ["*.py"], [], tmp_path, algorithm="sha256"
+    )
+
+
+def test_directory_outputs_are_not_hashed(tmp_path):
+    """Glob matches that are directories are skipped rather than opened."""
+    (tmp_path / "dist").mkdir()
+    save_cache(tmp_path, "build", "make", {}, [], ["dist/"], tmp_path)
+    assert is_cached(tmp_path, "build", "make", {}, [], ["dist/"], tmp_path)
+
+
+def test_check_cache_snapshot_on_miss(tmp_path):
+    """A miss still snapshots every matched input, without hashing."""
+    (tmp_path / "a.py").write_text("a")
+    snapshot = check_cache(tmp_path, "build", "make", {}, ["*.py"], [], tmp_path)
+    assert not snapshot.hit
+    entry = snapshot.inputs[str(tmp_path / "a.py")]
+    assert entry["size"] == 1
+    assert entry["digest"] is None
+
+
+def test_save_cache_reuses_snapshot(tmp_path, monkeypatch):
+    """Inputs with a known digest are not re-hashed or re-globbed on save."""
+    _save_two_inputs(tmp_path)
+    snapshot = check_cache(tmp_path, "build", "make all", {}, ["*.py"], [], tmp_path)
+    assert not snapshot.hit
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected hash or glob")
+
+    with monkeypatch.context() as m:
+        m.setattr(hashing_mod, "file_digest", fail)
+        m.setattr(cache_mod, "_expand_globs", lambda *args, **kwargs: [])
+        save_cache(
+            tmp_path, "build", "make all", {}, ["*.py"], [], tmp_path, snapshot=snapshot
+        )
+    assert is_cached(tmp_path, "build", "make all", {}, ["*.py"], [], tmp_path)
+
+
+def test_save_cache_input_changed_during_run(tmp_path):
+    """An input modified while the task ran invalidates the saved entry."""
+    src = tmp_path / "main.py"
+    src.write_text("v1")
+    snapshot = check_cache(tmp_path, "build", "make", {}, ["main.py"], [], tmp_path)
+    src.write_text("v2 changed")
+    save_cache(
+        tmp_path, "build", "make", {}, ["main.py"], [], tmp_path, snapshot=snapshot
+    )
+    assert not is_cached(tmp_path, "build", "make", {}, ["main.py"], [], tmp_path)
+
+
+def _build(tmp_path, cmd="make"):
+    """Save a cache entry for a task with one input and a ``dist/`` output."""
+    snapshot = check_cache(tmp_path, "build", cmd, {}, ["main.py"], ["dist/"], tmp_path)
+    save_cache(
+        tmp_path, "build", cmd, {}, ["main.py"], ["dist/"], tmp_path, snapshot=snapshot
+    )
+
+
+def test_expand_globs_directory(tmp_path):
+    (tmp_path / "dist" / "sub").mkdir(parents=True)
+    (tmp_path / "dist" / "a.whl").write_text("a")
+    (tmp_path / "dist" / "sub" / "b.txt").write_text("b")
+    result = _expand_globs(["dist/"], tmp_path)
+    assert result == [
+        str(tmp_path / "dist" / "a.whl"),
+        str(tmp_path / "dist" / "sub" / "b.txt"),
+    ]
+
+
+def test_restore_outputs_after_clean(tmp_path):
+    """Deleted outputs are restored from the artifact store."""
+    (tmp_path / "main.py").write_text("print('hi')")
+    (tmp_path / "dist" / "sub").mkdir(parents=True)
+    (tmp_path / "dist" / "app.whl").write_bytes(b"wheel")
+    (tmp_path / "dist" / "sub" / "data.bin").write_bytes(b"\x00\x01")
+    _build(tmp_path)
+
+    shutil.rmtree(tmp_path / "dist")
+    snapshot = check_cache(
+        tmp_path, "build", "make", {}, ["main.py"], ["dist/"], tmp_path
+    )
+    assert not snapshot.hit
+    assert restore_outputs(snapshot, tmp_path)
+    assert (tmp_path / "dist" / "app.whl").read_bytes() == b"wheel"
+    assert (tmp_path / "dist" / "sub" / "data.bin").read_bytes() == b"\x00\x01"
+
+
+def test_save_cache_does_not_measure_store(tmp_path, monkeypatch):
+    """Saving records what it added instead of walking the artifact store."""
+    (tmp_path / "main.py").write_text("print('hi')")
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "dist" / "app.whl").write_bytes(b"wheel")
+    recorded = []
+    monkeypatch.setattr(cache_mod, "record_usage", recorded.append)
+
+    def fail(self):
+        raise AssertionError("the artifact store was measured")
+
+    monkeypatch.setattr(cache_mod.ArtifactStore, "size", fail)
+    _build(tmp_path)
+    assert recorded == [len(b"wheel")]
+
+
+@pytest.mark.parametrize(
+    ("mutate", "cmd"),
+    [("input", "make"), (None, "make all")],
+    ids=["input-change", "cmd-change"],
+)
+def test_restore_outputs_requires_same_key(tmp_path, mutate, cmd):
+    (tmp_path / "main.py").write_text("v1")
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "dist" / "app.whl").write_text("wheel")
+    _build(tmp_path)
+
+    shutil.rmtree(tmp_path / "dist")
+    if mutate == "input":
+        (tmp_path / "main.py").write_text("v2")
+    snapshot = check_cache(tmp_path, "build", cmd, {}, ["main.py"], ["dist/"], tmp_path)
+    assert not restore_outputs(snapshot, tmp_path)
+    assert not (tmp_path / "dist").exists()
+
+
+def _build_chain(tmp_path):
+    """Save ``gen`` (src/*.txt -> gen/) and ``build`` (gen/ -> out.bin)."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    (tmp_path / "gen").mkdir()
+    (tmp_path / "gen" / "a.c").write_text("c")
+    (tmp_path / "out.bin").write_bytes(b"out")
+    gen = CacheNode("gen", "gen", {}, ["src/*.txt"], ["gen/"], tmp_path)
+    build = CacheNode("build", "cc", {}, ["gen/"], ["out.bin"], tmp_path, deps=["gen"])
+    keys = {}
+    for node in (gen, build):
+        snapshot = check_cache(
+            tmp_path, node.name, node.cmd, {}, node.inputs, node.outputs, tmp_path
+        )
+        keys[node.name] = save_cache(
+            tmp_path,
+            node.name,
+            node.cmd,
+            {},
+            node.inputs,
+            node.outputs,
+            tmp_path,
+            snapshot=snapshot,
+            deps=[keys[d] for d in node.deps],
+        )
+    return [gen, build]
+
+
+def test_check_closure_hit_without_globbing(tmp_path, monkeypatch):
+    nodes = _build_chain(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected glob or hash")
+
+    monkeypatch.setattr(cache_mod, "_expand_globs", fail)
+    monkeypatch.setattr(hashing_mod, "file_digest", fail)
+    assert check_closure(tmp_path, nodes)
+
+
+@pytest.mark.parametrize(
+    "change",
+    ["dep-input", "new-input", "removed-output", "cmd", "patterns", "graph"],
+)
+def test_check_closure_miss(tmp_path, change):
+    gen, build = _build_chain(tmp_path)
+    if change == "dep-input":
+        (tmp_path / "src" / "a.txt").write_text("changed")
+    elif change == "new-input":
+        (tmp_path / "src" / "b.txt").write_text("b")
+    elif change == "removed-output":
+        (tmp_path / "out.bin").unlink()
+    elif change == "cmd":
+        gen.cmd = "gen --fast"
+    elif change == "patterns":
+        gen.inputs = ["src/*.md"]
+    elif change == "graph":
+        build.deps = []
+    assert not check_closure(tmp_path, [gen, build])
+
+
+def test_check_closure_dep_rebuilt(tmp_path):
+    """A dependency saved again since its dependent ran breaks the chain."""
+    gen, build = _build_chain(tmp_path)
+    (tmp_path / "gen" / "a.c").write_text("other")
+    snapshot = check_cache(
+        tmp_path, "gen", "gen", {}, gen.inputs, gen.outputs, tmp_path
+    )
+    save_cache(
+        tmp_path, "gen", "gen", {}, gen.inputs, gen.outputs, tmp_path, snapshot=snapshot
+    )
+    assert not check_closure(tmp_path, [gen, build])
+
+
+def test_record_hit_repairs_closure(tmp_path):
+    """After a miss, per-task hits bring the stored keys up to date."""
+    gen, build = _build_chain(tmp_path)
+    (tmp_path / "src" / "notes.md").write_text("not an input")
+    assert not check_closure(tmp_path, [gen, build])
+
+    keys = {}
+    for node in (gen, build):
+        snapshot = check_cache(
+            tmp_path, node.name, node.cmd, {}, node.inputs, node.outputs, tmp_path
+        )
+        assert snapshot.hit
+        keys[node.name] = record_hit(
+            tmp_path, node.name, snapshot, [keys[d] for d in node.deps]
+        )
+    assert check_closure(tmp_path, [gen, build])
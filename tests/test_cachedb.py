@@ -0,0 +1,137 @@
+"""Tests for conda_tasks.cachedb."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from conda_tasks.cachedb import DURATION_WEIGHT, SCHEMA_VERSION, CacheDB
+
+
+def _entry(inputs=None, outputs=None, cmd_hash="c", env_hash="e", dirs=None):
+    return {
+        "cmd_hash": cmd_hash,
+        "env_hash": env_hash,
+        "algorithm": "blake2b",
+        "combined_key": None,
+        "inputs": inputs or {},
+        "outputs": outputs or {},
+        "dirs": dirs or {},
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = CacheDB(tmp_path / "cache.db")
+    yield db
+    db.close()
+
+
+def test_load_missing(db):
+    assert db.load("build") is None
+
+
+def test_save_and_load(db):
+    entry = _entry(
+        inputs={"/src/a.py": {"mtime": 1.5, "size": 3, "digest": "aa"}},
+        outputs={"/dist/a.whl": {"mtime": 2.0, "size": 9, "digest": "bb"}},
+    )
+    db.save("build", entry)
+    assert db.load("build") == entry
+
+
+def test_save_replaces_entry(db):
+    db.save("build", _entry(inputs={"/a": {"mtime": 1, "size": 1, "digest": "x"}}))
+    db.save(
+        "build",
+        _entry(inputs={"/b": {"mtime": 2, "size": 2, "digest": "y"}}, cmd_hash="new"),
+    )
+    loaded = db.load("build")
+    assert loaded is not None
+    assert loaded["cmd_hash"] == "new"
+    assert list(loaded["inputs"]) == ["/b"]
+
+
+def test_shared_paths_between_tasks(db):
+    shared = {"/pyproject.toml": {"mtime": 1, "size": 1, "digest": "x"}}
+    db.save("build", _entry(inputs=shared))
+    db.save("test", _entry(inputs=shared))
+    (count,) = db.conn.execute("SELECT COUNT(*) FROM paths").fetchone()
+    assert count == 1
+    assert db.load("test") == _entry(inputs=shared)
+
+
+def test_load_many(db):
+    db.save("build", _entry(dirs={"/src": 1.0}))
+    db.save("test", _entry(cmd_hash="t"))
+    entries = db.load_many(["build", "test", "missing"])
+    assert sorted(entries) == ["build", "test"]
+    assert entries["build"]["dirs"] == {"/src": 1.0}
+    assert entries["test"]["cmd_hash"] == "t"
+
+
+def test_refresh(db):
+    inputs = {"/src/a.py": {"mtime": 1.0, "size": 1, "digest": "aa"}}
+    db.save("build", _entry(inputs=inputs, dirs={"/src": 1.0}))
+    db.refresh("build", "key", {"/src": 2.0})
+    db.refresh("missing", "key", {})
+    assert db.load("build") == dict(
+        _entry(inputs=inputs, dirs={"/src": 2.0}), combined_key="key"
+    )
+    assert db.load("missing") is None
+
+
+def test_wal_mode(db):
+    (mode,) = db.conn.execute("PRAGMA journal_mode").fetchone()
+    assert mode == "wal"
+
+
+def test_imports_legacy_json_entries(tmp_path):
+    legacy = {
+        "cmd_hash": "c",
+        "env_hash": "e",
+        "inputs": {"/a.py": {"mtime": 1.0, "size": 1, "sha256": "aa"}},
+        "outputs": {},
+    }
+    (tmp_path / "build.json").write_text(json.dumps(legacy, indent=2))
+    (tmp_path / "broken.json").write_text("{not json")
+
+    db = CacheDB(tmp_path / "cache.db")
+    try:
+        loaded = db.load("build")
+        assert loaded is not None
+        assert loaded["algorithm"] == "sha256"
+        assert loaded["inputs"] == {"/a.py": {"mtime": 1.0, "size": 1, "digest": "aa"}}
+        assert db.load("broken") is None
+    finally:
+        db.close()
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_schema_mismatch_resets_database(tmp_path):
+    path = tmp_path / "cache.db"
+    db = CacheDB(path)
+    db.save("build", _entry())
+    db.conn.execute("UPDATE meta SET value = '0' WHERE key = 'schema_version'")
+    db.close()
+
+    db = CacheDB(path)
+    try:
+        assert db.load("build") is None
+        (version,) = db.conn.execute(
+            "SELECT value FROM meta WHERE key = 'schema_version'"
+        ).fetchone()
+        assert int(version) == SCHEMA_VERSION
+    finally:
+        db.close()
+
+
+def test_durations(db):
+    assert db.load_durations() == {}
+    db.record_durations({"build": 10.0, "test": 2.0})
+    db.record_durations({"build": 20.0})
+    assert db.load_durations() == {
+        "build": pytest.approx(10.0 + DURATION_WEIGHT * 10.0),
+        "test": 2.0,
+    }
@@ -0,0 +1,176 @@
+"""Tests for conda_tasks.cachegc."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+import conda_tasks.cachegc as gc_mod
+from conda_tasks.cache import check_cache, save_cache
+from conda_tasks.cachegc import (
+    PRUNE_STAMP,
+    cache_stats,
+    clear_cache,
+    project_caches,
+    prune_cache,
+    record_usage,
+    schedule_prune,
+)
+
+
+def _make_project(tmp_path, name, content=b"x" * 100):
+    """Run a cached task in a new project and return its root."""
+    project = tmp_path / name
+    project.mkdir()
+    (project / "out.bin").write_bytes(content)
+    snapshot = check_cache(project, "build", "make", {}, [], ["out.bin"], project)
+    save_cache(
+        project, "build", "make", {}, [], ["out.bin"], project, snapshot=snapshot
+    )
+    return project
+
+
+def _age(path, seconds):
+    st = path.stat()
+    os.utime(path, (st.st_atime - seconds, st.st_mtime - seconds))
+
+
+def test_project_records_root(tmp_path, cache_root):
+    project = _make_project(tmp_path, "proj")
+    (entry,) = project_caches(cache_root)
+    assert entry.root == str(project.resolve())
+    assert entry.size > 0
+    assert not entry.stale
+
+
+def test_stats(tmp_path, cache_root):
+    _make_project(tmp_path, "a")
+    _make_project(tmp_path, "b", b"y" * 50)
+    stats = cache_stats(cache_root)
+    assert len(stats.projects) == 2
+    assert stats.artifact_files == 2
+    assert stats.artifact_bytes == 150
+    assert stats.total_bytes == stats.project_bytes + 150
+    assert stats.to_dict()["artifacts"] == {"files": 2, "bytes": 150}
+
+
+def test_prune_removes_missing_projects(tmp_path, cache_root):
+    gone = _make_project(tmp_path, "gone")
+    _make_project(tmp_path, "kept")
+    (gone / "out.bin").unlink()
+    gone.rmdir()
+
+    result = prune_cache(cache_root)
+
+    assert result.projects == 1
+    assert [p.root for p in project_caches(cache_root)] == [
+        str((tmp_path / "kept").resolve())
+    ]
+    assert (cache_root / PRUNE_STAMP).exists()
+
+
+def test_prune_unknown_root_after_grace(cache_root):
+    orphan = cache_root / ("0" * 16)
+    orphan.mkdir()
+    assert prune_cache(cache_root).projects == 0
+    _age(orphan, gc_mod._UNKNOWN_ROOT_GRACE + 60)
+    assert prune_cache(cache_root).projects == 1
+    assert not orphan.exists()
+
+
+def test_prune_evicts_least_recently_used(tmp_path, cache_root):
+    _make_project(tmp_path, "old", b"o" * 1000)
+    _make_project(tmp_path, "new", b"n" * 1000)
+    old_blobs = [
+        blob
+        for _, _, blob in gc_mod.ArtifactStore(cache_root / "artifacts").entries()
+        if blob.read_bytes().startswith(b"o")
+    ]
+    for entry in project_caches(cache_root):
+        if entry.root.endswith("old"):
+            _age(entry.path, 3600)
+    for blob in old_blobs:
+        _age(blob, 3600)
+
+    stats = cache_stats(cache_root)
+    result = prune_cache(cache_root, max_bytes=stats.total_bytes - 1)
+
+    assert result.bytes >= 1
+    remaining = cache_stats(cache_root)
+    assert remaining.total_bytes < stats.total_bytes
+    assert any(p.root.endswith("new") for p in remaining.projects)
+
+
+def test_prune_dry_run(tmp_path, cache_root):
+    _make_project(tmp_path, "a")
+    before = cache_stats(cache_root).total_bytes
+    result = prune_cache(cache_root, max_bytes=0, dry_run=True)
+    assert result.bytes == before
+    assert cache_stats(cache_root).total_bytes == before
+
+
+def test_clear(tmp_path, cache_root):
+    _make_project(tmp_path, "a")
+    assert clear_cache(cache_root) > 0
+    assert not cache_root.exists()
+
+
+def test_schedule_prune_respects_interval(cache_root, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(gc_mod, "_spawn_prune", lambda: spawned.append(True))
+
+    assert schedule_prune(cache_root)
+    assert not schedule_prune(cache_root)
+    assert len(spawned) == 1
+
+    _age(cache_root / PRUNE_STAMP, gc_mod.PRUNE_INTERVAL + 60)
+    assert schedule_prune(cache_root)
+    assert len(spawned) == 2
+
+
+def test_schedule_prune_once_over_the_cap(tmp_path, cache_root, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(gc_mod, "_spawn_prune", lambda: spawned.append(True))
+    monkeypatch.setattr(gc_mod, "max_cache_bytes", lambda: 1000)
+    _make_project(tmp_path, "a")
+    prune_cache(cache_root)
+    _age(cache_root / PRUNE_STAMP, gc_mod.PRUNE_INTERVAL + 60)
+    size = gc_mod.estimated_usage(cache_root)
+    assert size == cache_stats(cache_root).total_bytes
+
+    record_usage(1000 - size, cache_root)
+    assert not schedule_prune(cache_root)
+    record_usage(1, cache_root)
+    assert gc_mod.estimated_usage(cache_root) == 1001
+    assert schedule_prune(cache_root)
+    assert spawned == [True]
+
+
+def test_prune_resets_usage(cache_root):
+    assert gc_mod.estimated_usage(cache_root) is None
+    prune_cache(cache_root)
+    record_usage(10, cache_root)
+    assert gc_mod.estimated_usage(cache_root) == 10
+    prune_cache(cache_root)
+    assert gc_mod.estimated_usage(cache_root) == 0
+
+
+def test_saved_artifacts_are_recorded(tmp_path, cache_root):
+    prune_cache(cache_root)
+    _make_project(tmp_path, "a", content=b"x" * 100)
+    assert gc_mod.estimated_usage(cache_root) == 100
+
+
+@pytest.mark.parametrize("configured", [False, "false"])
+def test_schedule_prune_disabled(cache_root, plugin_config, configured):
+    plugin_config["cache_auto_prune"] = configured
+    assert not schedule_prune(cache_root)
+    assert not (cache_root / PRUNE_STAMP).exists()
+
+
+def test_stamp_is_recent_after_prune(cache_root):
+    prune_cache(cache_root)
+    stamp = cache_root / PRUNE_STAMP
+    assert time.time() - stamp.stat().st_mtime < gc_mod.PRUNE_INTERVAL
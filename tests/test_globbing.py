@@ -0,0 +1,175 @@
+"""Tests for conda_tasks.globbing."""
+
+from __future__ import annotations
+
+import glob
+import os
+
+import pytest
+
+from conda_tasks.globbing import FileTree, skipped_dirs
+
+
+@pytest.fixture
+def sample(tmp_path):
+    """A small project tree with hidden, nested and dependency directories."""
+    for rel in (
+        "a.py",
+        "b.txt",
+        ".hidden.py",
+        "src/c.py",
+        "src/pkg/d.py",
+        "src/pkg/e.txt",
+        "src/.cache/f.py",
+        "docs/index.md",
+        "node_modules/lib/g.js",
+        "src/__pycache__/c.pyc",
+    ):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return tmp_path
+
+
+def _glob(pattern, cwd):
+    """The reference: ``glob`` plus directory expansion."""
+    result = set()
+    for match in glob.glob(str(cwd / pattern), recursive=True):
+        if os.path.isdir(match):
+            for dirpath, _dirnames, filenames in os.walk(match):
+                result.update(os.path.join(dirpath, f) for f in filenames)
+        else:
+            result.add(os.path.normpath(match))
+    return sorted(result)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "*.py",
+        "a.py",
+        "missing.py",
+        "src/*.py",
+        "src/**/*.py",
+        "src/**",
+        "src/pkg",
+        "src/pkg/",
+        "src/.cache/*",
+        ".*.py",
+        "s?c/*/[de].*",
+        "docs/../a.py",
+    ],
+)
+def test_expand_matches_glob(sample, pattern):
+    assert FileTree().expand([pattern], sample) == _glob(pattern, sample)
+
+
+def test_recursive_sees_dependency_dirs(sample):
+    """Nothing is skipped by default, so changes there are noticed."""
+    tree = FileTree()
+    dirs = {}
+    files = tree.expand(["**/*.js"], sample, dirs)
+    assert files == [str(sample / "node_modules" / "lib" / "g.js")]
+    assert str(sample / "node_modules" / "lib") in dirs
+
+
+@pytest.mark.parametrize("name", ["__pycache__", "node_modules"])
+def test_recursive_skips_configured_dirs(sample, name):
+    files = FileTree(skip_dirs=["__pycache__", "node_modules"]).expand(["**/*"], sample)
+    assert not any(f"{os.sep}{name}{os.sep}" in f for f in files)
+    assert str(sample / "src" / "pkg" / "d.py") in files
+
+
+def test_skipped_dir_named_explicitly(sample):
+    tree = FileTree(skip_dirs=["node_modules"])
+    files = tree.expand(["node_modules/**/*.js"], sample)
+    assert files == [str(sample / "node_modules" / "lib" / "g.js")]
+
+
+@pytest.mark.parametrize(
+    ("configured", "expected"),
+    [
+        (None, frozenset()),
+        ("node_modules", frozenset()),
+        (["node_modules", 3], frozenset()),
+        (["node_modules", "__pycache__"], frozenset({"node_modules", "__pycache__"})),
+    ],
+)
+def test_skipped_dirs_setting(plugin_config, configured, expected):
+    plugin_config["glob_skip_dirs"] = configured
+    assert skipped_dirs() == expected
+    assert FileTree().skip_dirs == expected
+
+
+def test_recursive_skips_symlinked_dirs(sample):
+    (sample / "link").symlink_to(sample / "src", target_is_directory=True)
+    files = FileTree().expand(["**/*.py"], sample)
+    assert not any(f"{os.sep}link{os.sep}" in f for f in files)
+
+
+def test_patterns_share_one_walk(sample, monkeypatch):
+    """Every directory is listed at most once, however many patterns."""
+    listed = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        listed.append(os.fspath(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    tree = FileTree(
+        [
+            (["*.py", "src/**/*.py"], sample),
+            (["src/pkg/*.txt", "docs/*"], sample),
+            (["*.py"], sample / "src"),
+        ]
+    )
+    assert tree.expand(["src/pkg/*.txt"], sample) == [
+        str(sample / "src" / "pkg" / "e.txt")
+    ]
+    assert tree.expand(["*.py"], sample / "src") == [str(sample / "src" / "c.py")]
+    assert len(listed) == len(set(listed))
+    assert str(sample / "node_modules") not in listed
+
+
+def test_literal_patterns_do_not_list(sample, monkeypatch):
+    monkeypatch.setattr(os, "scandir", None)
+    assert FileTree().expand(["src/c.py", "nope.py"], sample) == [
+        str(sample / "src" / "c.py")
+    ]
+
+
+def test_stat_reuses_walk(sample):
+    tree = FileTree()
+    (path,) = tree.expand(["a.py"], sample)
+    st = tree.stat(path)
+    assert st is not None
+    assert st.st_size == os.stat(path).st_size
+    assert tree.stat(str(sample / "b.txt")) is None
+
+
+def test_invalidate(sample):
+    tree = FileTree()
+    assert tree.expand(["*.txt"], sample) == [str(sample / "b.txt")]
+    (sample / "new.txt").write_text("new")
+    assert tree.expand(["*.txt"], sample) == [str(sample / "b.txt")]
+    tree.invalidate()
+    assert tree.expand(["*.txt"], sample) == [
+        str(sample / "b.txt"),
+        str(sample / "new.txt"),
+    ]
+    assert tree.stat(str(sample / "b.txt")) is not None
+
+
+def test_watched_dirs(sample):
+    dirs = {}
+    FileTree().expand(["src/*.py", "missing/file.txt"], sample, dirs)
+    assert dirs[str(sample / "src")] == os.stat(sample / "src").st_mtime
+    assert dirs[str(sample / "missing" / "file.txt")] == -1.0
+    assert str(sample / "src" / "pkg") not in dirs
+
+
+def test_watched_dirs_cover_expanded_directory(sample):
+    dirs = {}
+    FileTree().expand(["src/pkg"], sample, dirs)
+    assert str(sample / "src" / "pkg") in dirs
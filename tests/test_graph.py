@@ -64,6 +64,31 @@ def test_skip_deps(task_with_deps):
     assert order == ["test"]
 
 
+def test_multiple_targets_share_dependencies(task_with_deps):
+    tasks = {
+        **task_with_deps,
+        "lint": Task(name="lint", cmd="ruff", depends_on=[TaskDependency("build")]),
+        "unrelated": Task(name="unrelated", cmd="echo hi"),
+    }
+    order = resolve_execution_order(["test", "lint"], tasks)
+    assert sorted(order) == ["build", "configure", "lint", "test"]
+    assert order.index("configure") < order.index("build") < order.index("lint")
+    assert order.index("build") < order.index("test")
+
+
+def test_multiple_targets_skip_deps(task_with_deps):
+    order = resolve_execution_order(
+        ["test", "configure"], task_with_deps, skip_deps=True
+    )
+    assert order == ["configure", "test"]
+
+
+def test_multiple_targets_missing():
+    tasks = {"build": Task(name="build", cmd="make")}
+    with pytest.raises(TaskNotFoundError):
+        resolve_execution_order(["build", "missing"], tasks)
+
+
 @pytest.mark.parametrize(
     ("target", "tasks"),
     [
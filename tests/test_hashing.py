@@ -0,0 +1,150 @@
+"""Tests for conda_tasks.hashing."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+
+import pytest
+
+import conda_tasks.hashing as hashing_mod
+from conda_tasks.exceptions import CondaTasksError
+from conda_tasks.hashing import (
+    ALGORITHMS,
+    HashReport,
+    _batches,
+    file_digest,
+    hash_files,
+    resolve_algorithm,
+)
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_file_digest(tmp_path, algorithm):
+    f = tmp_path / "file.txt"
+    f.write_text("hello")
+    expected = hashlib.new(algorithm, b"hello").hexdigest()
+    assert file_digest(str(f), algorithm) == expected
+
+
+def test_file_digest_small_buffer(tmp_path):
+    """Files larger than the read buffer are streamed in chunks."""
+    data = bytes(range(256)) * 100
+    f = tmp_path / "file.bin"
+    f.write_bytes(data)
+    digest = file_digest(str(f), "sha256", bytearray(1000))
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_file_digest_large(tmp_path):
+    """Files larger than the default buffer take several reads."""
+    data = bytes(range(256)) * (hashing_mod.READ_BUFFER // 256 * 2 + 1)
+    f = tmp_path / "file.bin"
+    f.write_bytes(data)
+    assert file_digest(str(f)) == hashlib.blake2b(data).hexdigest()
+
+
+def test_file_digest_truncated_while_hashing(tmp_path, monkeypatch):
+    """A file truncated midway is hashed as far as it could be read."""
+    data = b"x" * 3000
+    f = tmp_path / "file.bin"
+    f.write_bytes(data)
+    real_new = hashlib.new
+
+    class Truncating:
+        def __init__(self, name):
+            self.hash = real_new(name)
+
+        def update(self, chunk):
+            self.hash.update(chunk)
+            os.truncate(f, 1500)
+
+        def hexdigest(self):
+            return self.hash.hexdigest()
+
+    monkeypatch.setattr(hashing_mod.hashlib, "new", Truncating)
+    digest = file_digest(str(f), "sha256", bytearray(1000))
+    assert digest == hashlib.sha256(data[:1500]).hexdigest()
+
+
+def test_file_digest_empty(tmp_path):
+    f = tmp_path / "empty"
+    f.write_bytes(b"")
+    assert file_digest(str(f), "sha256") == hashlib.sha256().hexdigest()
+
+
+@pytest.mark.parametrize(
+    ("task_value", "configured", "expected"),
+    [
+        (None, None, "blake2b"),
+        (None, "sha256", "sha256"),
+        ("SHA512", "sha256", "sha512"),
+    ],
+)
+def test_resolve_algorithm(plugin_config, task_value, configured, expected):
+    plugin_config["hash"] = configured
+    assert resolve_algorithm(task_value) == expected
+
+
+def test_resolve_algorithm_unsupported():
+    with pytest.raises(CondaTasksError, match="md5"):
+        resolve_algorithm("md5")
+
+
+def test_batches_groups_small_files(monkeypatch):
+    monkeypatch.setattr(hashing_mod, "BATCH_FILES", 2)
+    sizes = {"big": hashing_mod.LARGE_FILE, "a": 1, "b": 2, "c": 3}
+    jobs = _batches(sizes)
+    assert jobs[0] == ["big"]
+    assert sorted(p for job in jobs[1:] for p in job) == ["a", "b", "c"]
+    assert all(len(job) <= 2 for job in jobs)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_hash_files(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(hashing_mod, "_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(hashing_mod, "BATCH_FILES", 1)
+    sizes = {}
+    for i in range(10):
+        f = tmp_path / f"f{i}.txt"
+        f.write_text(str(i) * (i + 1))
+        sizes[str(f)] = i + 1
+
+    report = hash_files(sizes, workers=workers)
+
+    assert report.workers == workers
+    assert report.files == 10
+    assert report.bytes == sum(sizes.values())
+    for path in sizes:
+        assert report.digests[path] == file_digest(path)
+
+
+def test_hash_files_skips_unreadable(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("a")
+    report = hash_files({str(f): 1, str(tmp_path / "missing"): 5})
+    assert list(report.digests) == [str(f)]
+    assert report.bytes == 1
+
+
+def test_hash_report_add():
+    total = HashReport()
+    total.add(HashReport(digests={"a": "1"}, files=1, bytes=10, seconds=1.0))
+    total.add(HashReport(digests={"b": "2"}, files=1, bytes=30, seconds=1.0, workers=4))
+    assert total.files == 2
+    assert total.throughput == 20.0
+    assert total.workers == 4
+    assert "2 file(s)" in total.summary()
+
+
+@pytest.mark.parametrize(
+    ("configured", "expected"),
+    [(None, None), (3, 3), ("6", 6), (0, 1), ("many", None)],
+)
+def test_default_workers(plugin_config, configured, expected):
+    plugin_config["hash_workers"] = configured
+    workers = hashing_mod.default_workers()
+    if expected is None:
+        assert workers >= 1
+    else:
+        assert workers == expected
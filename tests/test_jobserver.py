@@ -0,0 +1,145 @@
+"""Tests for conda_tasks.jobserver."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+
+import pytest
+from conda.base.constants import on_win
+
+from conda_tasks.jobserver import Jobserver, jobserver_auth, jobserver_for_run
+
+pytestmark = pytest.mark.skipif(on_win, reason="jobservers are Unix-only")
+
+
+@pytest.mark.parametrize(
+    ("makeflags", "expected"),
+    [
+        ("", None),
+        ("-k -j4", None),
+        ("-j4 --jobserver-auth=fifo:/tmp/GMfifo1", "fifo:/tmp/GMfifo1"),
+        (" --jobserver-auth=3,4 -j", "3,4"),
+        ("--jobserver-fds=5,6 -j", "5,6"),
+        ("--jobserver-auth=3,4 --jobserver-auth=fifo:/x", "fifo:/x"),
+    ],
+)
+def test_jobserver_auth(makeflags, expected):
+    assert jobserver_auth(makeflags) == expected
+
+
+def take_all(jobserver):
+    taken = 0
+    while jobserver.try_acquire():
+        taken += 1
+    return taken
+
+
+def test_create_holds_one_token_less_than_jobs():
+    with Jobserver.create(4) as jobserver:
+        assert take_all(jobserver) == 3
+        jobserver.release()
+        assert jobserver.try_acquire()
+        assert not jobserver.try_acquire()
+
+
+def test_create_makeflags():
+    with Jobserver.create(3, "k -j8 --jobserver-auth=3,4") as jobserver:
+        words = jobserver.env()["MAKEFLAGS"].split()
+        assert words[:2] == ["k", "-j3"]
+        (fd,) = jobserver.pass_fds
+        assert jobserver_auth(" ".join(words)) == f"{fd},{fd}"
+        os.fstat(fd)
+    with pytest.raises(OSError):
+        os.fstat(fd)
+
+
+@pytest.mark.skipif(shutil.which("make") is None, reason="make is not installed")
+def test_make_uses_created_pool(tmp_path):
+    (tmp_path / "Makefile").write_text("all: a b\na b:\n\t@echo $@\n", encoding="utf-8")
+    with Jobserver.create(3) as pool:
+        result = subprocess.run(
+            ["make"],
+            cwd=tmp_path,
+            env={**os.environ, **pool.env()},
+            pass_fds=pool.pass_fds,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "jobserver" not in result.stderr
+        assert sorted(result.stdout.split()) == ["a", "b"]
+        # make gave back every token it took.
+        assert take_all(pool) == 2
+
+
+def test_close_gives_back_held_tokens():
+    with Jobserver.create(3) as pool:
+        joined = Jobserver.join(pool.env())
+        assert take_all(joined) == 2
+        joined.close()
+        assert take_all(pool) == 2
+
+
+def test_join_fifo_shares_tokens():
+    with Jobserver.create(2) as pool:
+        joined = Jobserver.join(pool.env())
+        assert joined is not None
+        with joined:
+            assert joined.try_acquire()
+            assert not pool.try_acquire()
+            joined.release()
+            assert pool.try_acquire()
+
+
+def test_join_inherited_pipe():
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, b"ab")
+        makeflags = f"-j3 --jobserver-auth={read_fd},{write_fd}"
+        joined = Jobserver.join({"MAKEFLAGS": makeflags})
+        if joined is None:
+            pytest.skip("/proc/self/fd is not available")
+        with joined:
+            assert joined.pass_fds == (read_fd, write_fd)
+            assert joined.env() == {"MAKEFLAGS": makeflags}
+            assert take_all(joined) == 2
+        # The tokens are back, and the inherited descriptors still open.
+        assert sorted(os.read(read_fd, 2)) == sorted(b"ab")
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+@pytest.mark.parametrize(
+    "makeflags",
+    ["", "-j4", "--jobserver-auth=998,999", "--jobserver-auth=fifo:/nonexistent"],
+)
+def test_join_without_usable_jobserver(makeflags):
+    assert Jobserver.join({"MAKEFLAGS": makeflags}) is None
+
+
+@pytest.fixture
+def settings(plugin_config, monkeypatch):
+    monkeypatch.delenv("MAKEFLAGS", raising=False)
+    return plugin_config
+
+
+def test_jobserver_for_run_creates_pool(settings):
+    assert jobserver_for_run(1) is None
+    with jobserver_for_run(3) as jobserver:
+        assert take_all(jobserver) == 2
+
+
+def test_jobserver_for_run_joins_parent(settings, monkeypatch):
+    with Jobserver.create(2) as pool:
+        monkeypatch.setenv("MAKEFLAGS", pool.makeflags)
+        with jobserver_for_run(8) as jobserver:
+            assert jobserver.makeflags == pool.makeflags
+            assert take_all(jobserver) == 1
+
+
+def test_jobserver_for_run_disabled(settings):
+    settings["jobserver"] = False
+    assert jobserver_for_run(4) is None
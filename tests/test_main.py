@@ -0,0 +1,144 @@
+"""Tests for conda_tasks.__main__, the ``ct`` entry point."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import conda_tasks.cli.main
+from conda_tasks.__main__ import main, requested_subcommand
+
+#: Modules ``ct list`` must not import.
+NOT_AT_STARTUP = (
+    "conda.base.context",
+    "conda.exceptions",
+    "conda_tasks.cache",
+    "conda_tasks.template",
+    "jinja2",
+    "sqlite3",
+    "tomlkit",
+)
+
+#: Modules ``ct run`` must not import for a task without inputs or outputs.
+NOT_AT_RUN_STARTUP = (
+    "conda.base.context",
+    "conda.exceptions",
+    "jinja2",
+    "tomlkit",
+)
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        ([], None),
+        (["-h"], None),
+        (["list"], "list"),
+        (["run", "build", "--", "x"], "run"),
+        (["-f", "conda.toml", "run", "build"], "run"),
+        (["--file", "list", "list"], "list"),
+        (["--file=conda.toml", "export"], "export"),
+    ],
+)
+def test_requested_subcommand(argv, expected):
+    assert requested_subcommand(argv) == expected
+
+
+def test_main_builds_only_the_requested_subcommand(sample_yaml, monkeypatch):
+    built = []
+    for name, (help_text, configure) in conda_tasks.cli.main.SUBCOMMANDS.items():
+        monkeypatch.setitem(
+            conda_tasks.cli.main.SUBCOMMANDS,
+            name,
+            (help_text, lambda p, c=configure, n=name: built.append(n) or c(p)),
+        )
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--file", str(sample_yaml), "list"])
+    assert exc_info.value.code == 0
+    assert built == ["list"]
+
+
+def imported_modules(args, cwd, tmp_path, **env):
+    """Run ``ct`` with ``-X importtime``; return the modules it imported.
+
+    Modules imported during interpreter startup, up to ``site``, are
+    left out.  ``ct`` runs with a cache and home directory of its own,
+    and with the variables *env* set.
+    """
+    cache = str(tmp_path / "cache")
+    home = str(tmp_path / "home")
+    env = {
+        **{k: v for k, v in os.environ.items() if not k.startswith("CONDA_PLUGINS_")},
+        "XDG_CACHE_HOME": cache,
+        "LOCALAPPDATA": cache,
+        "HOME": home,
+        "USERPROFILE": home,
+        "XDG_CONFIG_HOME": home,
+        **env,
+    }
+    env.pop("CONDARC", None)
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys; from conda_tasks.__main__ import main; main(sys.argv[1:])",
+            *args,
+        ],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: set[str] = set()
+    started = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        name = line.rsplit("|", 1)[1]
+        if not started:
+            # Everything up to ``site`` is imported by the interpreter.
+            started = name == " site"
+            continue
+        modules.add(name.strip())
+    return modules
+
+
+def test_list_startup_imports(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "conda.toml").write_text('[tasks]\nfmt = "ruff format ."\n')
+    modules = imported_modules(["list"], project, tmp_path)
+
+    assert "conda_tasks.cli.list" in modules
+    imported = [name for name in NOT_AT_STARTUP if name in modules]
+    assert not imported, f"'ct list' imported {imported}"
+
+
+def test_run_startup_imports(tmp_path):
+    from conda_tasks.activation import ACTIVATION_DIR, activation_key
+
+    project = tmp_path / "project"
+    project.mkdir()
+    cmd = json.dumps([sys.executable, "-c", "pass"])
+    (project / "conda.toml").write_text(f"[tasks.fmt]\ncmd = {cmd}\n")
+    # The active environment, activated by an earlier run.
+    prefix = tmp_path / "env"
+    prefix.mkdir()
+    env = {"CONDA_PREFIX": str(prefix)}
+    key = activation_key(prefix, {**os.environ, **env})
+    activation = tmp_path / "cache" / "conda-tasks" / ACTIVATION_DIR
+    activation.mkdir(parents=True)
+    (activation / f"{key}.json").write_text("{}")
+
+    modules = imported_modules(["run", "fmt"], project, tmp_path, **env)
+
+    assert "conda_tasks.cli.run" in modules
+    imported = [name for name in NOT_AT_RUN_STARTUP if name in modules]
+    assert not imported, f"'ct run' imported {imported}"
@@ -0,0 +1,94 @@
+"""Tests for conda_tasks.manifestcache."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from conda_tasks import manifestcache
+from conda_tasks.manifestcache import (
+    load_manifest,
+    manifest_cache_path,
+    store_manifest,
+)
+from conda_tasks.models import Task
+from conda_tasks.parsers import _cached_parse
+
+TASKS = {"build": Task(name="build", cmd=["make", "-j4"], cpus=4.0)}
+
+
+def settle(path):
+    """Make *path* look like it was last changed well in the past."""
+    os.utime(path, ns=(0, 10**9))
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "conda.toml"
+    path.write_text('[tasks]\nbuild = { cmd = ["make", "-j4"], cpus = 4 }\n')
+    settle(path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def fresh_parse_cache():
+    _cached_parse.cache_clear()
+    yield
+    _cached_parse.cache_clear()
+
+
+def test_round_trip(manifest):
+    assert load_manifest(manifest) is None
+    store_manifest(manifest, TASKS)
+    assert manifest_cache_path(manifest.parent, "conda.toml").is_file()
+    assert load_manifest(manifest) == TASKS
+
+
+def test_recently_changed_files_are_not_cached(manifest):
+    manifest.write_text(manifest.read_text())
+    store_manifest(manifest, TASKS)
+    assert load_manifest(manifest) is None
+
+
+def test_changed_file_invalidates(manifest):
+    store_manifest(manifest, TASKS)
+    manifest.write_text(manifest.read_text() + "lint = 'ruff'\n")
+    settle(manifest)
+    assert load_manifest(manifest) is None
+
+
+def test_other_version_invalidates(manifest, monkeypatch):
+    store_manifest(manifest, TASKS)
+    monkeypatch.setattr(manifestcache, "MANIFEST_VERSION", 0)
+    assert load_manifest(manifest) is None
+
+
+def test_unreadable_entry_is_ignored(manifest):
+    store_manifest(manifest, TASKS)
+    manifest_cache_path(manifest.parent, "conda.toml").write_bytes(b"\x80garbage")
+    assert load_manifest(manifest) is None
+
+
+def test_parse_uses_cache_across_processes(manifest, monkeypatch):
+    tasks = _cached_parse(str(manifest))
+    assert tasks["build"].cmd == ["make", "-j4"]
+
+    def fail(path):
+        raise AssertionError("parsed again")
+
+    _cached_parse.cache_clear()
+    monkeypatch.setattr("conda_tasks.parsers.get_parser", fail)
+    assert _cached_parse(str(manifest)) == tasks
+
+
+def test_condarc_is_not_cached(tmp_path, monkeypatch):
+    condarc = tmp_path / ".condarc"
+    condarc.write_text("plugins:\n  conda_tasks:\n    tasks:\n      build: make\n")
+    settle(condarc)
+    monkeypatch.setattr(
+        "conda_tasks.parsers.condarc._raw_tasks_from_condarc",
+        lambda: {"build": "make"},
+    )
+    assert "build" in _cached_parse(str(condarc))
+    assert load_manifest(condarc) is None
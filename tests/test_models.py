@@ -77,6 +77,7 @@ def test_task_env_vars():
         ({"env": {"CC": "gcc"}}, "env", {"CC": "gcc"}),
         ({"cwd": "/tmp"}, "cwd", "/tmp"),
         ({"clean_env": True}, "clean_env", True),
+        ({"shell": "/bin/sh"}, "shell", "/bin/sh"),
     ],
 )
 def test_task_override(kwargs, attr, expected):
@@ -0,0 +1,55 @@
+"""Tests for conda_tasks.plugin, the hooks conda calls on every run."""
+
+from __future__ import annotations
+
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conda_tasks.plugin import conda_settings, conda_subcommands
+
+BENCHMARK = Path(__file__).parents[1] / "benchmarks" / "plugin_overhead.py"
+
+
+def test_conda_settings_is_built_once():
+    (first,) = conda_settings()
+    (second,) = conda_settings()
+    assert first.name == "conda_tasks"
+    assert first.aliases == ("conda-tasks",)
+    assert second is first
+
+
+def test_conda_subcommands():
+    (subcommand,) = conda_subcommands()
+    assert subcommand.name == "task"
+
+
+def test_hooks_do_not_import_the_cli():
+    code = (
+        "import sys, conda_tasks.plugin as p; list(p.conda_settings()); "
+        "print(sorted(m for m in sys.modules if m.startswith('conda_tasks')))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip() == "['conda_tasks', 'conda_tasks.plugin']"
+
+
+@pytest.fixture(scope="module")
+def benchmark():
+    if not BENCHMARK.exists():
+        pytest.skip("benchmarks are not part of this checkout")
+    spec = importlib.util.spec_from_file_location("plugin_overhead", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_regressions_are_reported(benchmark):
+    baselines = {"tolerance": 2.0, "slack_ms": 0.5, "metrics": {"warm_import": 1.0}}
+    assert benchmark.regressions({"warm_import": 2.4}, baselines) == []
+    (found,) = benchmark.regressions({"warm_import": 2.6}, baselines)
+    assert found.startswith("warm_import: 2.600 ms")
@@ -2,10 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+
 import pytest
 from conda.base.constants import on_win
 
-from conda_tasks.runner import SubprocessShell
+from conda_tasks.jobserver import Jobserver
+from conda_tasks.runner import (
+    COMMAND_NOT_EXECUTABLE,
+    COMMAND_NOT_FOUND,
+    AsyncSubprocessShell,
+    OutputMultiplexer,
+    SubprocessShell,
+    default_shell,
+)
+from conda_tasks.tasklog import TaskLog
 
 
 def test_run_simple_command(tmp_path):
@@ -83,12 +99,103 @@ def test_build_env(extra_env, clean, expected_key, expected_val):
             assert key in allowed
 
 
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_build_env_names_jobserver(monkeypatch):
+    monkeypatch.setenv("MAKEFLAGS", "-k")
+    with Jobserver.create(2) as jobserver:
+        shell = SubprocessShell(jobserver)
+        assert shell._build_env({}, clean=False)["MAKEFLAGS"] == jobserver.makeflags
+        assert shell._build_env({"MAKEFLAGS": "-s"}, clean=True)["MAKEFLAGS"] == "-s"
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_run_passes_jobserver_fds(tmp_path):
+    read_fd, write_fd = os.pipe()
+    try:
+        auth = f"--jobserver-auth={read_fd},{write_fd}"
+        jobserver = Jobserver(read_fd, write_fd, auth, pass_fds=(read_fd, write_fd))
+        code = SubprocessShell(jobserver).run(
+            [sys.executable, "-c", f"import os; os.write({write_fd}, b'+')"],
+            {},
+            tmp_path,
+        )
+        assert code == 0
+        assert os.read(read_fd, 1) == b"+"
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
 def test_list_command(tmp_path):
     shell = SubprocessShell()
     exit_code = shell.run(["echo", "hello"], {}, tmp_path)
     assert exit_code == 0
 
 
+def test_list_command_preserves_argv(tmp_path, capfd):
+    """List commands are run without a shell, so nothing is split or expanded."""
+    script = "import sys; print(sys.argv[1:])"
+    argv = [sys.executable, "-c", script, "a b", "$HOME", "*", "'q'"]
+    assert SubprocessShell().run(argv, {}, tmp_path) == 0
+    assert capfd.readouterr().out.strip() == repr(["a b", "$HOME", "*", "'q'"])
+
+
+def test_list_command_uses_path_of_env(tmp_path, monkeypatch):
+    """The executable of a list command is looked up on the command's PATH."""
+    shell = SubprocessShell()
+    calls: list[list[str]] = []
+    monkeypatch.setattr(shell, "_call", lambda args, *rest: calls.append(args))
+    monkeypatch.setattr(
+        "shutil.which", lambda name, path=None: f"{path}/{name}" if path else None
+    )
+    shell.run(["tool", "--flag"], {"PATH": "/env/bin"}, tmp_path)
+    assert calls == [["/env/bin/tool", "--flag"]]
+
+
+def test_list_command_not_found(tmp_path, capfd):
+    code = SubprocessShell().run(["no-such-command-xyz"], {}, tmp_path)
+    assert code == COMMAND_NOT_FOUND
+    assert "no-such-command-xyz: command not found" in capfd.readouterr().err
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+@pytest.mark.parametrize(
+    ("mode", "content", "reason"),
+    [
+        (0o644, b"#!/bin/sh\n", "Permission denied"),
+        (0o755, b"\x00\x01 not a program", "Exec format error"),
+    ],
+    ids=["not-executable", "bad-format"],
+)
+@pytest.mark.parametrize("backend", [SubprocessShell, AsyncSubprocessShell])
+def test_list_command_not_executable(tmp_path, backend, mode, content, reason):
+    tool = tmp_path / "tool"
+    tool.write_bytes(content)
+    tool.chmod(mode)
+    with TaskLog(tmp_path / "tool.log") as log:
+        code = backend().run([str(tool)], {}, tmp_path, log=log)
+    assert code == COMMAND_NOT_EXECUTABLE
+    assert f"{tool}: {reason}".encode() in log.tail()
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_run_with_configured_shell(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHELL", "/nonexistent/shell")
+    shell = SubprocessShell()
+    assert shell.run("exit 3", {}, tmp_path, shell="/bin/sh") == 3
+    assert shell.run("exit 3", {}, tmp_path) == COMMAND_NOT_FOUND
+
+
+def test_shell_command_with_shell():
+    result = SubprocessShell._shell_command("echo hi", "bash")
+    assert result == ["bash", "-c", "echo hi"]
+
+
+def test_default_shell(plugin_config):
+    plugin_config["shell"] = "/bin/sh"
+    assert default_shell() == "/bin/sh"
+
+
 @pytest.mark.skipif(on_win, reason="Unix-only test")
 def test_shell_command_unix():
     result = SubprocessShell._shell_command("echo hi")
@@ -105,7 +212,6 @@ def test_shell_command_windows():
 
 def test_run_in_env(tmp_path, monkeypatch):
     """_run_in_env delegates to wrap_subprocess_call."""
-    import subprocess as subprocess_mod
     import types
 
     import conda.base.context
@@ -127,13 +233,9 @@ def test_run_in_env(tmp_path, monkeypatch):
 
     monkeypatch.setattr(conda.base.context, "context", fake_context)
     monkeypatch.setattr(conda.utils, "wrap_subprocess_call", fake_wrap)
-    monkeypatch.setattr(
-        subprocess_mod,
-        "run",
-        lambda *a, **kw: types.SimpleNamespace(returncode=0),
-    )
 
     shell = SubprocessShell()
+    monkeypatch.setattr(shell, "_call", lambda *a: 0)
     code = shell._run_in_env("echo hi", {}, tmp_path, tmp_path / "envs/test")
 
     assert code == 0
@@ -142,7 +244,6 @@ def test_run_in_env(tmp_path, monkeypatch):
 
 def test_run_in_env_cleans_up_script(tmp_path, monkeypatch):
     """_run_in_env removes the wrapper script after execution."""
-    import subprocess as subprocess_mod
     import types
 
     import conda.base.context
@@ -162,23 +263,20 @@ def test_run_in_env_cleans_up_script(tmp_path, monkeypatch):
         "wrap_subprocess_call",
         lambda *a: (str(script_file), ["echo", "hi"]),
     )
-    monkeypatch.setattr(
-        subprocess_mod,
-        "run",
-        lambda *a, **kw: types.SimpleNamespace(returncode=0),
-    )
 
     shell = SubprocessShell()
+    monkeypatch.setattr(shell, "_call", lambda *a: 0)
     shell._run_in_env("echo hi", {}, tmp_path, tmp_path / "env")
 
     assert not script_file.exists()
 
 
 def test_run_delegates_to_env_when_prefix_given(tmp_path, monkeypatch):
-    """SubprocessShell.run calls _run_in_env when conda_prefix is set."""
+    """SubprocessShell.run falls back to _run_in_env without a cached activation."""
     called_with: list[tuple] = []
+    monkeypatch.setattr("conda_tasks.runner.activated_env", lambda *a: None)
 
-    def fake_run_in_env(cmd, env, cwd, conda_prefix):
+    def fake_run_in_env(cmd, env, cwd, conda_prefix, shell=None, log=None):
         called_with.append((cmd, env, cwd, conda_prefix))
         return 0
 
@@ -188,3 +286,162 @@ def test_run_delegates_to_env_when_prefix_given(tmp_path, monkeypatch):
 
     assert code == 0
     assert len(called_with) == 1
+
+
+def test_run_uses_activated_env(tmp_path, monkeypatch):
+    """SubprocessShell.run runs directly with the cached activated environment."""
+    monkeypatch.setattr(
+        "conda_tasks.runner.activated_env",
+        lambda prefix, env: {**env, "CONDA_PREFIX": str(prefix)},
+    )
+    calls: list[tuple] = []
+    shell = SubprocessShell()
+    monkeypatch.setattr(shell, "_call", lambda *a: calls.append(a) or 0)
+    monkeypatch.setattr(shell, "_run_in_env", pytest.fail)
+
+    prefix = tmp_path / "env"
+    assert shell.run("echo hi", {}, tmp_path, conda_prefix=prefix) == 0
+    ((args, env, cwd, log),) = calls
+    assert args == shell._shell_command("echo hi")
+    assert env["CONDA_PREFIX"] == str(prefix)
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_cancel_terminates_running_commands(tmp_path):
+    shell = SubprocessShell()
+    codes: list[int] = []
+    thread = threading.Thread(
+        target=lambda: codes.append(shell.run("sleep 30", {}, tmp_path))
+    )
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not shell._procs and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    shell.cancel()
+    thread.join(10)
+
+    assert codes and codes[0] != 0
+    assert not shell._procs
+
+
+def test_multiplexer_writes_whole_prefixed_lines():
+    out = io.BytesIO()
+    mux = OutputMultiplexer(stdout=out, stderr=io.BytesIO())
+
+    mux.feed("lint", b"checking fi")
+    mux.feed("test", b"collected 3 items\nrun")
+    mux.feed("lint", b"les\ndone\n")
+    mux.flush("test")
+
+    assert out.getvalue().splitlines() == [
+        b"[test] collected 3 items",
+        b"[lint] checking files",
+        b"[lint] done",
+        b"[test] run",
+    ]
+
+
+def test_multiplexer_keeps_stderr_separate():
+    out, err = io.BytesIO(), io.BytesIO()
+    mux = OutputMultiplexer(stdout=out, stderr=err)
+    mux.feed("build", b"warning\n", err=True)
+    mux.feed(None, b"plain\n")
+    assert err.getvalue() == b"[build] warning\n"
+    assert out.getvalue() == b"plain\n"
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_async_shell_streams_output(tmp_path):
+    out, err = io.BytesIO(), io.BytesIO()
+    shell = AsyncSubprocessShell(OutputMultiplexer(out, err))
+
+    code = shell.run(
+        "echo one; echo two >&2; printf three; exit 3", {}, tmp_path, name="t"
+    )
+
+    assert code == 3
+    assert out.getvalue() == b"[t] one\n[t] three\n"
+    assert err.getvalue() == b"[t] two\n"
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_async_shell_runs_concurrently(tmp_path):
+    shell = AsyncSubprocessShell(OutputMultiplexer(io.BytesIO(), io.BytesIO()))
+
+    async def main():
+        return await asyncio.gather(
+            *(shell.run_async(f"sleep 0.3; exit {i}", {}, tmp_path) for i in range(4))
+        )
+
+    began = time.monotonic()
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    assert time.monotonic() - began < 1.0
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_async_shell_cancellation_terminates(tmp_path):
+    shell = AsyncSubprocessShell(OutputMultiplexer(io.BytesIO(), io.BytesIO()))
+
+    async def main():
+        task = asyncio.create_task(shell.run_async("sleep 30", {}, tmp_path))
+        while not shell._running:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    began = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - began < 10
+    assert not shell._running
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_async_shell_cancel_from_another_thread(tmp_path):
+    shell = AsyncSubprocessShell(OutputMultiplexer(io.BytesIO(), io.BytesIO()))
+    codes: list[int] = []
+    thread = threading.Thread(
+        target=lambda: codes.append(shell.run("sleep 30", {}, tmp_path))
+    )
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not shell._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    shell.cancel()
+    thread.join(10)
+
+    assert codes and codes[0] != 0
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_run_captures_output_to_log(tmp_path, capfd):
+    path = tmp_path / "build.log"
+    with TaskLog(path, tail_bytes=8) as log:
+        code = SubprocessShell().run(
+            "echo out; echo err >&2; exit 4", {}, tmp_path, log=log
+        )
+    assert code == 4
+    assert path.read_bytes() == b"out\nerr\n"
+    assert log.tail() == b"out\nerr\n"
+    assert capfd.readouterr() == ("", "")
+
+
+def test_run_logs_missing_command(tmp_path, capfd):
+    with TaskLog(tmp_path / "build.log") as log:
+        code = SubprocessShell().run(["no-such-command-xyz"], {}, tmp_path, log=log)
+    assert code == COMMAND_NOT_FOUND
+    assert b"no-such-command-xyz: command not found" in log.tail()
+    assert capfd.readouterr().err == ""
+
+
+@pytest.mark.skipif(on_win, reason="Unix-only test")
+def test_async_shell_captures_output_to_log(tmp_path):
+    out = io.BytesIO()
+    shell = AsyncSubprocessShell(OutputMultiplexer(out, out))
+    with TaskLog(tmp_path / "build.log") as log:
+        code = shell.run("echo one; echo two >&2", {}, tmp_path, log=log, name="t")
+    assert code == 0
+    assert sorted(log.tail().splitlines()) == [b"one", b"two"]
+    assert out.getvalue() == b""
@@ -0,0 +1,407 @@
+"""Tests for conda_tasks.scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from conda.base.constants import on_win
+
+import conda_tasks.scheduler
+from conda_tasks.jobserver import Jobserver
+from conda_tasks.scheduler import (
+    CANCELLED,
+    DEFAULT_ESTIMATE,
+    DONE,
+    FAILED,
+    OK,
+    SKIPPED,
+    Resources,
+    Scheduler,
+    available_memory,
+    default_jobs,
+    estimate_durations,
+    machine_resources,
+    system_pressure,
+)
+
+
+class Recorder:
+    """Callbacks for ``Scheduler.run`` that record what happened."""
+
+    def __init__(self, codes=None, delay=0.0, instant=()):
+        self.codes = codes or {}
+        self.delay = delay
+        self.instant = set(instant)
+        self.started: list[str] = []
+        self.finished: list[str] = []
+        self.cancelled = threading.Event()
+        self.active = 0
+        self.peak = 0
+        #: The set of running tasks each time one started.
+        self.together: list[set[str]] = []
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        self.started.append(name)
+        if name in self.instant:
+            return None
+        return lambda: self.work(name)
+
+    def work(self, name):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self._running.add(name)
+            self.together.append(set(self._running))
+        try:
+            code = self.codes.get(name, 0)
+            if code:
+                return code
+            self.cancelled.wait(self.delay)
+            return 143 if self.cancelled.is_set() else 0
+        finally:
+            with self._lock:
+                self.active -= 1
+                self._running.discard(name)
+
+    def finish(self, name, exit_code):
+        self.finished.append(name)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self, scheduler):
+        return scheduler.run(self.start, self.finish, self.cancel)
+
+
+def test_runs_independent_tasks_in_parallel():
+    rec = Recorder(delay=0.2)
+    scheduler = Scheduler(["a", "b", "c", "d"], {}, jobs=4)
+
+    began = time.monotonic()
+    outcomes = rec.run(scheduler)
+
+    assert time.monotonic() - began < 0.6
+    assert rec.peak == 4
+    assert [o.status for o in outcomes] == [OK] * 4
+
+
+def test_respects_job_limit():
+    rec = Recorder(delay=0.05)
+    rec.run(Scheduler(["a", "b", "c", "d", "e"], {}, jobs=2))
+    assert rec.peak == 2
+
+
+def test_waits_for_dependencies():
+    rec = Recorder(delay=0.01)
+    deps = {"lint": ["setup"], "test": ["setup"], "check": ["lint", "test"]}
+    rec.run(Scheduler(["setup", "lint", "test", "check"], deps, jobs=4))
+
+    assert rec.started[0] == "setup"
+    assert rec.started[-1] == "check"
+    assert rec.finished.index("setup") < rec.started.index("lint")
+    assert set(rec.finished[1:3]) == {"lint", "test"}
+
+
+def test_tasks_without_work_release_dependents():
+    rec = Recorder(instant=["a"])
+    outcomes = rec.run(Scheduler(["a", "b"], {"b": ["a"]}, jobs=2))
+    assert [(o.name, o.status) for o in outcomes] == [("a", DONE), ("b", OK)]
+    assert rec.finished == ["b"]
+
+
+def test_unknown_dependencies_are_ignored():
+    rec = Recorder()
+    outcomes = rec.run(Scheduler(["b"], {"b": ["a"]}))
+    assert [o.status for o in outcomes] == [OK]
+
+
+def test_failure_cancels_and_skips():
+    rec = Recorder(codes={"bad": 2}, delay=10)
+    deps = {"after": ["bad"]}
+    outcomes = rec.run(Scheduler(["slow", "bad", "after", "later"], deps, jobs=2))
+
+    by_name = {o.name: o for o in outcomes}
+    assert rec.cancelled.is_set()
+    assert by_name["bad"].status == FAILED
+    assert by_name["bad"].exit_code == 2
+    assert by_name["slow"].status == CANCELLED
+    assert by_name["after"].status == SKIPPED
+    assert by_name["later"].status == SKIPPED
+    assert [o.name for o in outcomes] == ["slow", "bad", "after", "later"]
+
+
+def test_exception_in_start_cancels_running_tasks():
+    rec = Recorder(delay=10)
+
+    def start(name):
+        if name == "b":
+            raise RuntimeError("boom")
+        return rec.start(name)
+
+    scheduler = Scheduler(["a", "b"], {}, jobs=2)
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.run(start, rec.finish, rec.cancel)
+    assert rec.cancelled.is_set()
+    assert rec.active == 0
+
+
+@pytest.mark.parametrize(
+    ("order", "deps", "jobs", "expected"),
+    [
+        (["a", "b"], {}, 2, True),
+        (["a", "b"], {}, 1, False),
+        (["a"], {}, 4, False),
+        (["a", "b", "c"], {"b": ["a"], "c": ["b", "a"]}, 4, False),
+        (["a", "b", "c"], {"b": ["a"], "c": ["a"]}, 4, True),
+    ],
+    ids=["independent", "one-job", "one-task", "chain", "fan-out"],
+)
+def test_parallel(order, deps, jobs, expected):
+    assert Scheduler(order, deps, jobs=jobs).parallel is expected
+
+
+def test_coroutines_share_one_event_loop_thread():
+    threads = set()
+
+    async def work():
+        threads.add(threading.current_thread())
+        await asyncio.sleep(0.2)
+        return 0
+
+    began = time.monotonic()
+    outcomes = Scheduler(["a", "b", "c", "d"], {}, jobs=4).run(
+        lambda name: work(), lambda name, code: None, lambda: None
+    )
+
+    assert time.monotonic() - began < 0.6
+    assert [o.status for o in outcomes] == [OK] * 4
+    assert all(o.seconds >= 0.2 for o in outcomes)
+    (thread,) = threads
+    assert thread is not threading.current_thread()
+    assert not thread.is_alive()
+
+
+def test_failed_coroutine_cancels_the_others():
+    stop = asyncio.Event()
+    loops = []
+
+    async def work(name):
+        loops.append(asyncio.get_running_loop())
+        if name == "bad":
+            return 2
+        await stop.wait()
+        return 143
+
+    def cancel():
+        loops[0].call_soon_threadsafe(stop.set)
+
+    outcomes = Scheduler(["slow", "bad"], {}, jobs=2).run(
+        work, lambda name, code: None, cancel
+    )
+    assert [o.status for o in outcomes] == [CANCELLED, FAILED]
+
+
+def test_default_jobs(plugin_config, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 6)
+    assert default_jobs() == 6
+
+    plugin_config["jobs"] = "3"
+    assert default_jobs() == 3
+
+    plugin_config["jobs"] = "many"
+    assert default_jobs() == 6
+
+
+def test_critical_path():
+    deps = {"b": ["a"], "c": ["b"], "d": ["a"]}
+    estimates = {"a": 1.0, "b": 2.0, "c": 3.0, "d": 10.0}
+    scheduler = Scheduler(["a", "b", "c", "d"], deps, estimates=estimates)
+    assert scheduler.critical_path == {"a": 11.0, "b": 5.0, "c": 3.0, "d": 10.0}
+
+
+def test_longest_critical_path_starts_first():
+    """With one slot, the long chain starts before the short tasks."""
+    deps = {"long2": ["long1"]}
+    estimates = {"short": 1.0, "tiny": 0.5, "long1": 5.0, "long2": 5.0}
+    rec = Recorder()
+    rec.run(Scheduler(["short", "tiny", "long1", "long2"], deps, 1, estimates))
+    assert rec.started == ["long1", "long2", "short", "tiny"]
+
+
+def test_ties_keep_plan_order():
+    rec = Recorder()
+    rec.run(Scheduler(["b", "a", "c"], {}, jobs=1))
+    assert rec.started == ["b", "a", "c"]
+
+
+@pytest.mark.parametrize(
+    ("history", "expected"),
+    [
+        ({}, {"a": DEFAULT_ESTIMATE, "b": DEFAULT_ESTIMATE}),
+        ({"a": 4.0}, {"a": 4.0, "b": 4.0}),
+        ({"a": 4.0, "x": 100.0}, {"a": 4.0, "b": 4.0}),
+    ],
+)
+def test_estimate_durations(history, expected):
+    assert estimate_durations(["a", "b"], history) == expected
+
+
+def test_resources_fit():
+    capacity = Resources(cpus=4, memory=100)
+    assert Resources(2, 50).fits(capacity)
+    assert (Resources(2, 50) + Resources(2, 50)).fits(capacity)
+    assert not Resources(5, 0).fits(capacity)
+    assert not Resources(0, 101).fits(capacity)
+    assert Resources(3, 60) - Resources(1, 10) == Resources(2, 50)
+
+
+def test_machine_resources():
+    machine = machine_resources()
+    assert machine.cpus >= 1
+    assert machine.memory > 0
+
+
+def test_admits_tasks_within_capacity():
+    rec = Recorder(delay=0.1)
+    costs = {"a": Resources(cpus=3), "b": Resources(cpus=3), "c": Resources(cpus=1)}
+    scheduler = Scheduler(
+        ["a", "b", "c"], {}, jobs=3, costs=costs, capacity=Resources(4, 0)
+    )
+
+    outcomes = rec.run(scheduler)
+
+    assert [o.status for o in outcomes] == [OK] * 3
+    # c fills the gap next to a; b waits until a is done.
+    assert rec.started[:2] == ["a", "c"]
+    assert not any({"a", "b"} <= running for running in rec.together)
+
+
+def test_memory_limits_admission():
+    rec = Recorder(delay=0.05)
+    costs = {name: Resources(memory=60) for name in "abc"}
+    scheduler = Scheduler(
+        ["a", "b", "c"], {}, jobs=3, costs=costs, capacity=Resources(8, 100)
+    )
+    rec.run(scheduler)
+    assert rec.peak == 1
+
+
+def test_oversized_task_runs_alone():
+    rec = Recorder(delay=0.05)
+    costs = {"big": Resources(cpus=16), "small": Resources(cpus=1)}
+    scheduler = Scheduler(
+        ["big", "small"], {}, jobs=2, costs=costs, capacity=Resources(2, 0)
+    )
+    outcomes = rec.run(scheduler)
+    assert [o.status for o in outcomes] == [OK, OK]
+    assert rec.peak == 1
+
+
+def test_tasks_without_costs_only_count_against_jobs():
+    rec = Recorder(delay=0.1)
+    costs = {"a": Resources(cpus=2)}
+    scheduler = Scheduler(
+        ["a", "b", "c"], {}, jobs=3, costs=costs, capacity=Resources(2, 0)
+    )
+    rec.run(scheduler)
+    assert rec.peak == 3
+
+
+def test_busy_machine_runs_one_task_at_a_time():
+    rec = Recorder(delay=0.05)
+    scheduler = Scheduler(["a", "b", "c"], {}, jobs=3, busy=lambda: True)
+    outcomes = rec.run(scheduler)
+    assert [o.status for o in outcomes] == [OK] * 3
+    assert rec.peak == 1
+
+
+def test_resumes_when_pressure_drops(monkeypatch):
+    monkeypatch.setattr(conda_tasks.scheduler, "PRESSURE_POLL", 0.01)
+    checks = []
+
+    def busy():
+        checks.append(time.monotonic())
+        return len(checks) < 3
+
+    rec = Recorder(delay=0.3)
+    scheduler = Scheduler(["a", "b", "c"], {}, jobs=3, busy=busy)
+    rec.run(scheduler)
+    # Held back at first, all three end up running while "a" still is.
+    assert rec.peak == 3
+    assert len(checks) >= 3
+
+
+@pytest.mark.skipif(on_win, reason="jobservers are Unix-only")
+def test_tokens_limit_parallelism():
+    rec = Recorder(delay=0.1)
+    with Jobserver.create(2) as tokens:
+        scheduler = Scheduler(["a", "b", "c", "d"], {}, jobs=4, tokens=tokens)
+        outcomes = rec.run(scheduler)
+        assert all(o.status == OK for o in outcomes)
+        assert rec.peak == 2
+        # Every token taken was given back.
+        assert tokens.try_acquire()
+        assert not tokens.try_acquire()
+
+
+@pytest.mark.skipif(on_win, reason="jobservers are Unix-only")
+def test_tokens_are_returned_by_tasks_without_work():
+    rec = Recorder(delay=0.05, instant=["b"])
+    with Jobserver.create(2) as tokens:
+        scheduler = Scheduler(["a", "b", "c"], {}, jobs=3, tokens=tokens)
+        assert all(o.status in (OK, DONE) for o in rec.run(scheduler))
+        assert rec.peak == 2
+        assert tokens.try_acquire()
+
+
+def test_available_memory(tmp_path, monkeypatch):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal: 8000 kB\nMemAvailable:    2048 kB\n")
+    monkeypatch.setattr(conda_tasks.scheduler, "MEMINFO", str(meminfo))
+    assert available_memory() == 2048 * 1024
+
+    monkeypatch.setattr(conda_tasks.scheduler, "MEMINFO", str(tmp_path / "missing"))
+    assert available_memory() is None
+
+
+def test_system_pressure_without_limits(plugin_config):
+    assert system_pressure() is None
+
+
+def test_system_pressure_load(plugin_config, monkeypatch):
+    load = [4.0]
+    monkeypatch.setattr("os.getloadavg", lambda: (load[0], 0.0, 0.0))
+    busy = system_pressure(max_load=3)
+    assert busy()
+    load[0] = 2.5
+    assert not busy()
+
+
+def test_system_pressure_memory_from_settings(plugin_config, monkeypatch):
+    plugin_config["min_free_memory"] = "1GiB"
+    free = [512 * 1024**2]
+    monkeypatch.setattr(conda_tasks.scheduler, "available_memory", lambda: free[0])
+    busy = system_pressure()
+    assert busy()
+    free[0] = 2 * 1024**3
+    assert not busy()
+
+
+def test_system_pressure_arguments_override_settings(plugin_config, monkeypatch):
+    plugin_config["max_load"] = 1
+    monkeypatch.setattr("os.getloadavg", lambda: (2.0, 0.0, 0.0))
+    assert system_pressure()()
+    assert not system_pressure(max_load=8)()
+
+
+@pytest.mark.parametrize(
+    ("key", "value"), [("max_load", "high"), ("min_free_memory", "lots")]
+)
+def test_system_pressure_ignores_invalid_settings(plugin_config, key, value):
+    plugin_config[key] = value
+    assert system_pressure() is None
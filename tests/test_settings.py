@@ -0,0 +1,146 @@
+"""Tests for conda_tasks.settings."""
+
+from __future__ import annotations
+
+import os
+import sys
+import types
+
+import pytest
+from conda.base.context import context
+
+from conda_tasks.settings import (
+    as_bool,
+    as_count,
+    as_names,
+    as_number,
+    plugin_sections,
+    plugin_setting,
+)
+from conda_tasks.sizes import parse_size
+
+
+@pytest.fixture
+def raw_sources(monkeypatch):
+    """Replace conda's raw plugin config with an ordered dict of sources."""
+    sources: dict[str, dict[str, object]] = {}
+    plugins = types.SimpleNamespace(raw_data=sources)
+    monkeypatch.setattr(type(context), "plugins", property(lambda self: plugins))
+    return sources
+
+
+def _param(value):
+    return types.SimpleNamespace(_raw_value=value)
+
+
+def test_plugin_sections_skips_non_mappings(raw_sources):
+    raw_sources["~/.condarc"] = {"conda_tasks": _param({"hash_workers": 2})}
+    raw_sources["envvars"] = {"conda_tasks": _param("not-a-dict")}
+    raw_sources["other"] = {"unrelated": _param({})}
+    assert list(plugin_sections()) == [{"hash_workers": 2}]
+
+
+def test_plugin_setting_later_source_wins(raw_sources):
+    raw_sources["/etc/condarc"] = {"conda_tasks": _param({"hash_workers": 2})}
+    raw_sources["~/.condarc"] = {"conda_tasks": _param({"hash_workers": 8})}
+    assert plugin_setting("hash_workers") == 8
+
+
+def test_plugin_setting_default(raw_sources):
+    assert plugin_setting("hash_workers", 4) == 4
+
+
+@pytest.mark.parametrize(
+    ("configured", "expected"), [(8, 8), ("8", 8), ("eight", 4), (True, 4)]
+)
+def test_plugin_setting_convert(raw_sources, configured, expected):
+    raw_sources["~/.condarc"] = {"conda_tasks": _param({"jobs": configured})}
+    assert plugin_setting("jobs", 4, convert=as_count) == expected
+
+
+def test_plugin_setting_convert_size(raw_sources):
+    raw_sources["~/.condarc"] = {"conda_tasks": _param({"cache_max_size": "2KiB"})}
+    assert plugin_setting("cache_max_size", convert=parse_size) == 2048
+    raw_sources["~/.condarc"] = {"conda_tasks": _param({"cache_max_size": "big"})}
+    assert plugin_setting("cache_max_size", 1, convert=parse_size) == 1
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(True, True), (False, False), ("yes", True), ("False", False), ("0", False)],
+)
+def test_as_bool(value, expected):
+    assert as_bool(value) is expected
+
+
+@pytest.mark.parametrize(
+    ("convert", "value"),
+    [
+        (as_bool, "maybe"),
+        (as_bool, 1),
+        (as_number, "high"),
+        (as_number, True),
+        (as_count, "many"),
+        (as_count, None),
+        (as_names, "node_modules"),
+        (as_names, ["node_modules", ""]),
+    ],
+)
+def test_converters_reject_invalid_values(convert, value):
+    with pytest.raises((TypeError, ValueError)):
+        convert(value)
+
+
+def test_converters():
+    assert as_number("1.5") == 1.5
+    assert as_count(0) == 1
+    assert as_count("3") == 3
+    assert as_names(["a", "b"]) == ("a", "b")
+
+
+@pytest.fixture
+def search_path(tmp_path, monkeypatch):
+    """Make conda's configuration search path a condarc and a condarc.d."""
+    import conda.base.constants
+
+    import conda_tasks.settings
+
+    monkeypatch.setattr(
+        conda.base.constants,
+        "SEARCH_PATH",
+        (str(tmp_path / ".condarc"), str(tmp_path / "condarc.d") + os.sep),
+    )
+    for name in list(os.environ):
+        if name.startswith("CONDA_PLUGINS_"):
+            monkeypatch.delenv(name)
+    conda_tasks.settings._may_be_configured.cache_clear()
+    yield tmp_path
+    conda_tasks.settings._may_be_configured.cache_clear()
+
+
+def test_plugin_sections_without_condarc_settings(search_path, monkeypatch):
+    (search_path / ".condarc").write_text("channels: [conda-forge]\n")
+    monkeypatch.delitem(sys.modules, "conda.base.context")
+    assert list(plugin_sections()) == []
+    assert "conda.base.context" not in sys.modules
+
+
+@pytest.mark.parametrize(
+    "path", [".condarc", "condarc.d/tasks.yml", "condarc.d/tasks.yaml"]
+)
+def test_condarc_settings_are_noticed(search_path, path):
+    import conda_tasks.settings
+
+    condarc = search_path / path
+    condarc.parent.mkdir(exist_ok=True)
+    condarc.write_text("plugins:\n  conda_tasks:\n    jobs: 2\n")
+    assert conda_tasks.settings._may_be_configured()
+
+
+def test_plugin_settings_from_environment_are_noticed(search_path, monkeypatch):
+    import conda_tasks.settings
+
+    assert not conda_tasks.settings._may_be_configured()
+    conda_tasks.settings._may_be_configured.cache_clear()
+    monkeypatch.setenv("CONDA_PLUGINS_CONDA_TASKS", "{}")
+    assert conda_tasks.settings._may_be_configured()
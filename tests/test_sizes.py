@@ -0,0 +1,36 @@
+"""Tests for conda_tasks.sizes."""
+
+from __future__ import annotations
+
+import pytest
+
+from conda_tasks.exceptions import CondaTasksError
+from conda_tasks.sizes import format_size, parse_size
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (1234, 1234),
+        ("1234", 1234),
+        ("2K", 2048),
+        ("2KB", 2000),
+        ("1.5 GiB", int(1.5 * 1024**3)),
+        ("5gb", 5 * 1000**3),
+    ],
+)
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_parse_size_invalid():
+    with pytest.raises(CondaTasksError, match="lots"):
+        parse_size("lots")
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [(512, "512 B"), (2048, "2.0 KiB"), (5 * 1024**3, "5.0 GiB")],
+)
+def test_format_size(size, expected):
+    assert format_size(size) == expected
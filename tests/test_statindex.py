@@ -0,0 +1,102 @@
+"""Tests for conda_tasks.statindex."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from conda_tasks.cache import is_cached, load_stat_index, save_cache
+from conda_tasks.globbing import FileTree
+from conda_tasks.statindex import RACY_WINDOW_NS, StatIndex
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project whose directories last changed well outside the racy window."""
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "a.py").write_text("a")
+    (tmp_path / "src" / "pkg" / "b.py").write_text("b")
+    past = time.time() - 60
+    for d in (tmp_path, tmp_path / "src", tmp_path / "src" / "pkg"):
+        os.utime(d, (past, past))
+    return tmp_path
+
+
+@pytest.fixture
+def scandirs(monkeypatch):
+    """Record every directory listed with ``os.scandir``."""
+    listed = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        listed.append(os.fspath(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    return listed
+
+
+def test_save_and_load(tmp_path, project):
+    path = tmp_path / "index"
+    index = StatIndex(path)
+    FileTree(index=index).expand(["src/**/*.py"], project)
+    index.save()
+
+    loaded = StatIndex.load(path)
+    assert len(loaded) == len(index) == 2
+    st = os.stat(project / "src")
+    assert loaded.listing(str(project / "src"), st) == index.listing(
+        str(project / "src"), st
+    )
+
+
+@pytest.mark.parametrize("content", [b"", b"garbage", b"\x00" * 10])
+def test_load_unreadable(tmp_path, content):
+    path = tmp_path / "index"
+    path.write_bytes(content)
+    assert len(StatIndex.load(path)) == 0
+
+
+def test_load_missing(tmp_path):
+    assert len(StatIndex.load(tmp_path / "missing")) == 0
+
+
+def test_unchanged_dirs_are_not_listed(project, scandirs):
+    index = StatIndex()
+    first = FileTree(index=index).expand(["src/**/*.py"], project)
+    assert len(scandirs) == 2
+
+    scandirs.clear()
+    assert FileTree(index=index).expand(["src/**/*.py"], project) == first
+    assert scandirs == []
+
+
+def test_changed_dir_is_listed_again(project, scandirs):
+    index = StatIndex()
+    FileTree(index=index).expand(["src/**/*.py"], project)
+    (project / "src" / "pkg" / "c.py").write_text("c")
+
+    scandirs.clear()
+    files = FileTree(index=index).expand(["src/**/*.py"], project)
+    assert str(project / "src" / "pkg" / "c.py") in files
+    assert scandirs == [str(project / "src" / "pkg")]
+
+
+def test_racy_listing_is_not_trusted(tmp_path):
+    (tmp_path / "a.py").write_text("a")
+    index = StatIndex()
+    st = os.stat(tmp_path)
+    index.record(str(tmp_path), st, [("a.py", False, False)], st.st_mtime_ns)
+    assert index.listing(str(tmp_path), st) is None
+
+    listed_ns = st.st_mtime_ns + RACY_WINDOW_NS
+    index.record(str(tmp_path), st, [("a.py", False, False)], listed_ns)
+    assert index.listing(str(tmp_path), st) == [("a.py", False, False)]
+
+
+def test_is_cached_saves_index(project):
+    save_cache(project, "build", "make", {}, ["src/**/*.py"], [], project)
+    assert is_cached(project, "build", "make", {}, ["src/**/*.py"], [], project)
+    assert len(load_stat_index(project)) == 2
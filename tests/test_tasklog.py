@@ -0,0 +1,49 @@
+"""Tests for conda_tasks.tasklog."""
+
+from __future__ import annotations
+
+import pytest
+
+from conda_tasks.tasklog import LOGS_DIR, TaskLog, log_path
+
+
+def test_log_path_quotes_name(tmp_path):
+    assert log_path(tmp_path, "docs:build/html") == (
+        tmp_path / LOGS_DIR / "docs%3Abuild%2Fhtml.log"
+    )
+
+
+def test_writes_file_and_keeps_tail(tmp_path):
+    path = tmp_path / "logs" / "build.log"
+    with TaskLog(path, tail_bytes=64) as log:
+        log.write(b"hello\n")
+        log.write(b"world\n")
+    assert path.read_bytes() == b"hello\nworld\n"
+    assert log.tail() == b"hello\nworld\n"
+    assert log.size == 12
+
+
+def test_truncates_previous_log(tmp_path):
+    path = tmp_path / "build.log"
+    path.write_bytes(b"old output\n")
+    with TaskLog(path) as log:
+        log.write(b"new\n")
+    assert path.read_bytes() == b"new\n"
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 16, 100])
+def test_tail_is_bounded(tmp_path, chunk):
+    lines = b"".join(b"line %03d\n" % i for i in range(50))
+    with TaskLog(tmp_path / "build.log", tail_bytes=32) as log:
+        for i in range(0, len(lines), chunk):
+            log.write(lines[i : i + chunk])
+    assert (tmp_path / "build.log").read_bytes() == lines
+    assert len(log._ring) == 32
+    # The partial first line is dropped.
+    assert log.tail() == b"line 047\nline 048\nline 049\n"
+
+
+def test_tail_of_exactly_full_buffer(tmp_path):
+    with TaskLog(tmp_path / "build.log", tail_bytes=9) as log:
+        log.write(b"line 001\n")
+    assert log.tail() == b"line 001\n"